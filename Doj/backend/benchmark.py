@@ -0,0 +1,279 @@
+"""
+Performance benchmarks for the maintenance routing backend.
+
+Usage (from the backend folder):
+    python benchmark.py distances
+    python benchmark.py formulations --sizes 10 20 40
+    python benchmark.py engines --sizes 100 1000 --time-limit 5
+    python benchmark.py greedyjob --sizes 10000 50000
+    python benchmark.py warmstart --sizes 40 80 --time-limit 30
+    python benchmark.py incremental --sizes 500 2000
+    python benchmark.py clusters --sizes 3000 --time-limit 60
+    python benchmark.py storage --sizes 2000 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from models import Technician, Task, TaskStatus
+from utils.optimizer import (calculate_distance, build_distance_matrices, optimize_routes_greedy,
+                             optimize_routes_with_gurobi, optimize_routes_with_gurobi_arc, optimize_routes_clustered)
+from utils.alns import optimize_routes_alns
+from utils.incremental import update_plan
+from utils.local_search import improve_routes
+
+SKILLS = ['plomberie', 'électricité', 'climatisation', 'chauffage', 'serrurerie', 'peinture']
+PRIORITIES = ['high', 'medium', 'low']
+
+def make_instance(n_techs: int, n_tasks: int, seed: int = 0) -> Tuple[List[Technician], List[Task]]:
+    """Random technicians and tasks around Paris, like the ones created from the UI"""
+    rng = random.Random(seed)
+    base_lat, base_lng = 48.8566, 2.3522
+
+    technicians = [
+        Technician(
+            id=f"T{j}",
+            name=f"Technicien {j}",
+            skills=rng.sample(SKILLS, 2),
+            available=True,
+            maxTasksPerDay=rng.randint(5, 10),
+            location={"lat": base_lat + (rng.random() - 0.5) * 0.3,
+                      "lng": base_lng + (rng.random() - 0.5) * 0.3}
+        )
+        for j in range(n_techs)
+    ]
+    tasks = [
+        Task(
+            id=f"J{i}",
+            title=f"Tâche {i}",
+            requiredSkill=rng.choice(SKILLS),
+            priority=rng.choice(PRIORITIES),
+            duration=rng.choice([30, 60, 90, 120]),
+            location={"lat": base_lat + (rng.random() - 0.5) * 0.2,
+                      "lng": base_lng + (rng.random() - 0.5) * 0.2}
+        )
+        for i in range(n_tasks)
+    ]
+    return technicians, tasks
+
+def bench_distances(sizes: List[int]):
+    """Scalar calculate_distance loops vs. the vectorized distance matrices"""
+    print(f"{'tasks':>6} {'techs':>6} {'scalar (s)':>12} {'numpy (s)':>12} {'speedup':>9} {'greedy (s)':>11}")
+    for n_tasks in sizes:
+        n_techs = max(3, n_tasks // 20)
+        technicians, tasks = make_instance(n_techs, n_tasks)
+
+        start = time.perf_counter()
+        for tech in technicians:
+            for task in tasks:
+                calculate_distance(tech.location, task.location)
+        for task_a in tasks:
+            for task_b in tasks:
+                calculate_distance(task_a.location, task_b.location)
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_distance_matrices(technicians, tasks)
+        numpy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        optimize_routes_greedy(technicians, tasks)
+        greedy_time = time.perf_counter() - start
+
+        print(f"{n_tasks:>6} {n_techs:>6} {scalar_time:>12.3f} {numpy_time:>12.4f} "
+              f"{scalar_time / numpy_time:>8.0f}x {greedy_time:>11.3f}")
+
+def bench_formulations(sizes: List[int]):
+    """Position (quadratic) vs. arc (linear) Gurobi models on the same instances"""
+    print(f"{'tasks':>6} {'techs':>6} {'model':>9} {'status':>11} {'build (s)':>10} {'time (s)':>9} "
+          f"{'objective':>13} {'gap':>8} {'km':>8}")
+    for n_tasks in sizes:
+        n_techs = max(2, n_tasks // 8)
+        technicians, tasks = make_instance(n_techs, n_tasks)
+        for name, solver in [("position", optimize_routes_with_gurobi), ("arc", optimize_routes_with_gurobi_arc)]:
+            stats = {}
+            routes = solver(technicians, tasks, stats)
+            km = sum(r.totalDistance for r in routes)
+            build = stats.get('buildTime')
+            print(f"{n_tasks:>6} {n_techs:>6} {name:>9} {stats.get('status', '-'):>11} "
+                  f"{build if build is not None else float('nan'):>10.3f} "
+                  f"{stats.get('solveTime', 0):>9.2f} {stats.get('objective', 0):>13.1f} "
+                  f"{stats.get('gap', 0):>8.4f} {km:>8.1f}")
+
+def bench_engines(sizes: List[int], time_limit: float):
+    """Greedy vs. ALNS (same objective as the Gurobi models)"""
+    print(f"{'tasks':>6} {'techs':>6} {'engine':>7} {'time (s)':>9} {'assigned':>9} {'km':>9} {'objective':>14}")
+    for n_tasks in sizes:
+        n_techs = max(2, n_tasks // 20)
+        technicians, tasks = make_instance(n_techs, n_tasks)
+        for name, solver in [("greedy", optimize_routes_greedy),
+                             ("alns", lambda te, ta, st: optimize_routes_alns(te, ta, st, time_limit=time_limit, seed=0))]:
+            stats = {}
+            start = time.perf_counter()
+            routes = solver(technicians, tasks, stats)
+            elapsed = time.perf_counter() - start
+            assigned = sum(r.taskCount for r in routes)
+            km = sum(r.totalDistance for r in routes)
+            print(f"{n_tasks:>6} {n_techs:>6} {name:>7} {elapsed:>9.2f} {assigned:>9} {km:>9.1f} "
+                  f"{stats.get('objective') or 0:>14.1f}")
+
+def bench_greedy_job(sizes: List[int], time_limit: float):
+    """The default greedy job (greedy + local search) on city-scale days, without distance matrices"""
+    print(f"{'tasks':>6} {'techs':>6} {'greedy (s)':>11} {'search (s)':>11} {'moves':>7} "
+          f"{'objective saved':>16} {'km saved':>9}")
+    for n_tasks in sizes:
+        n_techs = max(2, n_tasks // 20)
+        technicians, tasks = make_instance(n_techs, n_tasks)
+        stats = {}
+        start = time.perf_counter()
+        routes = optimize_routes_greedy(technicians, tasks, stats)
+        greedy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        improve_routes(technicians, tasks, routes, stats, time_limit=time_limit)
+        search_time = time.perf_counter() - start
+        report = stats["localSearch"]
+        print(f"{n_tasks:>6} {n_techs:>6} {greedy_time:>11.2f} {search_time:>11.2f} {report['moves']:>7} "
+              f"{report['objectiveSaved']:>16.1f} {report['distanceSaved']:>9.1f}")
+
+def bench_warm_start(sizes: List[int], time_limit: float):
+    """Cold vs. greedy MIP start: time to first incumbent and final gap within the time limit"""
+    print(f"{'tasks':>6} {'techs':>6} {'model':>9} {'start':>7} {'first (s)':>10} {'status':>11} "
+          f"{'time (s)':>9} {'objective':>13} {'gap':>8}")
+    for n_tasks in sizes:
+        n_techs = max(2, n_tasks // 8)
+        technicians, tasks = make_instance(n_techs, n_tasks)
+        for name, solver in [("position", optimize_routes_with_gurobi), ("arc", optimize_routes_with_gurobi_arc)]:
+            for warm_start in (False, True):
+                stats = {}
+                solver(technicians, tasks, stats, time_limit=time_limit, warm_start=warm_start)
+                first = stats.get('timeToFirstIncumbent')
+                print(f"{n_tasks:>6} {n_techs:>6} {name:>9} {'greedy' if warm_start else 'cold':>7} "
+                      f"{first if first is not None else float('nan'):>10.3f} {stats.get('status', '-'):>11} "
+                      f"{stats.get('solveTime', 0):>9.2f} {stats.get('objective') or 0:>13.1f} "
+                      f"{stats.get('gap') or 0:>8.4f}")
+
+def bench_incremental(sizes: List[int], trials: int = 20):
+    """Latency of incremental updates on a plan of n active tasks: one new task, one technician lost"""
+    print(f"{'tasks':>6} {'techs':>6} {'insert median (ms)':>19} {'insert max (ms)':>16} {'unavailable (ms)':>17} {'reassigned':>11}")
+    for n_tasks in sizes:
+        n_techs = max(2, n_tasks // 5)
+        technicians, tasks = make_instance(n_techs, n_tasks + trials)
+        active, new_tasks = tasks[:n_tasks], tasks[n_tasks:]
+        plan = [route.model_dump() for route in optimize_routes_greedy(technicians, active)]
+        # As stored once the plan is saved
+        planned = {t["id"] for route in plan for t in route["tasks"]}
+        active = [task.model_copy(update={"status": TaskStatus.assigned}) if task.id in planned else task for task in active]
+
+        insert_times = []
+        for task in new_tasks:
+            start = time.perf_counter()
+            update_plan(plan, technicians, active + [task], [task])
+            insert_times.append((time.perf_counter() - start) * 1000)
+        insert_times.sort()
+
+        busiest = max(plan, key=lambda route: route["taskCount"])
+        lost = [tech.model_copy(update={"available": tech.id != busiest["technicianId"]}) for tech in technicians]
+        stats = {}
+        start = time.perf_counter()
+        update_plan(plan, lost, active, [], stats)
+        unavailable_time = (time.perf_counter() - start) * 1000
+
+        print(f"{n_tasks:>6} {n_techs:>6} {insert_times[len(insert_times) // 2]:>19.2f} {insert_times[-1]:>16.2f} "
+              f"{unavailable_time:>17.2f} {stats['incremental']['reassigned']:>11}")
+
+def bench_clusters(sizes: List[int], time_limit: float):
+    """Cluster-first, route-second mode (arc model per cluster) vs. the greedy plan on city-scale days"""
+    print(f"{'tasks':>6} {'techs':>6} {'mode':>9} {'clusters':>9} {'time (s)':>9} {'assigned':>9} {'km':>9} {'objective':>14}")
+    for n_tasks in sizes:
+        n_techs = max(2, n_tasks // 30)
+        technicians, tasks = make_instance(n_techs, n_tasks)
+        for name, solver in [("greedy", optimize_routes_greedy),
+                             ("clustered", lambda te, ta, st: optimize_routes_clustered(te, ta, st, time_limit=time_limit))]:
+            stats = {}
+            start = time.perf_counter()
+            routes = solver(technicians, tasks, stats)
+            elapsed = time.perf_counter() - start
+            print(f"{n_tasks:>6} {n_techs:>6} {name:>9} {stats.get('clusters') or '-':>9} {elapsed:>9.2f} "
+                  f"{sum(r.taskCount for r in routes):>9} {sum(r.totalDistance for r in routes):>9.1f} "
+                  f"{stats.get('objective') or 0:>14.1f}")
+
+def bench_storage(sizes: List[int], threads: int = 8, operations: int = 1000):
+    """
+    In-memory vs. SQLite (WAL) store under concurrent API-like load:
+    70% pending-task listings, 20% task lookups, 10% task updates.
+
+    SQLite stays several times slower than memory: every update is a transaction
+    and makes the next listing re-read its rows. Only the changed rows are decoded
+    again, but the fetch still runs under the GIL of the process. This is the price of
+    data shared between processes and kept across restarts. Read-heavy deployments
+    should run several workers on one file rather than threads in one process.
+    """
+    from data import memory_storage, sqlite_storage
+
+    print(f"{'tasks':>6} {'backend':>8} {'ops/s':>9} {'list p95 (ms)':>14} {'get p95 (ms)':>13} {'update p95 (ms)':>16}")
+    for n_tasks in sizes:
+        technicians, tasks = make_instance(max(2, n_tasks // 20), n_tasks)
+        with tempfile.TemporaryDirectory() as folder:
+            sqlite_storage.configure(os.path.join(folder, "bench.db"))
+            for name, backend in [("memory", memory_storage), ("sqlite", sqlite_storage)]:
+                backend.add_technicians(technicians)
+                backend.add_tasks(tasks)
+                rng = random.Random(0)
+                plan = [(rng.random(), rng.choice(tasks).id) for _ in range(operations)]
+
+                def run(op):
+                    draw, task_id = op
+                    start = time.perf_counter()
+                    if draw < 0.7:
+                        kind = "list"
+                        backend.get_all_tasks(status="pending")
+                    elif draw < 0.9:
+                        kind = "get"
+                        backend.get_task_by_id(task_id)
+                    else:
+                        kind = "update"
+                        backend.update_task(task_id, {"status": "pending", "assignedTo": None})
+                    return kind, (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    results = list(executor.map(run, plan))
+                elapsed = time.perf_counter() - start
+
+                def p95(kind):
+                    times = sorted(t for k, t in results if k == kind)
+                    return times[int(0.95 * (len(times) - 1))] if times else float("nan")
+
+                print(f"{n_tasks:>6} {name:>8} {operations / elapsed:>9.0f} {p95('list'):>14.2f} "
+                      f"{p95('get'):>13.3f} {p95('update'):>16.3f}")
+                if backend is sqlite_storage:
+                    for task in tasks:
+                        backend.delete_task(task.id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance routing benchmarks")
+    parser.add_argument("benchmark", choices=["distances", "formulations", "engines", "greedyjob", "warmstart",
+                                                   "incremental", "clusters", "storage"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--time-limit", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.benchmark == "distances":
+        bench_distances(args.sizes)
+    elif args.benchmark == "formulations":
+        bench_formulations(args.sizes)
+    elif args.benchmark == "engines":
+        bench_engines(args.sizes, args.time_limit)
+    elif args.benchmark == "greedyjob":
+        bench_greedy_job(args.sizes, args.time_limit)
+    elif args.benchmark == "warmstart":
+        bench_warm_start(args.sizes, args.time_limit)
+    elif args.benchmark == "incremental":
+        bench_incremental(args.sizes)
+    elif args.benchmark == "clusters":
+        bench_clusters(args.sizes, args.time_limit)
+    elif args.benchmark == "storage":
+        bench_storage(args.sizes)
@@ -0,0 +1,27 @@
+"""
+Collision-free ids for stored records.
+
+Ids keep their historical form (milliseconds since the epoch, as a string) but
+are allocated from a monotonic counter, so records created within the same
+millisecond, or thousands at once by a bulk import, still get distinct ids.
+
+The counter lives in this process, which is enough for the in-memory store. The
+SQLite store is shared by several processes and allocates its ids in the database.
+"""
+import threading
+from datetime import datetime
+from typing import List
+
+_lock = threading.Lock()
+_last_id = 0
+
+def new_ids(count: int) -> List[str]:
+    """Allocate count consecutive ids, all greater than any id handed out before"""
+    global _last_id
+    with _lock:
+        first = max(int(datetime.now().timestamp() * 1000), _last_id + 1)
+        _last_id = first + count - 1
+    return [str(first + k) for k in range(count)]
+
+def new_id() -> str:
+    return new_ids(1)[0]
@@ -0,0 +1,383 @@
+"""
+In-memory storage backend (default). Data is lost when the server stops.
+
+Besides the records, secondary indexes map task status, priority and technician
+(assignedTo) to task ids, and skills to technician ids, so filtered reads cost
+O(result size) instead of a scan. Index sets are insertion-ordered dicts;
+filtered results come in the order tasks last entered the matching set. Every
+write updates the record and its index entries under one lock.
+
+Task ids are also kept sorted for keyset pagination: a page starts right after
+the id of the last item of the previous one, like "WHERE id > ? ORDER BY id".
+
+Every write bumps a global change version and moves the record to the end of a
+change log, so the changes since a version are read from the end of the log.
+"""
+import bisect
+import threading
+import uuid
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional, Iterable, Tuple
+from models import Technician, Task, TechnicianCreate, TaskCreate
+from datetime import datetime
+from data.ids import new_id, new_ids
+from data.sample_data import sample_technicians, sample_tasks
+
+# In-memory storage
+_technicians: Dict[str, Technician] = {}
+_tasks: Dict[str, Task] = {}
+_routes: List[dict] = []
+
+# Secondary indexes: key -> ordered set of ids
+_tasks_by_status: Dict[str, Dict[str, None]] = {}
+_tasks_by_priority: Dict[str, Dict[str, None]] = {}
+_tasks_by_technician: Dict[str, Dict[str, None]] = {}
+_technicians_by_skill: Dict[str, Dict[str, None]] = {}
+# All task ids in sorted order (pagination)
+_task_order: List[str] = []
+
+# Change tracking: (kind, id) -> (version when created, version of the last change, deleted)
+# The epoch identifies this store: versions restart from 0 with every process.
+_epoch = uuid.uuid4().hex[:12]
+_version = 0
+_changes: "OrderedDict[Tuple[str, str], Tuple[int, int, bool]]" = OrderedDict()
+
+_lock = threading.RLock()
+_listeners: List[Callable[[], None]] = []
+
+def _key(value) -> Optional[str]:
+    # Enum members and plain strings index the same way
+    return getattr(value, "value", value)
+
+def _index_add(index: Dict[str, Dict[str, None]], key, item_id: str):
+    if key is not None:
+        index.setdefault(_key(key), {})[item_id] = None
+
+def _index_remove(index: Dict[str, Dict[str, None]], key, item_id: str):
+    if key is None:
+        return
+    ids = index.get(_key(key))
+    if ids is not None:
+        ids.pop(item_id, None)
+        if not ids:
+            del index[_key(key)]
+
+def _index_task(task: Task):
+    _index_add(_tasks_by_status, task.status, task.id)
+    _index_add(_tasks_by_priority, task.priority, task.id)
+    _index_add(_tasks_by_technician, task.assignedTo, task.id)
+
+def _unindex_task(task: Task):
+    _index_remove(_tasks_by_status, task.status, task.id)
+    _index_remove(_tasks_by_priority, task.priority, task.id)
+    _index_remove(_tasks_by_technician, task.assignedTo, task.id)
+
+def _index_technician(tech: Technician):
+    for skill in tech.skills:
+        _index_add(_technicians_by_skill, skill, tech.id)
+
+def _unindex_technician(tech: Technician):
+    for skill in tech.skills:
+        _index_remove(_technicians_by_skill, skill, tech.id)
+
+def _record(kind: str, item_ids: Iterable[str], deleted: bool = False):
+    """Log a change of the given records under a new version (caller holds the lock)"""
+    global _version
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    _version += 1
+    for item_id in item_ids:
+        key = (kind, item_id)
+        created = _changes[key][0] if key in _changes and not _changes[key][2] else _version
+        _changes[key] = (created, _version, deleted)
+        _changes.move_to_end(key)
+    # Readers take the lock, so listeners see the change once the writer releases it
+    for listener in _listeners:
+        listener()
+
+def add_listener(listener: Callable[[], None]):
+    """Call listener (from the writing thread, so it must not block) after each change"""
+    _listeners.append(listener)
+
+def get_version() -> int:
+    return _version
+
+def get_epoch() -> str:
+    return _epoch
+
+def get_changes(since: int) -> Tuple[int, Dict[str, Dict[str, List[str]]]]:
+    """
+    Ids of the technicians, tasks and routes created, updated or deleted after version
+    since, with the current version. Cost follows the number of changes.
+    """
+    changes = {kind: {"created": [], "updated": [], "deleted": []} for kind in ("technicians", "tasks", "routes")}
+    with _lock:
+        version = _version
+        for (kind, item_id), (created, changed, deleted) in reversed(_changes.items()):
+            if changed <= since:
+                break
+            group = "deleted" if deleted else "created" if created > since else "updated"
+            changes[kind][group].append(item_id)
+    # Oldest change first, as in the SQLite backend
+    for groups in changes.values():
+        for ids in groups.values():
+            ids.reverse()
+    return version, changes
+
+# Initialize with sample data
+def initialize_data():
+    add_technicians(sample_technicians())
+    add_tasks(sample_tasks())
+
+@contextmanager
+def batch():
+    """Group several writes so that readers see all of them or none"""
+    with _lock:
+        yield
+
+# Technician operations
+def get_all_technicians(skills: Optional[Iterable[str]] = None, available: Optional[bool] = None) -> List[Technician]:
+    """All technicians, or those having at least one of the given skills"""
+    with _lock:
+        if skills is None:
+            techs = list(_technicians.values())
+        else:
+            ids: Dict[str, None] = {}
+            for skill in skills:
+                ids.update(_technicians_by_skill.get(skill, {}))
+            techs = [_technicians[tech_id] for tech_id in ids]
+    if available is not None:
+        techs = [t for t in techs if t.available == available]
+    return techs
+
+def get_technician_by_id(tech_id: str) -> Optional[Technician]:
+    return _technicians.get(tech_id)
+
+def create_technician(technician: TechnicianCreate) -> Technician:
+    tech_id = new_id()
+    tech = Technician(id=tech_id, **technician.model_dump())
+    with _lock:
+        _technicians[tech_id] = tech
+        _index_technician(tech)
+        _record("technicians", [tech_id])
+    return tech
+
+def update_technician(tech_id: str, update_data: dict) -> Optional[Technician]:
+    with _lock:
+        if tech_id not in _technicians:
+            return None
+
+        tech = _technicians[tech_id]
+        _unindex_technician(tech)
+        try:
+            for key, value in update_data.items():
+                if value is not None and hasattr(tech, key):
+                    setattr(tech, key, value)
+        finally:
+            _index_technician(tech)
+            _record("technicians", [tech_id])
+
+    return tech
+
+def delete_technician(tech_id: str) -> bool:
+    with _lock:
+        if tech_id in _technicians:
+            _unindex_technician(_technicians.pop(tech_id))
+            _record("technicians", [tech_id], deleted=True)
+            return True
+    return False
+
+def create_technicians(technicians: List[TechnicianCreate]) -> Tuple[List[Technician], List[Tuple[int, str]]]:
+    """
+    Create validated technicians at once (all visible together). Returns the created
+    technicians and (index, error) for the ones rejected (an id already stored).
+    """
+    techs = [Technician(id=tech_id, **technician.model_dump())
+             for tech_id, technician in zip(new_ids(len(technicians)), technicians)]
+    with _lock:
+        rejected = [(index, f"Id {tech.id} already exists") for index, tech in enumerate(techs)
+                    if tech.id in _technicians]
+        created = [tech for tech in techs if tech.id not in _technicians]
+        add_technicians(created)
+    return created, rejected
+
+def add_technicians(technicians: List[Technician]) -> int:
+    """Store fully-formed technicians (ids included)"""
+    with _lock:
+        for tech in technicians:
+            if tech.id in _technicians:
+                _unindex_technician(_technicians[tech.id])
+            _technicians[tech.id] = tech
+            _index_technician(tech)
+        _record("technicians", [tech.id for tech in technicians])
+    return len(technicians)
+
+# Task operations
+def get_all_tasks(status: Optional[str] = None, priority: Optional[str] = None,
+                  assigned_to: Optional[str] = None) -> List[Task]:
+    filters = [(index, _key(value)) for index, value in ((_tasks_by_status, status),
+                                                          (_tasks_by_priority, priority),
+                                                          (_tasks_by_technician, assigned_to)) if value]
+    with _lock:
+        if not filters:
+            return list(_tasks.values())
+
+        # Walk the smallest matching id set and check membership in the others
+        id_sets = sorted((index.get(value, {}) for index, value in filters), key=len)
+        smallest, others = id_sets[0], id_sets[1:]
+        return [_tasks[task_id] for task_id in smallest if all(task_id in ids for ids in others)]
+
+def get_tasks_page(limit: int, after: Optional[str] = None, status: Optional[str] = None,
+                   priority: Optional[str] = None, assigned_to: Optional[str] = None) -> List[Task]:
+    """Up to limit tasks matching the filters, in id order, starting after the given id"""
+    filters = [(index, _key(value)) for index, value in ((_tasks_by_status, status),
+                                                          (_tasks_by_priority, priority),
+                                                          (_tasks_by_technician, assigned_to)) if value]
+    with _lock:
+        id_sets = sorted((index.get(value, {}) for index, value in filters), key=len)
+        order = _task_order
+        if id_sets and len(id_sets[0]) * 8 < len(_task_order):
+            # Selective filter: sorting its few ids beats walking every task
+            order = sorted(id_sets[0])
+        start = bisect.bisect_right(order, after) if after is not None else 0
+        page = []
+        for i in range(start, len(order)):
+            task_id = order[i]
+            if all(task_id in ids for ids in id_sets):
+                page.append(_tasks[task_id])
+                if len(page) >= limit:
+                    break
+        return page
+
+def get_task_by_id(task_id: str) -> Optional[Task]:
+    return _tasks.get(task_id)
+
+def create_task(task: TaskCreate) -> Task:
+    task_id = new_id()
+    new_task = Task(id=task_id, status="pending", assignedTo=None, **task.model_dump())
+    with _lock:
+        _tasks[task_id] = new_task
+        _index_task(new_task)
+        bisect.insort(_task_order, task_id)
+        _record("tasks", [task_id])
+    return new_task
+
+def update_task(task_id: str, update_data: dict) -> Optional[Task]:
+    with _lock:
+        if task_id not in _tasks:
+            return None
+
+        task = _tasks[task_id]
+        _unindex_task(task)
+        try:
+            for key, value in update_data.items():
+                if value is not None and hasattr(task, key):
+                    setattr(task, key, value)
+        finally:
+            _index_task(task)
+            _record("tasks", [task_id])
+
+    return task
+
+def update_tasks(update_data: dict, status: Optional[str] = None, priority: Optional[str] = None,
+                 assigned_to: Optional[str] = None) -> int:
+    """
+    Apply the same update to every task matching the filters (all tasks without filters),
+    in one pass under the lock. assignedTo=None clears the assignment.
+    """
+    with _lock:
+        tasks = get_all_tasks(status=status, priority=priority, assigned_to=assigned_to)
+        for task in tasks:
+            _unindex_task(task)
+            try:
+                for key, value in update_data.items():
+                    if (value is not None or key == "assignedTo") and hasattr(task, key):
+                        setattr(task, key, value)
+            finally:
+                _index_task(task)
+        _record("tasks", [task.id for task in tasks])
+    return len(tasks)
+
+def delete_task(task_id: str) -> bool:
+    with _lock:
+        if task_id in _tasks:
+            _unindex_task(_tasks.pop(task_id))
+            del _task_order[bisect.bisect_left(_task_order, task_id)]
+            _record("tasks", [task_id], deleted=True)
+            return True
+    return False
+
+def create_tasks(tasks: List[TaskCreate]) -> Tuple[List[Task], List[Tuple[int, str]]]:
+    """
+    Create validated tasks at once (all visible together). Returns the created tasks
+    and (index, error) for the ones rejected (an id already stored).
+    """
+    new_tasks = [Task(id=task_id, status="pending", assignedTo=None, **task.model_dump())
+                 for task_id, task in zip(new_ids(len(tasks)), tasks)]
+    with _lock:
+        rejected = [(index, f"Id {task.id} already exists") for index, task in enumerate(new_tasks)
+                    if task.id in _tasks]
+        created = [task for task in new_tasks if task.id not in _tasks]
+        add_tasks(created)
+    return created, rejected
+
+def add_tasks(tasks: List[Task]) -> int:
+    """Store fully-formed tasks (ids included)"""
+    with _lock:
+        added = False
+        for task in tasks:
+            if task.id in _tasks:
+                _unindex_task(_tasks[task.id])
+            else:
+                _task_order.append(task.id)
+                added = True
+            _tasks[task.id] = task
+            _index_task(task)
+        if added:
+            # Nearly sorted already (new ids are increasing): linear for timsort
+            _task_order.sort()
+        _record("tasks", [task.id for task in tasks])
+    return len(tasks)
+
+# Route operations
+def get_all_routes() -> List[dict]:
+    return _routes
+
+def get_routes_page(limit: int, after: Optional[str] = None) -> List[dict]:
+    """Up to limit saved results, oldest first, starting after the given id"""
+    with _lock:
+        # Route ids are allocated in increasing order, so the list is sorted by id
+        start = bisect.bisect_right(_routes, after, key=lambda route: route["id"]) if after is not None else 0
+        return _routes[start:start + limit]
+
+def get_latest_route() -> Optional[dict]:
+    return _routes[-1] if _routes else None
+
+def update_route(route_id: str, update_data: dict) -> Optional[dict]:
+    with _lock:
+        for route in _routes:
+            if route["id"] == route_id:
+                route.update(update_data)
+                _record("routes", [route_id])
+                return route
+    return None
+
+def save_route(route: dict) -> dict:
+    route_id = new_id()
+    route["id"] = route_id
+    route["createdAt"] = datetime.now().isoformat()
+    with _lock:
+        _routes.append(route)
+        _record("routes", [route_id])
+    return route
+
+def clear_routes():
+    global _routes
+    with _lock:
+        _record("routes", [route["id"] for route in _routes], deleted=True)
+        _routes = []
+
+# Initialize data on module import
+initialize_data()
@@ -0,0 +1,73 @@
+"""
+Sample technicians and tasks loaded into an empty store.
+"""
+from typing import List
+from models import Technician, Task, TechnicianCreate, TaskCreate
+
+def sample_technicians() -> List[Technician]:
+    samples = [
+        TechnicianCreate(
+            name="Jean Dupont",
+            skills=["plomberie", "électricité"],
+            available=True,
+            maxTasksPerDay=5,
+            location={"lat": 48.8566, "lng": 2.3522, "address": ""}
+        ),
+        TechnicianCreate(
+            name="Marie Martin",
+            skills=["électricité", "climatisation"],
+            available=True,
+            maxTasksPerDay=6,
+            location={"lat": 48.8606, "lng": 2.3376, "address": ""}
+        ),
+        TechnicianCreate(
+            name="Pierre Dubois",
+            skills=["plomberie", "chauffage"],
+            available=True,
+            maxTasksPerDay=5,
+            location={"lat": 48.8534, "lng": 2.3488, "address": ""}
+        )
+    ]
+    
+    return [Technician(id=str(i), **tech_data.model_dump()) for i, tech_data in enumerate(samples, 1)]
+
+def sample_tasks() -> List[Task]:
+    samples = [
+        TaskCreate(
+            title="Réparation fuite d'eau",
+            description="Fuite sous l'évier de la cuisine",
+            requiredSkill="plomberie",
+            priority="high",
+            duration=60,
+            location={"lat": 48.8584, "lng": 2.2945, "address": "15 Rue de la Pompe, Paris"}
+        ),
+        TaskCreate(
+            title="Installation climatiseur",
+            description="Installation d'un nouveau climatiseur",
+            requiredSkill="climatisation",
+            priority="medium",
+            duration=120,
+            location={"lat": 48.8738, "lng": 2.2950, "address": "45 Avenue Victor Hugo, Paris"}
+        ),
+        TaskCreate(
+            title="Problème électrique",
+            description="Disjoncteur qui saute régulièrement",
+            requiredSkill="électricité",
+            priority="high",
+            duration=90,
+            location={"lat": 48.8462, "lng": 2.3372, "address": "23 Boulevard Saint-Michel, Paris"}
+        ),
+        TaskCreate(
+            title="Entretien chaudière",
+            description="Entretien annuel de la chaudière",
+            requiredSkill="chauffage",
+            priority="low",
+            duration=60,
+            location={"lat": 48.8700, "lng": 2.3400, "address": "10 Rue de Provence, Paris"}
+        )
+    ]
+    
+    return [
+        Task(id=str(i), status="pending", assignedTo=None, **task_data.model_dump())
+        for i, task_data in enumerate(samples, 1)
+    ]
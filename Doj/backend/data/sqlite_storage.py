@@ -0,0 +1,535 @@
+"""
+SQLite storage backend (STORAGE_BACKEND=sqlite), with the same interface as memory_storage.
+
+The database runs in WAL mode so readers never block the single writer, and each
+thread gets its own connection. Every query is a fixed parameterized statement, so
+sqlite3's statement cache reuses the prepared statements. Writes issued inside
+batch() share one transaction.
+
+Every write also bumps the change version kept in the meta table and upserts
+its records in the changes table, in the same transaction.
+
+Listings are decoded into models once per change version and shared by the
+threads of the process until the next write (see _cached_list).
+
+Ids are allocated from a counter in the meta table, in the transaction that inserts
+the records, so processes sharing the file never hand out the same id. Records are
+created with plain INSERTs: an id collision fails instead of replacing a row.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Dict, Optional, Iterable, Tuple
+import numpy as np
+from models import Technician, Task, TechnicianCreate, TaskCreate, Location, Priority, TaskStatus
+from data.sample_data import sample_technicians, sample_tasks
+
+STORAGE_PATH = os.environ.get("STORAGE_PATH", "maintenance.db")
+BUSY_TIMEOUT = 30  # seconds a writer waits for the lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS technicians (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    skills TEXT NOT NULL,
+    available INTEGER NOT NULL,
+    maxTasksPerDay INTEGER NOT NULL,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    address TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    requiredSkill TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    address TEXT,
+    status TEXT NOT NULL,
+    assignedTo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_skill ON tasks(requiredSkill);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned ON tasks(assignedTo);
+CREATE TABLE IF NOT EXISTS routes (
+    id TEXT PRIMARY KEY,
+    createdAt TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    createdVersion INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS idx_changes_version ON changes(version);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('lastId', 0);
+-- Files written before the counter existed: start it above the stored ids
+UPDATE meta SET value = MAX(value,
+    (SELECT COALESCE(MAX(CAST(id AS INTEGER)), 0) FROM technicians),
+    (SELECT COALESCE(MAX(CAST(id AS INTEGER)), 0) FROM tasks),
+    (SELECT COALESCE(MAX(CAST(id AS INTEGER)), 0) FROM routes)) WHERE key = 'lastId';
+"""
+
+TECH_COLUMNS = "id, name, skills, available, maxTasksPerDay, lat, lng, address"
+TASK_COLUMNS = "id, title, description, requiredSkill, priority, duration, lat, lng, address, status, assignedTo"
+
+INSERT_TECH = f"INSERT INTO technicians ({TECH_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_TASK = f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# Edits keep the row (and its rowid, which orders the listings)
+UPDATE_TECH = ("UPDATE technicians SET " + ", ".join(f"{column} = ?" for column in TECH_COLUMNS.split(", ")[1:])
+               + " WHERE id = ?")
+UPDATE_TASK = ("UPDATE tasks SET " + ", ".join(f"{column} = ?" for column in TASK_COLUMNS.split(", ")[1:])
+               + " WHERE id = ?")
+SELECT_TECHS = f"SELECT {TECH_COLUMNS} FROM technicians ORDER BY rowid"
+SELECT_TECH = f"SELECT {TECH_COLUMNS} FROM technicians WHERE id = ?"
+SELECT_TASKS = f"SELECT {TASK_COLUMNS} FROM tasks"
+SELECT_TASK = f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?"
+SELECT_STATE = "SELECT (SELECT value FROM meta WHERE key = 'epoch'), (SELECT value FROM meta WHERE key = 'version')"
+BUMP_VERSION = "UPDATE meta SET value = value + 1 WHERE key = 'version' RETURNING value"
+# Ids keep their historical form (milliseconds since the epoch) while staying above every id handed out
+ALLOCATE_IDS = "UPDATE meta SET value = MAX(value + ?, ?) WHERE key = 'lastId' RETURNING value"
+RESERVE_ID = "UPDATE meta SET value = MAX(value, ?) WHERE key = 'lastId'"
+UPSERT_CHANGE = """
+INSERT INTO changes (kind, id, createdVersion, version, deleted) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (kind, id) DO UPDATE SET
+    createdVersion = CASE WHEN changes.deleted THEN excluded.createdVersion ELSE changes.createdVersion END,
+    version = excluded.version,
+    deleted = excluded.deleted
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+_listeners: List[Callable[[], None]] = []
+# Decoded listings: (path, query) -> ((epoch, version) they were read at, models)
+_list_cache: Dict[tuple, Tuple[tuple, list]] = {}
+# Decoded rows: (path, table) -> {id: (row, model)}, so a listing re-read after a write
+# only decodes the rows that changed
+_row_cache: Dict[tuple, Dict[str, tuple]] = {}
+_cache_lock = threading.Lock()
+
+def configure(path: str):
+    """Use another database file (e.g. for benchmarks); connections are reopened lazily"""
+    global STORAGE_PATH
+    STORAGE_PATH = path
+    _local.__dict__.clear()
+
+def _connect() -> sqlite3.Connection:
+    # Autocommit mode: transactions are opened explicitly by batch()
+    conn = sqlite3.connect(STORAGE_PATH, isolation_level=None, check_same_thread=False,
+                           timeout=BUSY_TIMEOUT, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}")
+    with _init_lock:
+        if STORAGE_PATH not in _initialized:
+            conn.executescript(SCHEMA)
+            # The epoch identifies the database file; versions persist with it
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)",
+                         (int(datetime.now().timestamp() * 1000),))
+            _initialized.add(STORAGE_PATH)
+            _local.conn, _local.path, _local.depth = conn, STORAGE_PATH, 0
+            initialize_data()
+    return conn
+
+def _conn() -> sqlite3.Connection:
+    if getattr(_local, "path", None) != STORAGE_PATH:
+        _local.conn, _local.path, _local.depth = _connect(), STORAGE_PATH, 0
+    return _local.conn
+
+@contextmanager
+def batch():
+    """Run the enclosed writes in one transaction (nested calls join the outer one)"""
+    conn = _conn()
+    if _local.depth:
+        _local.depth += 1
+        try:
+            yield
+        finally:
+            _local.depth -= 1
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    _local.depth = 1
+    _local.changed = False
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+        # Listeners run once the change is visible to other connections
+        if _local.changed:
+            for listener in _listeners:
+                listener()
+    finally:
+        _local.depth = 0
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _enum_value(value) -> str:
+    # Models hold enum members, or plain strings after an in-place update
+    return getattr(value, "value", value)
+
+def _decode(table: str, rows: Iterable[tuple], convert: Callable, complete: bool = False) -> list:
+    """Models of rows, reusing the ones decoded from identical rows (complete: rows hold the whole table)"""
+    with _cache_lock:
+        decoded = _row_cache.setdefault((STORAGE_PATH, table), {})
+    items, seen = [], {}
+    for row in rows:
+        cached = decoded.get(row[0])
+        model = cached[1] if cached is not None and cached[0] == row else convert(row)
+        seen[row[0]] = (row, model)
+        items.append(model)
+    with _cache_lock:
+        if complete:
+            # Drops the rows deleted since
+            _row_cache[(STORAGE_PATH, table)] = seen
+        else:
+            decoded.update(seen)
+    return items
+
+def _cached_list(key: tuple, sql: str, params: list, convert: Callable) -> list:
+    """
+    Rows of a listing as models, decoded once per change version. Every write (from any
+    process) bumps the version, so a cached listing stays valid until the next write.
+    key starts with the table name and holds the filters. The models are shared between
+    callers and must be treated as read-only.
+    """
+    conn = _conn()
+    key = (STORAGE_PATH,) + key
+    if conn.in_transaction:
+        # Uncommitted writes may still be rolled back: read without the cache
+        return [convert(row) for row in conn.execute(sql, params)]
+    # The version and the rows are read from the same snapshot
+    conn.execute("BEGIN")
+    try:
+        state = conn.execute(SELECT_STATE).fetchone()
+        with _cache_lock:
+            cached = _list_cache.get(key)
+        if cached is not None and cached[0] == state:
+            return list(cached[1])
+        items = _decode(key[1], conn.execute(sql, params), convert, complete=not params)
+    finally:
+        conn.execute("COMMIT")
+    with _cache_lock:
+        _list_cache[key] = (state, items)
+    return list(items)
+
+# Row conversion
+def _tech_params(tech: Technician) -> tuple:
+    return (tech.id, tech.name, json.dumps(tech.skills), int(tech.available), tech.maxTasksPerDay,
+            tech.location.lat, tech.location.lng, tech.location.address)
+
+# Rows were validated when written, so models are built without validating them again
+def _tech_from_row(row) -> Technician:
+    return Technician.model_construct(
+        id=row[0], name=row[1], skills=json.loads(row[2]), available=bool(row[3]), maxTasksPerDay=row[4],
+        location=Location.model_construct(lat=row[5], lng=row[6], address=row[7])
+    )
+
+def _task_params(task: Task) -> tuple:
+    return (task.id, task.title, task.description, task.requiredSkill, _enum_value(task.priority), task.duration,
+            task.location.lat, task.location.lng, task.location.address, _enum_value(task.status), task.assignedTo)
+
+_PRIORITIES = {priority.value: priority for priority in Priority}
+_STATUSES = {status.value: status for status in TaskStatus}
+
+def _task_from_row(row) -> Task:
+    return Task.model_construct(
+        id=row[0], title=row[1], description=row[2], requiredSkill=row[3], priority=_PRIORITIES[row[4]],
+        duration=row[5], location=Location.model_construct(lat=row[6], lng=row[7], address=row[8]),
+        status=_STATUSES[row[9]], assignedTo=row[10]
+    )
+
+def _allocate_ids(count: int) -> List[str]:
+    """count new ids (call inside batch(), so the counter moves with the inserts)"""
+    if count == 0:
+        return []
+    now = int(datetime.now().timestamp() * 1000)
+    last = _conn().execute(ALLOCATE_IDS, (count, now + count - 1)).fetchone()[0]
+    return [str(last - count + 1 + k) for k in range(count)]
+
+def _reserve_ids(item_ids: Iterable[str]):
+    """Keep the id counter above ids stored as given (call inside batch())"""
+    numeric = [int(item_id) for item_id in item_ids if item_id.isdigit()]
+    if numeric:
+        _conn().execute(RESERVE_ID, (max(numeric),))
+
+def _insert_each(sql: str, items: list, params: Callable) -> Tuple[list, List[Tuple[int, str]]]:
+    """Insert items one statement each (call inside batch()): a duplicate id rejects its row only"""
+    conn = _conn()
+    stored, rejected = [], []
+    for index, item in enumerate(items):
+        try:
+            conn.execute(sql, params(item))
+        except sqlite3.IntegrityError as e:
+            rejected.append((index, f"Id {item.id} already exists ({e})"))
+        else:
+            stored.append(item)
+    return stored, rejected
+
+def _record(kind: str, item_ids: Iterable[str], deleted: bool = False):
+    """Log a change of the given records under a new version (call inside batch())"""
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    conn = _conn()
+    version = conn.execute(BUMP_VERSION).fetchone()[0]
+    conn.executemany(UPSERT_CHANGE, [(kind, item_id, version, version, int(deleted)) for item_id in item_ids])
+    _local.changed = True
+
+def add_listener(listener: Callable[[], None]):
+    """Call listener (from the writing thread, so it must not block) after each committed change"""
+    _listeners.append(listener)
+
+def get_version() -> int:
+    return _conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+def get_epoch() -> str:
+    return str(_conn().execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0])
+
+def get_changes(since: int) -> Tuple[int, Dict[str, Dict[str, List[str]]]]:
+    """
+    Ids of the technicians, tasks and routes created, updated or deleted after version
+    since, with the current version (read through idx_changes_version).
+    """
+    changes = {kind: {"created": [], "updated": [], "deleted": []} for kind in ("technicians", "tasks", "routes")}
+    version = get_version()
+    rows = _conn().execute("SELECT kind, id, createdVersion, deleted FROM changes "
+                           "WHERE version > ? AND version <= ? ORDER BY version", (since, version))
+    for kind, item_id, created, deleted in rows:
+        group = "deleted" if deleted else "created" if created > since else "updated"
+        changes[kind][group].append(item_id)
+    return version, changes
+
+# Initialize with sample data
+def initialize_data():
+    conn = _conn()
+    with batch():
+        if conn.execute("SELECT COUNT(*) FROM technicians").fetchone()[0] == 0:
+            add_technicians(sample_technicians())
+        if conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0:
+            add_tasks(sample_tasks())
+
+# Technician operations
+def get_all_technicians(skills: Optional[Iterable[str]] = None, available: Optional[bool] = None) -> List[Technician]:
+    """All technicians, or those having at least one of the given skills"""
+    techs = _cached_list(("technicians",), SELECT_TECHS, [], _tech_from_row)
+    if skills is not None:
+        skills = set(skills)
+        techs = [t for t in techs if skills.intersection(t.skills)]
+    if available is not None:
+        techs = [t for t in techs if t.available == available]
+    return techs
+
+def get_technician_by_id(tech_id: str) -> Optional[Technician]:
+    row = _conn().execute(SELECT_TECH, (tech_id,)).fetchone()
+    return _tech_from_row(row) if row else None
+
+def create_technician(technician: TechnicianCreate) -> Technician:
+    with batch():
+        tech = Technician(id=_allocate_ids(1)[0], **technician.model_dump())
+        _conn().execute(INSERT_TECH, _tech_params(tech))
+        _record("technicians", [tech.id])
+    return tech
+
+def update_technician(tech_id: str, update_data: dict) -> Optional[Technician]:
+    with batch():
+        tech = get_technician_by_id(tech_id)
+        if tech is None:
+            return None
+        for key, value in update_data.items():
+            if value is not None and hasattr(tech, key):
+                setattr(tech, key, value)
+        params = _tech_params(Technician.model_validate(tech.model_dump()))
+        _conn().execute(UPDATE_TECH, params[1:] + (tech_id,))
+        _record("technicians", [tech_id])
+    return tech
+
+def delete_technician(tech_id: str) -> bool:
+    with batch():
+        deleted = _conn().execute("DELETE FROM technicians WHERE id = ?", (tech_id,)).rowcount > 0
+        if deleted:
+            _record("technicians", [tech_id], deleted=True)
+    return deleted
+
+def create_technicians(technicians: List[TechnicianCreate]) -> Tuple[List[Technician], List[Tuple[int, str]]]:
+    """
+    Create validated technicians in one transaction. Returns the created technicians
+    and (index, error) for the ones rejected (an id already stored).
+    """
+    with batch():
+        techs = [Technician(id=tech_id, **technician.model_dump())
+                 for tech_id, technician in zip(_allocate_ids(len(technicians)), technicians)]
+        created, rejected = _insert_each(INSERT_TECH, techs, _tech_params)
+        _record("technicians", [tech.id for tech in created])
+    return created, rejected
+
+def add_technicians(technicians: List[Technician]) -> int:
+    """Store fully-formed technicians (ids included; an id already stored fails the batch)"""
+    with batch():
+        _conn().executemany(INSERT_TECH, [_tech_params(tech) for tech in technicians])
+        _reserve_ids(tech.id for tech in technicians)
+        _record("technicians", [tech.id for tech in technicians])
+    return len(technicians)
+
+# Task operations
+def get_all_tasks(status: Optional[str] = None, priority: Optional[str] = None,
+                  assigned_to: Optional[str] = None) -> List[Task]:
+    # Each filter combination gives one fixed statement, so all of them stay in the statement cache
+    filters = [(column, _enum_value(value)) for column, value in
+               (("status", status), ("priority", priority), ("assignedTo", assigned_to)) if value]
+    where = " WHERE " + " AND ".join(f"{column} = ?" for column, _ in filters) if filters else ""
+    return _cached_list(("tasks",) + tuple(filters), SELECT_TASKS + where + " ORDER BY rowid",
+                        [value for _, value in filters], _task_from_row)
+
+def get_tasks_page(limit: int, after: Optional[str] = None, status: Optional[str] = None,
+                   priority: Optional[str] = None, assigned_to: Optional[str] = None) -> List[Task]:
+    """Up to limit tasks matching the filters, in id order, starting after the given id"""
+    conditions, params = [], []
+    for column, value in (("status", status), ("priority", priority), ("assignedTo", assigned_to)):
+        if value:
+            conditions.append(f"{column} = ?")
+            params.append(_enum_value(value))
+    if after is not None:
+        conditions.append("id > ?")
+        params.append(after)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    rows = _conn().execute(SELECT_TASKS + where + " ORDER BY id LIMIT ?", params + [limit])
+    return [_task_from_row(row) for row in rows]
+
+def get_task_by_id(task_id: str) -> Optional[Task]:
+    row = _conn().execute(SELECT_TASK, (task_id,)).fetchone()
+    return _task_from_row(row) if row else None
+
+def create_task(task: TaskCreate) -> Task:
+    with batch():
+        new_task = Task(id=_allocate_ids(1)[0], status="pending", assignedTo=None, **task.model_dump())
+        _conn().execute(INSERT_TASK, _task_params(new_task))
+        _record("tasks", [new_task.id])
+    return new_task
+
+def update_task(task_id: str, update_data: dict) -> Optional[Task]:
+    with batch():
+        task = get_task_by_id(task_id)
+        if task is None:
+            return None
+        for key, value in update_data.items():
+            if value is not None and hasattr(task, key):
+                setattr(task, key, value)
+        task = Task.model_validate(task.model_dump())
+        _conn().execute(UPDATE_TASK, _task_params(task)[1:] + (task_id,))
+        _record("tasks", [task_id])
+    return task
+
+def update_tasks(update_data: dict, status: Optional[str] = None, priority: Optional[str] = None,
+                 assigned_to: Optional[str] = None) -> int:
+    """
+    Apply the same update to every task matching the filters (all tasks without filters)
+    with one UPDATE statement. assignedTo=None clears the assignment.
+    """
+    assignments = []
+    for key, value in update_data.items():
+        if key == "location" and value is not None:
+            location = value if isinstance(value, dict) else value.model_dump()
+            assignments += [("lat", location["lat"]), ("lng", location["lng"]), ("address", location.get("address"))]
+        elif key in TASK_COLUMNS.split(", ") and key != "id" and (value is not None or key == "assignedTo"):
+            assignments.append((key, _enum_value(value)))
+    if not assignments:
+        return 0
+    filters = [(column, _enum_value(value)) for column, value in
+               (("status", status), ("priority", priority), ("assignedTo", assigned_to)) if value]
+    where = " WHERE " + " AND ".join(f"{column} = ?" for column, _ in filters) if filters else ""
+    sql = "UPDATE tasks SET " + ", ".join(f"{column} = ?" for column, _ in assignments) + where
+    with batch():
+        rows = _conn().execute(sql + " RETURNING id", [value for _, value in assignments + filters])
+        updated = [row[0] for row in rows]
+        _record("tasks", updated)
+    return len(updated)
+
+def delete_task(task_id: str) -> bool:
+    with batch():
+        deleted = _conn().execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount > 0
+        if deleted:
+            _record("tasks", [task_id], deleted=True)
+    return deleted
+
+def create_tasks(tasks: List[TaskCreate]) -> Tuple[List[Task], List[Tuple[int, str]]]:
+    """
+    Create validated tasks in one transaction. Returns the created tasks and
+    (index, error) for the ones rejected (an id already stored).
+    """
+    with batch():
+        new_tasks = [Task(id=task_id, status="pending", assignedTo=None, **task.model_dump())
+                     for task_id, task in zip(_allocate_ids(len(tasks)), tasks)]
+        created, rejected = _insert_each(INSERT_TASK, new_tasks, _task_params)
+        _record("tasks", [task.id for task in created])
+    return created, rejected
+
+def add_tasks(tasks: List[Task]) -> int:
+    """Store fully-formed tasks (ids included; an id already stored fails the batch)"""
+    with batch():
+        _conn().executemany(INSERT_TASK, [_task_params(task) for task in tasks])
+        _reserve_ids(task.id for task in tasks)
+        _record("tasks", [task.id for task in tasks])
+    return len(tasks)
+
+# Route operations
+def get_all_routes() -> List[dict]:
+    return [json.loads(row[0]) for row in _conn().execute("SELECT data FROM routes ORDER BY rowid")]
+
+def get_routes_page(limit: int, after: Optional[str] = None) -> List[dict]:
+    """Up to limit saved results, oldest first, starting after the given id"""
+    rows = _conn().execute("SELECT data FROM routes WHERE id > ? ORDER BY id LIMIT ?", (after or "", limit))
+    return [json.loads(row[0]) for row in rows]
+
+def get_latest_route() -> Optional[dict]:
+    row = _conn().execute("SELECT data FROM routes ORDER BY rowid DESC LIMIT 1").fetchone()
+    return json.loads(row[0]) if row else None
+
+def update_route(route_id: str, update_data: dict) -> Optional[dict]:
+    with batch():
+        row = _conn().execute("SELECT data FROM routes WHERE id = ?", (route_id,)).fetchone()
+        if row is None:
+            return None
+        route = json.loads(row[0])
+        route.update(update_data)
+        _conn().execute("UPDATE routes SET data = ? WHERE id = ?",
+                        (json.dumps(route, default=_json_default), route_id))
+        _record("routes", [route_id])
+    return json.loads(json.dumps(route, default=_json_default))
+
+def save_route(route: dict) -> dict:
+    with batch():
+        route["id"] = _allocate_ids(1)[0]
+        route["createdAt"] = datetime.now().isoformat()
+        data = json.dumps(route, default=_json_default)
+        _conn().execute("INSERT INTO routes (id, createdAt, data) VALUES (?, ?, ?)",
+                        (route["id"], route["createdAt"], data))
+        _record("routes", [route["id"]])
+    return json.loads(data)
+
+def clear_routes():
+    with batch():
+        _record("routes", [row[0] for row in _conn().execute("DELETE FROM routes RETURNING id")], deleted=True)
@@ -1,6 +1,10 @@
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from routes import technicians, tasks, routes
+from routes import technicians, tasks, routes, sync
+from utils.jobs import job_manager
+from data import storage
+from utils.changes import broadcaster
 
 app = FastAPI(
     title="Maintenance Routing API",
@@ -21,10 +25,31 @@ app.add_middleware(
 app.include_router(technicians.router, prefix="/api/technicians", tags=["Technicians"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(routes.router, prefix="/api/routes", tags=["Routes"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+
+@app.on_event("startup")
+async def start_job_manager():
+    job_manager.start()
+    broadcaster.start()
+
+@app.on_event("shutdown")
+async def stop_job_manager():
+    await broadcaster.shutdown()
+    job_manager.shutdown()
+
+@app.websocket("/api/ws")
+async def change_events(websocket: WebSocket, since: int = 0, epoch: Optional[str] = None):
+    """
+    Live change feed: a first "changes" message since the given version (same
+    content as GET /api/sync), then a "changes" message after each write and a
+    "job" message for each optimization job state change.
+    """
+    await broadcaster.serve(websocket, since, epoch)
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "ok", "message": "Server is running"}
+    return {"status": "ok", "message": "Server is running", "storage": storage.STORAGE_BACKEND,
+            "solverPool": job_manager.pool_status()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from enum import Enum
 
 class Location(BaseModel):
@@ -61,6 +61,18 @@ class TaskUpdate(BaseModel):
     status: Optional[TaskStatus] = None
     assignedTo: Optional[str] = None
 
+class TaskFilter(BaseModel):
+    status: Optional[TaskStatus] = None
+    priority: Optional[Priority] = None
+    assignedTo: Optional[str] = None
+
+class BulkTaskUpdate(BaseModel):
+    filter: TaskFilter
+    update: TaskUpdate
+
+class BulkUpdateResult(BaseModel):
+    updated: int
+
 class Task(TaskBase):
     id: str
     status: TaskStatus = TaskStatus.pending
@@ -69,6 +81,15 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    ids: List[str]
+    errors: List[BulkRowError]
+
 class OptimizedTask(BaseModel):
     id: str
     title: str
@@ -87,9 +108,127 @@ class TechnicianRoute(BaseModel):
     totalDuration: int
     taskCount: int
 
+class LocalSearchReport(BaseModel):
+    moves: int
+    # Weighted distance minus rewards, the objective the search minimises
+    objectiveBefore: float
+    objectiveAfter: float
+    objectiveSaved: float
+    # Plain km, informational
+    distanceBefore: float
+    distanceAfter: float
+    distanceSaved: float
+    time: float
+
+class IncrementalReport(BaseModel):
+    inserted: int
+    reassigned: int
+    unassigned: int
+    touchedRoutes: int
+    moves: int
+    time: float
+    updates: int = 1
+
+class BoundaryRepairReport(BaseModel):
+    inserted: int
+    moves: int
+    pairs: int
+    time: float
+
+class ObjectiveLevel(BaseModel):
+    name: str
+    value: Optional[float] = None
+    bound: Optional[float] = None
+    gap: Optional[float] = None
+    time: Optional[float] = None
+    status: Optional[str] = None
+
+class OptimizationStats(BaseModel):
+    engine: str
+    formulation: Optional[str] = None
+    status: Optional[str] = None
+    objective: Optional[float] = None
+    gap: Optional[float] = None
+    solveTime: Optional[float] = None
+    buildTime: Optional[float] = None
+    extractTime: Optional[float] = None
+    numVars: Optional[int] = None
+    numConstrs: Optional[int] = None
+    iterations: Optional[int] = None
+    warmStart: Optional[str] = None
+    timeToFirstIncumbent: Optional[float] = None
+    pruned: Optional[bool] = None  # position model solved with neighbour pruning (optimum not guaranteed)
+    objectiveMode: Optional[str] = None
+    levels: Optional[List[ObjectiveLevel]] = None
+    components: Optional[int] = None
+    clusters: Optional[int] = None
+    boundaryRepair: Optional[BoundaryRepairReport] = None
+    localSearch: Optional[LocalSearchReport] = None
+    incremental: Optional[IncrementalReport] = None
+
 class RouteOptimizationResult(BaseModel):
     id: str
     routes: List[TechnicianRoute]
     totalTasks: int
     assignedTasks: int
     createdAt: str
+    stats: Optional[OptimizationStats] = None
+
+class JobState(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+    cancelled = "cancelled"
+
+class RouteSummary(BaseModel):
+    technicianId: str
+    taskIds: List[str]
+    totalDistance: float
+
+class Incumbent(BaseModel):
+    objective: float
+    bound: Optional[float] = None
+    gap: Optional[float] = None
+    elapsed: float
+    assignedTasks: int
+    totalDistance: float
+    routes: List[RouteSummary]
+
+class OptimizationJob(BaseModel):
+    id: str
+    state: JobState
+    progress: float = 0.0
+    phase: Optional[str] = None
+    options: Dict[str, Any]
+    totalTasks: int
+    createdAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    error: Optional[str] = None
+    incumbent: Optional[Incumbent] = None
+    result: Optional[RouteOptimizationResult] = None
+
+class TechnicianChanges(BaseModel):
+    created: List[Technician]
+    updated: List[Technician]
+    deleted: List[str]
+
+class TaskChanges(BaseModel):
+    created: List[Task]
+    updated: List[Task]
+    deleted: List[str]
+
+class RouteChanges(BaseModel):
+    created: List[RouteOptimizationResult]  # at most the latest result
+    updated: List[RouteOptimizationResult]
+    deleted: List[str]
+
+class SyncResponse(BaseModel):
+    epoch: str
+    since: int
+    version: int
+    reset: bool
+    technicians: TechnicianChanges
+    tasks: TaskChanges
+    routes: RouteChanges
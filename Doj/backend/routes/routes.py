@@ -1,88 +1,209 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from models import RouteOptimizationResult, TaskStatus
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from models import RouteOptimizationResult, TaskStatus, OptimizationJob
 from data import storage
-from utils.optimizer import optimize_routes_with_gurobi
+from utils.jobs import job_manager
+from utils.incremental import update_plan
+from utils.paging import MAX_PAGE_SIZE, parse_fields, list_response, item_response, check_etag
 
 router = APIRouter()
 
+SSE_KEEPALIVE = 15  # seconds between keep-alive comments on idle event streams
+
 @router.get("/", response_model=List[RouteOptimizationResult])
-async def get_routes():
-    """Get all saved routes"""
-    return storage.get_all_routes()
+async def get_routes(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None)
+):
+    """
+    Get saved routes, oldest first. With limit, results come in pages: pass the
+    X-Next-Cursor header of a page as cursor to get the next one. fields (e.g.
+    "createdAt,stats") restricts the returned fields. Supports If-None-Match.
+    """
+    selected = parse_fields(fields, RouteOptimizationResult.model_fields)
+    etag, not_modified = check_etag(request)
+    if not_modified:
+        return not_modified
+    if limit is None:
+        return list_response(storage.get_all_routes(), selected, etag=etag)
+    return list_response(storage.get_routes_page(limit + 1, after=cursor), selected, limit, etag)
 
-@router.post("/optimize", response_model=RouteOptimizationResult)
-async def optimize_routes():
-    """Optimize and create routes using Gurobi MILP solver"""
-    all_techs = storage.get_all_technicians()
-    all_tasks = storage.get_all_tasks()
-    
-    print(f"[OPTIMIZE] Total technicians: {len(all_techs)}")
-    print(f"[OPTIMIZE] Total tasks: {len(all_tasks)}")
-    
-    # Debug task statuses
-    for t in all_tasks:
-        print(f"[DEBUG] Task {t.id} ({t.title}): status='{t.status}' type={type(t.status)}")
+@router.get("/latest", response_model=RouteOptimizationResult)
+async def get_latest_route(request: Request, fields: Optional[str] = Query(None)):
+    """Get the most recent optimization result only (supports If-None-Match)"""
+    selected = parse_fields(fields, RouteOptimizationResult.model_fields)
+    etag, not_modified = check_etag(request)
+    if not_modified:
+        return not_modified
+    latest = storage.get_latest_route()
+    if latest is None:
+        raise HTTPException(status_code=404, detail="No routes saved")
+    return item_response(latest, selected, etag)
 
-    technicians = [t for t in all_techs if t.available]
-    
-    # Robust filtering for pending tasks
-    tasks = []
-    for t in all_tasks:
-        # Check if status is pending (handling Enum, string, etc.)
-        is_pending = (
-            t.status == "pending" or 
-            t.status == TaskStatus.pending or 
-            str(t.status) == "pending" or
-            str(t.status) == "TaskStatus.pending"
-        )
-        if is_pending:
-            tasks.append(t)
+@router.post("/optimize", response_model=OptimizationJob, status_code=202)
+async def optimize_routes(
+    engine: str = Query("gurobi", pattern="^(gurobi|alns|greedy)$"),
+    formulation: str = Query("position", pattern="^(position|arc)$"),
+    time_limit: Optional[float] = Query(None, gt=0, le=600),
+    local_search: bool = Query(True),
+    warm_start: str = Query("greedy", pattern="^(greedy|latest|none)$"),
+    decompose: str = Query("auto", pattern="^(auto|none|skills|clusters)$"),
+    objective: str = Query("weighted", pattern="^(weighted|lexicographic)$")
+):
+    """
+    Start a route optimization job (Gurobi MILP solver, ALNS or the greedy heuristic).
+    Gurobi starts from the greedy plan, or from the latest saved plan completed greedily,
+    and solves independent skill components (or, for large fleets, geographic clusters)
+    as separate models (decompose).
+    objective=lexicographic maximizes assigned high, medium then low priority tasks and
+    only then minimizes distance, each level with its own time budget, instead of the
+    weighted objective (Gurobi and ALNS; greedy is priority-first either way).
+    Returns immediately; follow the job with GET /api/routes/jobs/{job_id}.
+    """
+    # Indexed reads: pending tasks, then available technicians having one of their skills
+    tasks = storage.get_all_tasks(status=TaskStatus.pending)
+    technicians = storage.get_all_technicians(skills={t.requiredSkill for t in tasks}, available=True)
     
     print(f"[OPTIMIZE] Available technicians: {len(technicians)}")
     print(f"[OPTIMIZE] Pending tasks: {len(tasks)}")
     
+    if not tasks:
+        raise HTTPException(status_code=400, detail="No pending tasks")
+    
     if not technicians:
         raise HTTPException(status_code=400, detail="No available technicians")
     
-    if not tasks:
-        raise HTTPException(status_code=400, detail="No pending tasks")
+    options = {
+        "engine": engine,
+        "formulation": formulation,
+        "time_limit": time_limit,
+        "local_search": local_search,
+        "warm_start": warm_start,
+        "decompose": decompose,
+        "objective": objective
+    }
+    
+    start_routes = None
+    latest = storage.get_latest_route() if warm_start == "latest" else None
+    if latest:
+        start_routes = [
+            {"technicianId": route["technicianId"], "taskIds": [task["id"] for task in route["tasks"]]}
+            for route in latest["routes"]
+        ]
     
-    # Run Gurobi optimization
-    print(f"[OPTIMIZE] Starting optimization...")
-    optimized_routes = optimize_routes_with_gurobi(technicians, tasks)
-    print(f"[OPTIMIZE] Optimization returned {len(optimized_routes)} routes")
+    try:
+        return job_manager.submit(technicians, tasks, options, start_routes)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/incremental", response_model=RouteOptimizationResult)
+async def reoptimize_incrementally():
+    """
+    Update the latest plan without a full solve: tasks of technicians who became
+    unavailable and new pending tasks are inserted at their cheapest feasible position,
+    then only the touched routes are repaired by local search.
+    """
+    technicians = storage.get_all_technicians()
+    all_tasks = storage.get_all_tasks()
+    pending = [t for t in all_tasks if t.status == TaskStatus.pending and not job_manager.is_claimed(t.id)]
     
-    # Update task assignments
-    for route in optimized_routes:
-        for task in route.tasks:
-            storage.update_task(task.id, {
-                "assignedTo": route.technicianId,
-                "status": "assigned"
-            })
+    latest = storage.get_latest_route()
+    stats = dict(latest.get("stats") or {}) if latest else {"engine": "incremental"}
+    previous = stats.get("incremental") or {}
     
-    # Save route result
-    route_data = {
-        "routes": [route.model_dump() for route in optimized_routes],
-        "totalTasks": len(tasks),
-        "assignedTasks": sum(route.taskCount for route in optimized_routes)
-    }
+    routes, planned, unassigned = update_plan(latest["routes"] if latest else [], technicians, all_tasks,
+                                              pending, stats)
+    # Updates since the last full optimization, to know when a full re-solve is due
+    stats["incremental"]["updates"] = previous.get("updates", 0) + 1
     
-    saved_route = storage.save_route(route_data)
-    return saved_route
+    plan = {
+        "routes": routes,
+        "totalTasks": len(planned) + len(unassigned),
+        "assignedTasks": len(planned),
+        "stats": stats
+    }
+    with storage.batch():
+        for route in routes:
+            for task in route["tasks"]:
+                storage.update_task(task["id"], {
+                    "assignedTo": route["technicianId"],
+                    "status": "assigned"
+                })
+        for task_id in unassigned:
+            storage.update_task(task_id, {"assignedTo": None, "status": "pending"})
+        
+        if latest:
+            return storage.update_route(latest["id"], plan)
+        return storage.save_route(plan)
+
+@router.get("/jobs", response_model=List[OptimizationJob])
+async def get_jobs():
+    """Get all optimization jobs"""
+    return job_manager.list()
+
+@router.get("/jobs/{job_id}", response_model=OptimizationJob)
+async def get_job(job_id: str):
+    """Get state, progress and result of an optimization job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job: state, progress, every improving incumbent
+    (objective, bound, gap and route summaries) and a final done event with the job.
+    """
+    queue = job_manager.subscribe(job_id)
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    kind, data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+                if kind == "done":
+                    break
+        finally:
+            job_manager.unsubscribe(job_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/jobs/{job_id}/stop", response_model=OptimizationJob)
+async def stop_job(job_id: str):
+    """Stop a running job early and keep its best solution so far"""
+    job = job_manager.stop(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.delete("/jobs/{job_id}", response_model=OptimizationJob)
+async def cancel_job(job_id: str):
+    """Cancel an optimization job"""
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.delete("/")
 async def clear_routes():
     """Clear all routes and reset task assignments"""
-    storage.clear_routes()
-    
-    # Reset all assigned tasks to pending
-    tasks = storage.get_all_tasks()
-    for task in tasks:
-        if task.status == "assigned":
-            storage.update_task(task.id, {
-                "assignedTo": None,
-                "status": "pending"
-            })
+    with storage.batch():
+        storage.clear_routes()
+        
+        # Reset all assigned tasks to pending
+        storage.update_tasks({"assignedTo": None, "status": "pending"}, status=TaskStatus.assigned)
     
     return {"message": "All routes cleared and tasks reset"}
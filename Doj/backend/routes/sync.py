@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse
+from typing import Optional
+from models import SyncResponse
+from utils.paging import check_etag
+from utils.changes import changes_since
+
+router = APIRouter()
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    request: Request,
+    since: int = Query(0, ge=0),
+    epoch: Optional[str] = Query(None)
+):
+    """
+    Technicians, tasks and routes created, updated or deleted since a change version.
+    Clients keep the returned epoch and version and send them back on the next call;
+    since=0, or an epoch that no longer matches (e.g. after a restart of the in-memory
+    store), returns a full snapshot with reset=true. Only the latest route result is
+    sent; the history is available from GET /api/routes. Supports If-None-Match.
+    The same deltas are pushed live on the /api/ws WebSocket.
+    """
+    etag, not_modified = check_etag(request)
+    if not_modified:
+        return not_modified
+    return JSONResponse(content=changes_since(since, epoch), headers={"ETag": etag})
@@ -1,17 +1,52 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import List, Optional
-from models import Task, TaskCreate, TaskUpdate
+from models import Task, TaskCreate, TaskUpdate, BulkImportResult, BulkTaskUpdate, BulkUpdateResult
 from data import storage
+from utils.bulk import validate_rows, rejected_rows
+from utils.paging import MAX_PAGE_SIZE, parse_fields, list_response, check_etag
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Task])
 async def get_tasks(
+    request: Request,
     status: Optional[str] = Query(None),
-    priority: Optional[str] = Query(None)
+    priority: Optional[str] = Query(None),
+    assigned_to: Optional[str] = Query(None, alias="assignedTo"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None)
 ):
-    """Get all tasks with optional filters"""
-    return storage.get_all_tasks(status=status, priority=priority)
+    """
+    Get all tasks with optional filters. With limit, tasks come in pages ordered by id:
+    pass the X-Next-Cursor header of a page as cursor to get the next one.
+    fields (e.g. "title,status") restricts the returned fields. Supports If-None-Match.
+    """
+    selected = parse_fields(fields, Task.model_fields)
+    etag, not_modified = check_etag(request)
+    if not_modified:
+        return not_modified
+    if limit is None:
+        return list_response(storage.get_all_tasks(status=status, priority=priority, assigned_to=assigned_to),
+                             selected, etag=etag)
+    tasks = storage.get_tasks_page(limit + 1, after=cursor, status=status, priority=priority,
+                                   assigned_to=assigned_to)
+    return list_response(tasks, selected, limit, etag)
+
+@router.patch("/", response_model=BulkUpdateResult)
+async def update_tasks_bulk(request: BulkTaskUpdate):
+    """
+    Update every task matching the filter (an empty filter matches all tasks), e.g.
+    {"filter": {"status": "assigned"}, "update": {"status": "pending", "assignedTo": null}}
+    """
+    filters = request.filter.model_dump(exclude_none=True, mode="json")
+    update_dict = request.update.model_dump(exclude_unset=True)
+    if not update_dict:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    updated = storage.update_tasks(update_dict, status=filters.get("status"), priority=filters.get("priority"),
+                                   assigned_to=filters.get("assignedTo"))
+    print(f"[BULK] {updated} tasks updated (filter: {filters or 'all'})")
+    return {"updated": updated}
 
 @router.get("/{task_id}", response_model=Task)
 async def get_task(task_id: str):
@@ -31,6 +66,22 @@ async def create_task(task: TaskCreate):
         )
     return storage.create_task(task)
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def create_tasks_bulk(request: Request):
+    """
+    Create many tasks from a JSON array or an NDJSON stream (Content-Type: application/x-ndjson).
+    Valid rows are inserted in one transaction; invalid rows, and rows whose id is
+    already taken, are reported by row number.
+    """
+    tasks, rows, errors = await validate_rows(
+        request, TaskCreate,
+        lambda task: None if task.title and task.requiredSkill else "Title and required skill are required"
+    )
+    created, rejected = storage.create_tasks(tasks)
+    errors = sorted(errors + rejected_rows(rows, rejected), key=lambda e: e["row"])
+    print(f"[BULK] {len(created)} tasks created, {len(errors)} rows rejected")
+    return {"created": len(created), "ids": [task.id for task in created], "errors": errors}
+
 @router.put("/{task_id}", response_model=Task)
 async def update_task(task_id: str, update_data: TaskUpdate):
     """Update task"""
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List
-from models import Technician, TechnicianCreate, TechnicianUpdate
+from models import Technician, TechnicianCreate, TechnicianUpdate, BulkImportResult
 from data import storage
+from utils.bulk import validate_rows, rejected_rows
+from utils.paging import list_response, check_etag
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Technician])
-async def get_technicians():
-    """Get all technicians"""
-    return storage.get_all_technicians()
+async def get_technicians(request: Request):
+    """Get all technicians (supports If-None-Match)"""
+    etag, not_modified = check_etag(request)
+    if not_modified:
+        return not_modified
+    return list_response(storage.get_all_technicians(), etag=etag)
 
 @router.get("/{tech_id}", response_model=Technician)
 async def get_technician(tech_id: str):
@@ -25,6 +30,22 @@ async def create_technician(technician: TechnicianCreate):
         raise HTTPException(status_code=400, detail="Skills are required")
     return storage.create_technician(technician)
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def create_technicians_bulk(request: Request):
+    """
+    Create many technicians from a JSON array or an NDJSON stream (Content-Type: application/x-ndjson).
+    Valid rows are inserted in one transaction; invalid rows, and rows whose id is
+    already taken, are reported by row number.
+    """
+    technicians, rows, errors = await validate_rows(
+        request, TechnicianCreate,
+        lambda technician: None if technician.skills else "Skills are required"
+    )
+    created, rejected = storage.create_technicians(technicians)
+    errors = sorted(errors + rejected_rows(rows, rejected), key=lambda e: e["row"])
+    print(f"[BULK] {len(created)} technicians created, {len(errors)} rows rejected")
+    return {"created": len(created), "ids": [tech.id for tech in created], "errors": errors}
+
 @router.put("/{tech_id}", response_model=Technician)
 async def update_technician(tech_id: str, update_data: TechnicianUpdate):
     """Update technician"""
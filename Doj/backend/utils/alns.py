@@ -0,0 +1,247 @@
+"""
+Adaptive Large Neighbourhood Search for technician routing (no Gurobi needed).
+
+Each iteration removes a few tasks from the current plan (destroy) and re-inserts
+unassigned tasks (repair). Operators are picked by roulette wheel with weights adapted
+to their recent success; candidates are accepted by simulated annealing.
+"""
+import math
+import time
+from typing import List, Optional
+import numpy as np
+from models import Technician, Task, TechnicianRoute
+from utils.routing import RoutingInstance, SolveMonitor, route_summaries, level_values
+
+# Operator scores: new global best, improves current, accepted
+SCORE_BEST, SCORE_BETTER, SCORE_ACCEPTED = 33, 9, 13
+SEGMENT_LENGTH = 50
+REACTION_FACTOR = 0.1
+# Randomization of worst/related removal (higher = more deterministic)
+REMOVAL_RANDOMNESS = 3
+
+# Destroy operators
+
+def random_removal(inst: RoutingInstance, routes: List[List[int]], assigned: np.ndarray, q: int, rng) -> None:
+    candidates = np.flatnonzero(assigned >= 0)
+    _remove(routes, assigned, rng.choice(candidates, size=min(q, len(candidates)), replace=False))
+
+def worst_removal(inst: RoutingInstance, routes: List[List[int]], assigned: np.ndarray, q: int, rng) -> None:
+    """Remove tasks whose removal saves the most distance"""
+    tasks, gains = [], []
+    for j, route in enumerate(routes):
+        if route:
+            tasks.extend(route)
+            gains.append(inst.removal_gains(j, route))
+    order = np.asarray(tasks)[np.argsort(-np.concatenate(gains))]
+    _remove(routes, assigned, _randomized_pick(order, q, rng))
+
+def related_removal(inst: RoutingInstance, routes: List[List[int]], assigned: np.ndarray, q: int, rng) -> None:
+    """Shaw removal: tasks close in space, skill and priority to already removed ones"""
+    candidates = np.flatnonzero(assigned >= 0)
+    removed = [int(rng.choice(candidates))]
+    max_dist = max(float(inst.task_task_dist[removed[0], candidates].max()), 1e-9)
+    remaining = candidates[candidates != removed[0]]
+    while len(removed) < q and len(remaining):
+        ref = removed[rng.integers(len(removed))]
+        relatedness = (
+            inst.task_task_dist[ref, remaining] / max_dist
+            + 0.5 * (inst.weight[remaining] != inst.weight[ref])
+            + (inst.skills[remaining] != inst.skills[ref])
+        )
+        order = remaining[np.argsort(relatedness)]
+        pick = order[int(rng.random() ** REMOVAL_RANDOMNESS * len(order))]
+        removed.append(int(pick))
+        remaining = remaining[remaining != pick]
+    _remove(routes, assigned, removed)
+
+def _randomized_pick(order: np.ndarray, q: int, rng) -> List[int]:
+    """Pick q items from a ranked array, biased towards the front"""
+    order = list(order)
+    picked = []
+    while order and len(picked) < q:
+        picked.append(order.pop(int(rng.random() ** REMOVAL_RANDOMNESS * len(order))))
+    return picked
+
+def _remove(routes: List[List[int]], assigned: np.ndarray, removed) -> None:
+    removed = set(int(i) for i in removed)
+    for j in set(int(assigned[i]) for i in removed):
+        routes[j] = [i for i in routes[j] if i not in removed]
+    assigned[list(removed)] = -1
+
+# Repair operators
+
+def greedy_insertion(inst: RoutingInstance, routes: List[List[int]], assigned: np.ndarray, pool: np.ndarray, rng) -> None:
+    """Repeatedly insert the task with the cheapest (cost - reward) insertion"""
+    _insertion(inst, routes, assigned, pool, regret=False)
+
+def regret_insertion(inst: RoutingInstance, routes: List[List[int]], assigned: np.ndarray, pool: np.ndarray, rng) -> None:
+    """Regret-2: insert first the task that loses most by not getting its best route"""
+    _insertion(inst, routes, assigned, pool, regret=True)
+
+def _insertion(inst: RoutingInstance, routes: List[List[int]], assigned: np.ndarray, pool: np.ndarray,
+               regret: bool) -> None:
+    if not len(pool):
+        return
+    # costs[row, j]: best insertion of pool[row] into route j, minus its reward
+    costs = np.full((len(pool), inst.n_techs), np.inf)
+    positions = np.zeros((len(pool), inst.n_techs), dtype=int)
+    active = np.ones(len(pool), dtype=bool)
+
+    def update_column(j):
+        costs[:, j] = np.inf
+        if len(routes[j]) >= inst.capacity[j]:
+            return
+        rows = np.flatnonzero(active & inst.eligible[j, pool])
+        if len(rows):
+            delta, pos = inst.insertion_costs(j, routes[j], pool[rows])
+            costs[rows, j] = delta - inst.insertion_reward[pool[rows]]
+            positions[rows, j] = pos
+
+    open_techs = [j for j in range(inst.n_techs) if len(routes[j]) < inst.capacity[j]]
+    for j in open_techs:
+        update_column(j)
+
+    while open_techs:
+        sub = costs[:, open_techs]
+        if regret:
+            if sub.shape[1] > 1:
+                two_best = np.partition(sub, 1, axis=1)[:, :2]
+            else:
+                two_best = np.hstack([sub, np.full((len(sub), 1), np.inf)])
+            best = two_best[:, 0]
+            if not np.isfinite(best).any():
+                break
+            # Leaving a task unassigned costs 0, which caps the second option
+            regrets = np.where(np.isfinite(best), np.minimum(two_best[:, 1], 0) - best, -np.inf)
+            row = int(np.argmax(regrets))
+            col = int(np.argmin(sub[row]))
+        else:
+            flat = int(np.argmin(sub))
+            row, col = divmod(flat, sub.shape[1])
+            if not np.isfinite(sub[row, col]):
+                break
+        if costs[row, open_techs[col]] >= 0:
+            break
+
+        j = open_techs[col]
+        task = int(pool[row])
+        routes[j].insert(int(positions[row, j]), task)
+        assigned[task] = j
+        active[row] = False
+        costs[row] = np.inf
+        update_column(j)
+        if len(routes[j]) >= inst.capacity[j]:
+            open_techs.remove(j)
+
+def _report_incumbent(inst: RoutingInstance, monitor: Optional[SolveMonitor], routes: List[List[int]], cost: float):
+    if monitor is not None:
+        monitor.incumbent(cost, route_summaries(inst.technicians, inst.tasks, routes,
+                                                inst.tech_task_dist, inst.task_task_dist))
+
+DESTROY_OPERATORS = [random_removal, worst_removal, related_removal]
+REPAIR_OPERATORS = [greedy_insertion, regret_insertion]
+
+def optimize_routes_alns(technicians: List[Technician], tasks: List[Task], stats: Optional[dict] = None,
+                         time_limit: float = 10.0, seed: Optional[int] = None,
+                         monitor: Optional[SolveMonitor] = None, lexicographic: bool = False) -> List[TechnicianRoute]:
+    """
+    Optimize routes with ALNS within a wall-clock budget (seconds).
+    Uses the same objective as the Gurobi models so results are comparable; with
+    lexicographic, plans are compared level by level (OBJECTIVE_LEVELS) like the
+    hierarchical Gurobi mode.
+    """
+    start_time = time.perf_counter()
+    available_techs = [t for t in technicians if t.available]
+    if not available_techs or not tasks:
+        return []
+
+    rng = np.random.default_rng(seed)
+    inst = RoutingInstance(available_techs, tasks, lexicographic)
+    insertable = np.flatnonzero(inst.eligible.any(axis=0))
+
+    # Initial solution: greedy insertion from scratch
+    current_routes: List[List[int]] = [[] for _ in available_techs]
+    current_assigned = np.full(inst.n_tasks, -1, dtype=int)
+    greedy_insertion(inst, current_routes, current_assigned, insertable, rng)
+    current_cost = inst.score(current_routes)
+    best_routes, best_cost = [list(r) for r in current_routes], current_cost
+    print(f"[ALNS] Initial solution: {int((current_assigned >= 0).sum())} tasks, "
+          f"objective {inst.objective(current_routes):.1f}")
+    _report_incumbent(inst, monitor, best_routes, inst.objective(best_routes))
+
+    # Start temperature: a 5% worse distance is accepted with probability 0.5
+    distance_cost = sum(inst.route_cost(j, route) for j, route in enumerate(current_routes) if route)
+    start_temp = max(0.05 * distance_cost / math.log(2), 1e-6)
+
+    destroy_weights = np.ones(len(DESTROY_OPERATORS))
+    repair_weights = np.ones(len(REPAIR_OPERATORS))
+    destroy_scores, destroy_uses = np.zeros_like(destroy_weights), np.zeros_like(destroy_weights)
+    repair_scores, repair_uses = np.zeros_like(repair_weights), np.zeros_like(repair_weights)
+
+    iterations = 0
+    interrupted = False
+    while True:
+        elapsed = time.perf_counter() - start_time
+        n_assigned = int((current_assigned >= 0).sum())
+        if elapsed >= time_limit or n_assigned == 0:
+            break
+        if monitor is not None:
+            monitor.progress(elapsed / time_limit)
+            if monitor.should_stop():
+                interrupted = True
+                break
+
+        d = rng.choice(len(DESTROY_OPERATORS), p=destroy_weights / destroy_weights.sum())
+        r = rng.choice(len(REPAIR_OPERATORS), p=repair_weights / repair_weights.sum())
+        q_min = min(4, n_assigned)
+        q_max = max(q_min, min(50, int(0.3 * n_assigned)))
+        q = int(rng.integers(q_min, q_max + 1))
+
+        routes = [list(route) for route in current_routes]
+        assigned = current_assigned.copy()
+        DESTROY_OPERATORS[d](inst, routes, assigned, q, rng)
+        REPAIR_OPERATORS[r](inst, routes, assigned, insertable[assigned[insertable] < 0], rng)
+        cost = inst.score(routes)
+
+        temperature = start_temp * 0.001 ** (elapsed / time_limit)
+        score = 0
+        if inst.better(cost, best_cost):
+            best_routes, best_cost = [list(route) for route in routes], cost
+            score = SCORE_BEST
+            _report_incumbent(inst, monitor, best_routes, inst.objective(best_routes))
+        elif inst.better(cost, current_cost):
+            score = SCORE_BETTER
+        elif rng.random() < math.exp(-inst.worsening(cost, current_cost) / temperature):
+            score = SCORE_ACCEPTED
+        if score:
+            current_routes, current_assigned, current_cost = routes, assigned, cost
+
+        destroy_scores[d] += score
+        destroy_uses[d] += 1
+        repair_scores[r] += score
+        repair_uses[r] += 1
+        iterations += 1
+
+        if iterations % SEGMENT_LENGTH == 0:
+            for weights, scores, uses in ((destroy_weights, destroy_scores, destroy_uses),
+                                          (repair_weights, repair_scores, repair_uses)):
+                used = uses > 0
+                weights[used] = (1 - REACTION_FACTOR) * weights[used] + REACTION_FACTOR * scores[used] / uses[used]
+                np.maximum(weights, 0.05, out=weights)
+                scores[:] = 0
+                uses[:] = 0
+
+    elapsed = time.perf_counter() - start_time
+    best_objective = inst.objective(best_routes)
+    print(f"[ALNS] {iterations} iterations in {elapsed:.2f}s, best objective {best_objective:.1f}")
+    if stats is not None:
+        stats.update(
+            engine="alns",
+            status="interrupted" if interrupted else "time_limit" if elapsed >= time_limit else "heuristic",
+            objective=round(best_objective, 4),
+            solveTime=round(elapsed, 3),
+            iterations=iterations
+        )
+        if lexicographic:
+            stats.update(objectiveMode="lexicographic", levels=level_values(inst.levels(best_routes)))
+    return inst.to_routes(best_routes)
@@ -0,0 +1,98 @@
+"""
+Bulk imports: request bodies are a JSON array or NDJSON (one object per line, read
+as it streams in). Rows are validated in batches; a batch with an invalid row is
+validated again row by row so every error is reported with its row number.
+"""
+import json
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple, Type
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+VALIDATION_BATCH_SIZE = 1000
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+class RowError(Exception):
+    """A row that could not be parsed"""
+
+async def read_rows(request: Request) -> AsyncIterator[Any]:
+    """Yield the rows of a JSON array or NDJSON body (RowError for unparsable lines)"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_TYPES:
+        try:
+            rows = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+        for row in rows:
+            yield row
+        return
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return RowError(f"Invalid JSON: {e}")
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors())
+
+async def validate_rows(request: Request, model: Type[BaseModel],
+                        check: Optional[Callable[[BaseModel], Optional[str]]] = None
+                        ) -> Tuple[List[BaseModel], List[int], List[dict]]:
+    """
+    Validate every row of the body against model (check returns an error message for
+    rows the single-item endpoint would reject). Returns (valid models, their row
+    numbers, row errors).
+    """
+    adapter = TypeAdapter(List[model])
+    valid: List[BaseModel] = []
+    valid_rows: List[int] = []
+    errors: List[dict] = []
+    batch: List[Tuple[int, Any]] = []
+
+    def flush():
+        try:
+            models = list(zip((row for row, _ in batch), adapter.validate_python([data for _, data in batch])))
+        except ValidationError:
+            models = []
+            for row, data in batch:
+                try:
+                    models.append((row, model.model_validate(data)))
+                except ValidationError as e:
+                    errors.append({"row": row, "error": _describe(e)})
+        for row, item in models:
+            message = check(item) if check else None
+            if message:
+                errors.append({"row": row, "error": message})
+            else:
+                valid.append(item)
+                valid_rows.append(row)
+        batch.clear()
+
+    row = 0
+    async for data in read_rows(request):
+        if isinstance(data, RowError):
+            errors.append({"row": row, "error": str(data)})
+        else:
+            batch.append((row, data))
+            if len(batch) >= VALIDATION_BATCH_SIZE:
+                flush()
+        row += 1
+    flush()
+    errors.sort(key=lambda e: e["row"])
+    return valid, valid_rows, errors
+
+def rejected_rows(rows: List[int], rejected: List[Tuple[int, str]]) -> List[dict]:
+    """Row errors for the valid rows the store rejected ((index in the valid rows, error) pairs)"""
+    return [{"row": rows[index], "error": error} for index, error in rejected]
@@ -0,0 +1,152 @@
+"""
+Change deltas for clients, pulled (GET /api/sync) or pushed (WebSocket /api/ws).
+
+A delta lists the technicians and tasks created, updated or deleted since a change
+version of the store, plus the latest route result when it changed. The broadcaster
+wakes up on every store write, builds one delta per distinct client version (usually
+a single one shared by every client) and pushes it, together with the state changes
+of optimization jobs.
+"""
+import asyncio
+from typing import Dict, List, Optional
+from fastapi import WebSocket, WebSocketDisconnect
+from data import storage
+from utils.paging import project
+from utils.jobs import job_manager
+
+COALESCE_DELAY = 0.05  # seconds to wait after a write so bursts go out as one delta
+
+def _fetch(ids, get_by_id):
+    return [item for item in (get_by_id(item_id) for item_id in ids) if item is not None]
+
+def changes_since(since: int, epoch: Optional[str] = None) -> dict:
+    """
+    JSON-ready delta since a change version. since=0, a stale epoch (e.g. after a
+    restart of the in-memory store) or a version from the future give a full
+    snapshot with reset=true. Only the latest route result is included.
+    """
+    current_epoch = storage.get_epoch()
+    reset = since == 0 or (epoch is not None and epoch != current_epoch) or since > storage.get_version()
+    latest = storage.get_latest_route()
+    if reset:
+        version = storage.get_version()
+        technicians = {"created": storage.get_all_technicians(), "updated": [], "deleted": []}
+        tasks = {"created": storage.get_all_tasks(), "updated": [], "deleted": []}
+        routes = {"created": [latest] if latest else [], "updated": [], "deleted": []}
+    else:
+        version, changes = storage.get_changes(since)
+        technicians = {
+            "created": _fetch(changes["technicians"]["created"], storage.get_technician_by_id),
+            "updated": _fetch(changes["technicians"]["updated"], storage.get_technician_by_id),
+            "deleted": changes["technicians"]["deleted"]
+        }
+        tasks = {
+            "created": _fetch(changes["tasks"]["created"], storage.get_task_by_id),
+            "updated": _fetch(changes["tasks"]["updated"], storage.get_task_by_id),
+            "deleted": changes["tasks"]["deleted"]
+        }
+        routes = {"created": [], "updated": [], "deleted": changes["routes"]["deleted"]}
+        if latest:
+            for group in ("created", "updated"):
+                if latest["id"] in changes["routes"][group]:
+                    routes[group].append(latest)
+
+    def section(groups):
+        return {"created": project(groups["created"]), "updated": project(groups["updated"]),
+                "deleted": groups["deleted"]}
+
+    return {
+        "epoch": current_epoch,
+        "since": since,
+        "version": version,
+        "reset": reset,
+        "technicians": section(technicians),
+        "tasks": section(tasks),
+        "routes": section(routes)
+    }
+
+class _Client:
+    def __init__(self, since: int, epoch: Optional[str]):
+        self.version = since
+        self.epoch = epoch
+        self.synced = False  # the first message is always sent, even when empty
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+class ChangeBroadcaster:
+    """Pushes store deltas and job state changes to every connected WebSocket client"""
+    def __init__(self):
+        self._clients: List[_Client] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Start the broadcast loops (call from the event loop, once)"""
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        storage.add_listener(lambda: loop.call_soon_threadsafe(self._wakeup.set))
+        self._tasks = [asyncio.create_task(self._push_changes()), asyncio.create_task(self._push_jobs())]
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def serve(self, websocket: WebSocket, since: int = 0, epoch: Optional[str] = None):
+        """Run one client connection: a first delta since its version, then live messages"""
+        await websocket.accept()
+        client = _Client(since, epoch)
+        self._clients.append(client)
+        self._wakeup.set()
+        receiver = asyncio.create_task(self._drain_client(websocket))
+        try:
+            while True:
+                getter = asyncio.create_task(client.queue.get())
+                done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    getter.cancel()
+                    return
+                await websocket.send_json(getter.result())
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            receiver.cancel()
+            self._clients.remove(client)
+
+    async def _drain_client(self, websocket: WebSocket):
+        # Clients do not send anything; reading only detects the disconnect
+        try:
+            while True:
+                await websocket.receive_text()
+        except (WebSocketDisconnect, RuntimeError):
+            return
+
+    async def _push_changes(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(COALESCE_DELAY)
+            self._wakeup.clear()
+            if not self._clients:
+                continue
+            # One delta per distinct client position, built off the event loop
+            deltas: Dict[tuple, dict] = {}
+            for client in list(self._clients):
+                key = (client.version, client.epoch)
+                if key not in deltas:
+                    deltas[key] = await asyncio.to_thread(changes_since, *key)
+                delta = deltas[key]
+                if delta["version"] == client.version and not delta["reset"] and client.synced:
+                    continue
+                client.queue.put_nowait(dict(delta, type="changes"))
+                client.version, client.epoch, client.synced = delta["version"], delta["epoch"], True
+
+    async def _push_jobs(self):
+        queue = job_manager.watch()
+        try:
+            while True:
+                kind, job = await queue.get()
+                for client in self._clients:
+                    client.queue.put_nowait({"type": "job", "event": kind, "job": job})
+        finally:
+            job_manager.unwatch(queue)
+
+broadcaster = ChangeBroadcaster()
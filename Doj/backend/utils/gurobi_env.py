@@ -0,0 +1,136 @@
+"""
+Reusable Gurobi environments.
+
+Starting a gp.Env checks the license and sets Gurobi up, so it is done once per
+process instead of once per solve. Every model is built on an environment taken from
+the pool of its process, with Threads, OutputFlag and TimeLimit preset for the job,
+and is disposed as soon as the solve ends.
+
+Solves run in worker processes (see utils/jobs.py): each worker is started with
+init_worker and starts one environment right away. Threads is the core share of a job
+(cores / concurrent solves), so concurrent jobs do not oversubscribe the machine. A job
+split into subproblems solves them on concurrent threads, each on its own environment
+of the worker's pool with a part of the job's threads; those environments are started
+on first use and kept for the next jobs. The pool's listener receives its status after every start,
+acquire and release; workers forward it to the API process for /api/health.
+"""
+import os
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+import gurobipy as gp
+
+def default_threads(concurrent_solves: int) -> int:
+    """Gurobi threads per solve: GUROBI_THREADS, or the cores shared by the concurrent solves"""
+    configured = int(os.environ.get("GUROBI_THREADS", 0))
+    return configured or max(1, (os.cpu_count() or 1) // max(concurrent_solves, 1))
+
+class EnvPool:
+    """Up to size started environments, each handed out to one solve at a time"""
+    def __init__(self, size: int = 1, threads: int = 0, listener: Optional[Callable[[dict], None]] = None):
+        self.size = size
+        self.threads = threads  # 0 lets Gurobi use every core
+        self.listener = listener  # called with status() after each change
+        self._free: List[gp.Env] = []
+        self._created = 0
+        self._in_use = 0
+        self._models = 0
+        self._available = threading.Condition()
+
+    def _new_env(self) -> gp.Env:
+        env = gp.Env(empty=True)
+        env.setParam("OutputFlag", 0)
+        env.start()
+        return env
+
+    def warm_up(self, count: Optional[int] = None) -> dict:
+        """Start count environments (default: all of them) now rather than on the first solve"""
+        with self._available:
+            while self._created < min(self.size, count or self.size):
+                self._free.append(self._new_env())
+                self._created += 1
+        self._changed()
+        return self.status()
+
+    def acquire(self, time_limit: Optional[float] = None, threads: Optional[int] = None) -> gp.Env:
+        """
+        Environment with threads (default: this pool's Threads), no output and the job's
+        TimeLimit (waits if all are in use)
+        """
+        with self._available:
+            while not self._free and self._created >= self.size:
+                self._available.wait()
+            if self._free:
+                env = self._free.pop()
+            else:
+                env = self._new_env()
+                self._created += 1
+            self._in_use += 1
+        self._changed()
+        env.setParam("Threads", self.threads if threads is None else threads)
+        env.setParam("OutputFlag", 0)
+        env.setParam("TimeLimit", time_limit if time_limit is not None else gp.GRB.INFINITY)
+        return env
+
+    def release(self, env: gp.Env):
+        with self._available:
+            self._free.append(env)
+            self._in_use -= 1
+            self._available.notify()
+        self._changed()
+
+    def _changed(self):
+        if self.listener is not None:
+            self.listener(self.status())
+
+    @contextmanager
+    def model(self, name: str, time_limit: Optional[float] = None, threads: Optional[int] = None):
+        """New model on a pooled environment; the model is disposed and the environment returned on exit"""
+        env = self.acquire(time_limit, threads)
+        model = None
+        try:
+            model = gp.Model(name, env=env)
+            self._models += 1
+            yield model
+        finally:
+            if model is not None:
+                model.dispose()
+            self.release(env)
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "size": self.size,
+            "started": self._created,
+            "inUse": self._in_use,
+            "threads": self.threads,
+            "models": self._models,
+        }
+
+    def close(self):
+        with self._available:
+            for env in self._free:
+                env.dispose()
+            self._free = []
+            self._created = self._in_use
+
+# Pool of the current process. Worker processes replace it in init_worker; elsewhere
+# (benchmarks, scripts) environments using every core are started on first use.
+env_pool = EnvPool(size=os.cpu_count() or 1)
+
+def init_worker(threads: int, listener: Optional[Callable[[dict], None]] = None):
+    """ProcessPoolExecutor initializer: environments of a solver process, the first one started right away"""
+    global env_pool
+    # One environment per thread of the job at most (concurrent subproblems)
+    env_pool = EnvPool(size=max(1, threads), threads=threads, listener=listener)
+    atexit.register(env_pool.close)
+    try:
+        env_pool.warm_up(1)
+    except gp.GurobiError as e:
+        # No license: the worker still runs ALNS and greedy jobs
+        print(f"[GUROBI] Environment not started: {e}")
+        env_pool._changed()
+
+def get_pool() -> EnvPool:
+    return env_pool
@@ -0,0 +1,166 @@
+"""
+Incremental re-optimization of the latest plan.
+
+Instead of re-solving every pending task, the saved plan is kept: routes of
+technicians who became unavailable are emptied, their tasks and the new pending
+tasks are placed by cheapest feasible insertion (high priority first), and only
+the touched routes get a short local search. Full re-solves can then be run
+periodically; the number of incremental updates since the last one is reported.
+"""
+import time
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from models import Technician, Task, TaskStatus
+from utils.routing import PRIORITY_WEIGHT, haversine_matrix, haversine_pairs
+from utils.local_search import SearchInstance, local_search
+
+REPAIR_TIME_LIMIT = 0.2  # seconds of local search on the touched routes
+
+def _weight(task: Task) -> float:
+    return 4 - PRIORITY_WEIGHT[task.priority]
+
+def _point(item) -> Tuple[float, float]:
+    return item.location.lat, item.location.lng
+
+def _changed(saved: dict, task: Task) -> bool:
+    """Whether the current record of a task differs from its copy in a saved route (an OptimizedTask dict)"""
+    location = saved["location"]
+    return (saved["title"] != task.title or saved["description"] != task.description
+            or saved["requiredSkill"] != task.requiredSkill or saved["priority"] != task.priority
+            or saved["duration"] != task.duration
+            or location["lat"] != task.location.lat or location["lng"] != task.location.lng)
+
+def best_insertion(task: Task, plan: Dict[str, List[Task]],
+                   technicians: Dict[str, Technician]) -> Optional[Tuple[str, int, float]]:
+    """
+    Cheapest feasible insertion of a task into the plan (technician id -> ordered tasks).
+    Returns (technician id, position, weighted added distance), or None if no qualified
+    technician has capacity left. All positions of all routes are evaluated in one pass.
+    """
+    prev_points, next_points, next_weights, slots = [], [], [], []
+    for tech_id, route in plan.items():
+        tech = technicians[tech_id]
+        if task.requiredSkill not in tech.skills or len(route) >= tech.maxTasksPerDay:
+            continue
+        stops = [_point(tech)] + [_point(t) for t in route]
+        for p in range(len(route) + 1):
+            prev_points.append(stops[p])
+            if p < len(route):
+                next_points.append(stops[p + 1])
+                next_weights.append(_weight(route[p]))
+            else:
+                # End of an open route: no outgoing edge
+                next_points.append(stops[p])
+                next_weights.append(0.0)
+            slots.append((tech_id, p))
+    if not slots:
+        return None
+
+    prev_points = np.array(prev_points)
+    next_points = np.array(next_points)
+    next_weights = np.array(next_weights)
+    new_point = np.array([_point(task)])
+
+    to_new = haversine_matrix(prev_points, new_point)[:, 0]
+    from_new = haversine_matrix(new_point, next_points)[0]
+    existing = haversine_pairs(prev_points, next_points)
+    costs = _weight(task) * to_new + next_weights * (from_new - existing)
+
+    best = int(np.argmin(costs))
+    tech_id, position = slots[best]
+    return tech_id, position, float(costs[best])
+
+def repair_routes(plan: Dict[str, List[Task]], technicians: Dict[str, Technician], touched: List[str],
+                  time_limit: float = REPAIR_TIME_LIMIT) -> Tuple[int, Dict[str, dict]]:
+    """
+    Local search restricted to the touched routes (plan modified in place).
+    Returns the number of moves and the rebuilt route dicts by technician id.
+    """
+    touched = [tech_id for tech_id in touched if plan[tech_id]]
+    if not touched:
+        return 0, {}
+    sub_tasks = [task for tech_id in touched for task in plan[tech_id]]
+    inst = SearchInstance([technicians[tech_id] for tech_id in touched], sub_tasks)
+    index = {task.id: i for i, task in enumerate(sub_tasks)}
+    route_lists = [[index[task.id] for task in plan[tech_id]] for tech_id in touched]
+    moves = local_search(inst, route_lists, time_limit)
+    for tech_id, route in zip(touched, route_lists):
+        plan[tech_id] = [sub_tasks[i] for i in route]
+    return moves, {route.technicianId: route.model_dump() for route in inst.to_routes(route_lists)}
+
+def update_plan(plan_routes: List[dict], technicians: List[Technician], tasks: List[Task],
+                new_tasks: List[Task], stats: Optional[dict] = None,
+                repair_time: float = REPAIR_TIME_LIMIT) -> Tuple[List[dict], List[str], List[str]]:
+    """
+    Update a saved plan (list of route dicts) with the current technicians and tasks.
+    Returns (routes, ids of the tasks now planned, ids of the tasks that could not be placed).
+    Routes that were not touched are returned unchanged.
+    """
+    start_time = time.perf_counter()
+    tech_by_id = {tech.id: tech for tech in technicians}
+    task_by_id = {task.id: task for task in tasks}
+
+    # Keep routes of available technicians; tasks of the others must be reassigned.
+    # Tasks deleted, completed or unassigned since the plan was saved leave their route
+    # (pending ones come back with the new tasks), and routes whose tasks changed are rebuilt.
+    plan: Dict[str, List[Task]] = {}
+    kept_routes: Dict[str, dict] = {}
+    stale = set()
+    orphans: List[Task] = []
+    for route in plan_routes:
+        tech = tech_by_id.get(route["technicianId"])
+        route_tasks = [task_by_id[t["id"]] for t in route["tasks"]
+                       if t["id"] in task_by_id and task_by_id[t["id"]].status == TaskStatus.assigned]
+        if tech is None or not tech.available:
+            orphans.extend(route_tasks)
+            continue
+        plan[tech.id] = route_tasks
+        kept_routes[tech.id] = route
+        if len(route_tasks) != len(route["tasks"]) or any(
+                _changed(saved, task) for saved, task in zip(route["tasks"], route_tasks)):
+            stale.add(tech.id)
+    for tech in technicians:
+        if tech.available and tech.id not in plan:
+            plan[tech.id] = []
+
+    planned_ids = {task.id for route in plan.values() for task in route}
+    to_insert = orphans + [task for task in new_tasks if task.id not in planned_ids]
+    to_insert.sort(key=lambda task: PRIORITY_WEIGHT[task.priority], reverse=True)
+
+    touched = set()
+    unassigned = []
+    for task in to_insert:
+        insertion = best_insertion(task, plan, tech_by_id)
+        if insertion is None:
+            unassigned.append(task.id)
+            continue
+        tech_id, position, _ = insertion
+        plan[tech_id].insert(position, task)
+        touched.add(tech_id)
+    touched.update(stale)
+
+    touched = sorted(touched)
+    moves, rebuilt = repair_routes(plan, tech_by_id, touched, repair_time)
+
+    routes = []
+    for tech_id, route_tasks in plan.items():
+        if tech_id in rebuilt:
+            routes.append(rebuilt[tech_id])
+        elif tech_id in kept_routes and route_tasks:
+            routes.append(kept_routes[tech_id])
+
+    elapsed = time.perf_counter() - start_time
+    inserted = len(to_insert) - len(unassigned)
+    print(f"[INCREMENTAL] {inserted} tasks inserted ({len(orphans)} reassigned), "
+          f"{len(unassigned)} unassigned, {len(touched)} routes repaired in {elapsed * 1000:.1f} ms")
+    if stats is not None:
+        stats["incremental"] = {
+            "inserted": inserted,
+            "reassigned": len(orphans),
+            "unassigned": len(unassigned),
+            "touchedRoutes": len(touched),
+            "moves": moves,
+            "time": round(elapsed, 4)
+        }
+    planned = [t["id"] for route in routes for t in route["tasks"]]
+    return routes, planned, unassigned
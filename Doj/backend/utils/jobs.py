@@ -0,0 +1,391 @@
+"""
+Background route optimization jobs.
+
+Solves run in a process pool so the FastAPI event loop stays responsive while
+Gurobi or ALNS work. Workers report their state and each improving incumbent through
+a managed queue that a thread of the API process drains into the job records and
+forwards to Server-Sent Events subscribers; the same queue carries the status of each
+worker's Gurobi environment (see utils/gurobi_env.py). Tasks handed to a job are claimed until
+it ends, so concurrent jobs never plan the same task twice.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, Future
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from models import Technician, Task
+from data import storage
+from utils.routing import SolveMonitor
+from utils.optimizer import (optimize_routes_with_gurobi, optimize_routes_with_gurobi_arc, optimize_routes_greedy,
+                             optimize_routes_by_components, optimize_routes_clustered)
+from utils.alns import optimize_routes_alns
+from utils.local_search import improve_routes
+from utils.gurobi_env import default_threads, init_worker
+
+MAX_CONCURRENT_SOLVES = int(os.environ.get("MAX_CONCURRENT_SOLVES", 2))
+
+# decompose=auto switches to geographic clusters from this fleet or day size
+CLUSTER_MIN_TECHS = 50
+CLUSTER_MIN_TASKS = 1000
+
+FORMULATIONS = {
+    "position": optimize_routes_with_gurobi,
+    "arc": optimize_routes_with_gurobi_arc,
+}
+
+class QueueMonitor(SolveMonitor):
+    """Monitor used inside worker processes: talks to the API process through manager proxies"""
+    REPORT_INTERVAL = 0.5  # seconds between two progress / incumbent messages and cancel checks
+
+    def __init__(self, job_id: str, events, stop_event):
+        self.job_id = job_id
+        self.events = events
+        self.stop_event = stop_event
+        self._start = time.monotonic()
+        self._last_report = 0.0
+        self._last_incumbent = 0.0
+        self._pending_incumbent = None
+        self._last_check = 0.0
+        self._stopped = False
+
+    def started(self):
+        self._start = time.monotonic()
+        self.publish("started", {})
+
+    def should_stop(self) -> bool:
+        now = time.monotonic()
+        if not self._stopped and now - self._last_check >= self.REPORT_INTERVAL:
+            self._last_check = now
+            self._stopped = self.stop_event.is_set()
+        return self._stopped
+
+    def progress(self, fraction: float, phase: str = "solving"):
+        now = time.monotonic()
+        if now - self._last_report >= self.REPORT_INTERVAL:
+            self._last_report = now
+            self.publish("progress", {"progress": round(fraction, 3), "phase": phase})
+        if self._pending_incumbent and now - self._last_incumbent >= self.REPORT_INTERVAL:
+            self.flush()
+
+    def incumbent(self, objective: float, routes: List[dict], bound: Optional[float] = None,
+                  gap: Optional[float] = None):
+        self._pending_incumbent = {
+            "objective": round(float(objective), 4),
+            "bound": None if bound is None else round(float(bound), 4),
+            "gap": None if gap is None else round(float(gap), 6),
+            "elapsed": round(time.monotonic() - self._start, 3),
+            "assignedTasks": sum(len(r["taskIds"]) for r in routes),
+            "totalDistance": round(sum(r["totalDistance"] for r in routes), 2),
+            "routes": routes,
+        }
+        if time.monotonic() - self._last_incumbent >= self.REPORT_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Send the latest incumbent held back by the rate limit"""
+        if self._pending_incumbent:
+            self._last_incumbent = time.monotonic()
+            self.publish("incumbent", self._pending_incumbent)
+            self._pending_incumbent = None
+
+    def publish(self, kind: str, data: dict):
+        self.events.put((self.job_id, kind, data))
+
+def init_solver_process(threads: int, events):
+    """Worker initializer: start the Gurobi environment and report its status changes to the API process"""
+    init_worker(threads, lambda status: events.put((None, "pool", status)))
+
+def run_optimization(technicians: List[Technician], tasks: List[Task], options: dict,
+                     monitor: QueueMonitor, start_routes: Optional[List[dict]] = None) -> Tuple[List[dict], dict]:
+    """
+    Solve one instance with the requested engine (runs in a worker process).
+    start_routes (route summaries of a saved plan) seed the Gurobi MIP start.
+    """
+    monitor.started()
+    stats = {}
+    engine = options.get("engine", "gurobi")
+    limits = {"time_limit": options["time_limit"]} if options.get("time_limit") else {}
+    lexicographic = options.get("objective", "weighted") == "lexicographic"
+
+    if engine == "gurobi":
+        solver = FORMULATIONS[options.get("formulation", "position")]
+        if lexicographic:
+            solver = partial(solver, lexicographic=True)
+        warm_start = options.get("warm_start", "greedy") != "none"
+        decompose = options.get("decompose", "auto")
+        if decompose == "auto":
+            large = len(technicians) >= CLUSTER_MIN_TECHS or len(tasks) >= CLUSTER_MIN_TASKS
+            decompose = "clusters" if large else "skills"
+        if decompose == "clusters":
+            routes = optimize_routes_clustered(technicians, tasks, stats, monitor=monitor, solver=solver,
+                                               warm_start=warm_start, start_routes=start_routes, **limits)
+        elif decompose == "skills":
+            routes = optimize_routes_by_components(technicians, tasks, stats, monitor=monitor, solver=solver,
+                                                   warm_start=warm_start, start_routes=start_routes, **limits)
+        else:
+            routes = solver(technicians, tasks, stats, monitor=monitor, warm_start=warm_start,
+                            start_routes=start_routes, **limits)
+    elif engine == "alns":
+        routes = optimize_routes_alns(technicians, tasks, stats, monitor=monitor, lexicographic=lexicographic, **limits)
+    else:
+        routes = optimize_routes_greedy(technicians, tasks, stats)
+    monitor.flush()
+
+    # 2-opt / Or-opt / relocate / swap improvement of whatever the engine returned
+    if options.get("local_search", True) and not monitor.should_stop():
+        monitor.progress(1.0, "local_search")
+        routes = improve_routes(technicians, tasks, routes, stats, monitor=monitor)
+
+    return [route.model_dump() for route in routes], stats
+
+class JobManager:
+    def __init__(self, max_workers: int = MAX_CONCURRENT_SOLVES):
+        self.max_workers = max_workers
+        self.threads = default_threads(max_workers)  # Gurobi threads of each solve
+        self._pool: Dict[int, dict] = {}  # worker pid -> last reported environment status
+        self._jobs: Dict[str, dict] = {}
+        self._stop_events: Dict[str, object] = {}
+        self._subscribers: Dict[str, list] = {}  # job id -> [(event loop, asyncio.Queue)]
+        self._watchers: list = []  # [(event loop, asyncio.Queue)] receiving state changes of all jobs
+        self._claimed: Dict[str, str] = {}  # task id -> job id
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._events = None
+        self._drain_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the worker pool (called at API startup, never in worker processes)"""
+        if self._executor is not None:
+            return
+        # spawn (the Windows default) also on Linux: forking a threaded server is unsafe
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._events = self._manager.Queue()
+        # Each worker starts its Gurobi environment once and reuses it for every job
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                             initializer=init_solver_process, initargs=(self.threads, self._events))
+        # Workers are spawned on demand: one submission each starts them all now
+        for _ in range(self.max_workers):
+            self._executor.submit(os.getpid)
+        self._drain_thread = threading.Thread(target=self._drain_events, daemon=True)
+        self._drain_thread.start()
+        print(f"[JOBS] Process pool started with {self.max_workers} workers, {self.threads} Gurobi threads each")
+
+    def shutdown(self):
+        if self._executor is None:
+            return
+        for event in self._stop_events.values():
+            event.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+        self._drain_thread.join(timeout=5)
+        self._manager.shutdown()
+        self._executor = None
+        self._pool = {}
+
+    def submit(self, technicians: List[Technician], tasks: List[Task], options: dict,
+               start_routes: Optional[List[dict]] = None) -> dict:
+        """Queue an optimization of the given tasks. Tasks already claimed by a running job are skipped."""
+        if self._executor is None:
+            self.start()
+
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            tasks = [t for t in tasks if t.id not in self._claimed]
+            if not tasks:
+                raise ValueError("All pending tasks are already being optimized")
+            for t in tasks:
+                self._claimed[t.id] = job_id
+
+            job = {
+                "id": job_id,
+                "state": "queued",
+                "progress": 0.0,
+                "phase": None,
+                "options": options,
+                "totalTasks": len(tasks),
+                "createdAt": datetime.now().isoformat(),
+                "startedAt": None,
+                "finishedAt": None,
+                "error": None,
+                "incumbent": None,
+                "result": None,
+                "discard": False,
+            }
+            self._jobs[job_id] = job
+            self._stop_events[job_id] = self._manager.Event()
+
+        monitor = QueueMonitor(job_id, self._events, self._stop_events[job_id])
+        future = self._executor.submit(run_optimization, technicians, tasks, options, monitor, start_routes)
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        job["future"] = future
+        self._notify(job_id, "state", self._state_event(job))
+        print(f"[JOBS] Job {job_id} queued ({len(tasks)} tasks, engine: {options.get('engine')})")
+        return self._public(job)
+
+    def pool_status(self) -> dict:
+        """Solver workers and their Gurobi environments, as last reported by the workers"""
+        processes = sorted(self._pool.values(), key=lambda status: status["pid"])
+        environments = sum(status["started"] for status in processes)
+        in_use = sum(status["inUse"] for status in processes)
+        return {
+            "workers": self.max_workers,
+            "threadsPerSolve": self.threads,
+            "environments": environments,
+            "environmentsInUse": in_use,
+            "utilisation": round(in_use / environments, 2) if environments else 0.0,
+            "running": sum(1 for job in self._jobs.values() if job["state"] == "running"),
+            "queued": sum(1 for job in self._jobs.values() if job["state"] == "queued"),
+            "processes": processes,
+        }
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return self._public(job) if job else None
+
+    def list(self) -> List[dict]:
+        return [self._public(job) for job in self._jobs.values()]
+
+    def is_claimed(self, task_id: str) -> bool:
+        """True while a queued or running job plans this task"""
+        return task_id in self._claimed
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a queued job, or ask a running solve to stop (its result is discarded)"""
+        return self._stop(job_id, discard=True)
+
+    def stop(self, job_id: str) -> Optional[dict]:
+        """Stop a running solve early and keep its best incumbent as the result"""
+        return self._stop(job_id, discard=False)
+
+    def _stop(self, job_id: str, discard: bool) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if not job:
+            return None
+        if job["state"] in ("queued", "running"):
+            job["discard"] = job["discard"] or discard
+            self._stop_events[job_id].set()
+            if job["future"].cancel():
+                self._finish(job_id, job["future"])
+            else:
+                job["phase"] = "cancelling" if job["discard"] else "stopping"
+        return self._public(job)
+
+    def subscribe(self, job_id: str) -> Optional[asyncio.Queue]:
+        """
+        Register an event stream for a job (call from the event loop). The queue
+        starts with the current state and incumbent, then receives live events.
+        """
+        job = self._jobs.get(job_id)
+        if not job:
+            return None
+        queue = asyncio.Queue()
+        queue.put_nowait(("state", self._state_event(job)))
+        if job["incumbent"]:
+            queue.put_nowait(("incumbent", job["incumbent"]))
+        if job["state"] in ("completed", "failed", "cancelled"):
+            queue.put_nowait(("done", self._public(job)))
+        else:
+            self._subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id, [])
+        self._subscribers[job_id] = [(loop, q) for loop, q in subscribers if q is not queue]
+
+    def watch(self) -> asyncio.Queue:
+        """Receive (kind, job state) for the state changes and ends of all jobs (call from the event loop)"""
+        queue = asyncio.Queue()
+        self._watchers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unwatch(self, queue: asyncio.Queue):
+        self._watchers = [(loop, q) for loop, q in self._watchers if q is not queue]
+
+    def _notify(self, job_id: str, kind: str, data: dict):
+        for loop, queue in self._subscribers.get(job_id, []):
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, data))
+        if kind in ("state", "done") and self._watchers:
+            job = self._jobs[job_id]
+            state = dict(self._state_event(job), error=job["error"])
+            for loop, queue in self._watchers:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, state))
+
+    def _state_event(self, job: dict) -> dict:
+        return {key: job[key] for key in ("id", "state", "progress", "phase", "startedAt", "finishedAt")}
+
+    def _public(self, job: dict) -> dict:
+        return {key: value for key, value in job.items() if key not in ("future", "discard")}
+
+    def _drain_events(self):
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            job_id, kind, data = item
+            if kind == "pool":
+                self._pool[data["pid"]] = dict(data, updatedAt=datetime.now().isoformat())
+                continue
+            job = self._jobs.get(job_id)
+            if not job or job["state"] not in ("queued", "running"):
+                continue
+            if kind == "started":
+                job["state"] = "running"
+                job["startedAt"] = datetime.now().isoformat()
+                self._notify(job_id, "state", self._state_event(job))
+            elif kind == "progress" and job["phase"] not in ("cancelling", "stopping"):
+                job.update(data)
+                self._notify(job_id, "progress", data)
+            elif kind == "incumbent":
+                job["incumbent"] = data
+                self._notify(job_id, "incumbent", data)
+
+    def _finish(self, job_id: str, future: Future):
+        job = self._jobs[job_id]
+        if job["state"] in ("completed", "failed", "cancelled"):
+            return
+        try:
+            if future.cancelled() or job["discard"]:
+                job["state"] = "cancelled"
+            else:
+                routes, stats = future.result()
+                job["result"] = _save_result(routes, stats, job["totalTasks"])
+                job["state"] = "completed"
+                job["progress"] = 1.0
+        except Exception as e:
+            print(f"[JOBS] Job {job_id} failed: {e}")
+            job["state"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["phase"] = None
+            job["finishedAt"] = datetime.now().isoformat()
+            with self._lock:
+                self._claimed = {t: j for t, j in self._claimed.items() if j != job_id}
+            self._notify(job_id, "done", self._public(job))
+            self._subscribers.pop(job_id, None)
+            print(f"[JOBS] Job {job_id} {job['state']}")
+
+def _save_result(routes: List[dict], stats: dict, total_tasks: int) -> dict:
+    """Assign the planned tasks and store the optimization result (one transaction)"""
+    with storage.batch():
+        for route in routes:
+            for task in route["tasks"]:
+                storage.update_task(task["id"], {
+                    "assignedTo": route["technicianId"],
+                    "status": "assigned"
+                })
+
+        return storage.save_route({
+            "routes": routes,
+            "totalTasks": total_tasks,
+            "assignedTasks": sum(route["taskCount"] for route in routes),
+            "stats": stats
+        })
+
+job_manager = JobManager()
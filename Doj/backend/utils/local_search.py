@@ -0,0 +1,299 @@
+"""
+Local search improvement of technician routes, run after any engine.
+
+Intra-route moves: 2-opt (segment reversal) and Or-opt (move a chain of 1-3 tasks).
+Inter-route moves: relocate a task to another technician and swap two tasks, only
+towards technicians that have the required skill. Inter-route moves are restricted
+to the k nearest tasks of each task (neighbour lists), so a pass is close to linear.
+Moves are evaluated in O(1) on the same weighted distance as the Gurobi objective.
+
+The search only sees the routed tasks and builds no distance matrix: edge distances
+are computed from the locations when a move is evaluated, and the neighbour lists come
+from grid indexes, so memory stays linear in the plan size.
+"""
+import math
+import time
+from typing import List, Optional
+import numpy as np
+from models import Technician, Task, TechnicianRoute
+from utils.routing import PRIORITY_WEIGHT, ASSIGNMENT_REWARD, SolveMonitor, build_route, location_array
+from utils.spatial import EARTH_RADIUS, GridIndex, project
+
+EPSILON = 1e-9
+
+class SearchInstance:
+    """
+    Technicians and the tasks of their routes, as seen by the local search. Distances
+    are haversine km computed per edge, as in the distance matrices of RoutingInstance.
+    """
+    def __init__(self, technicians: List[Technician], tasks: List[Task]):
+        self.technicians = technicians
+        self.tasks = tasks
+        self.n_techs = len(technicians)
+        self.n_tasks = len(tasks)
+        self.weight = [4 - PRIORITY_WEIGHT[t.priority] for t in tasks]
+        self.reward = [ASSIGNMENT_REWARD + PRIORITY_WEIGHT[t.priority] * 1000 for t in tasks]
+        self.capacity = [t.maxTasksPerDay for t in technicians]
+        self.skills = [t.requiredSkill for t in tasks]
+        self.tech_skills = [set(t.skills) for t in technicians]
+
+        self.task_coords = location_array(tasks)
+        self.tech_coords = location_array(technicians)
+        task_rad, tech_rad = np.radians(self.task_coords), np.radians(self.tech_coords)
+        self._task_lat, self._task_lng = task_rad[:, 0].tolist(), task_rad[:, 1].tolist()
+        self._task_cos = np.cos(task_rad[:, 0]).tolist()
+        self._tech_lat, self._tech_lng = tech_rad[:, 0].tolist(), tech_rad[:, 1].tolist()
+        self._tech_cos = np.cos(tech_rad[:, 0]).tolist()
+
+    def eligible(self, j: int, i: int) -> bool:
+        return self.skills[i] in self.tech_skills[j]
+
+    def task_distance(self, a: int, b: int) -> float:
+        return _haversine(self._task_lat[a], self._task_lng[a], self._task_cos[a],
+                          self._task_lat[b], self._task_lng[b], self._task_cos[b])
+
+    def tech_distance(self, j: int, i: int) -> float:
+        return _haversine(self._tech_lat[j], self._tech_lng[j], self._tech_cos[j],
+                          self._task_lat[i], self._task_lng[i], self._task_cos[i])
+
+    def objective(self, routes: List[List[int]]) -> float:
+        """Weighted distance minus assignment rewards, as the Gurobi objective and RoutingInstance.objective"""
+        ev = _Evaluator(self)
+        total = 0.0
+        for j, route in enumerate(routes):
+            prev = -1
+            for i in route:
+                total += ev.edge(j, prev, i) - self.reward[i]
+                prev = i
+        return total
+
+    def neighbour_lists(self, k: int):
+        """
+        The k nearest other tasks and the k nearest technicians of every task, from
+        grid indexes on projected locations (planar distances are enough to rank them)
+        """
+        if not self.n_tasks:
+            return [], []
+        ref_lat = float(self.task_coords[:, 0].mean())
+        task_points = project(self.task_coords, ref_lat)
+        task_index = GridIndex(task_points)
+        tech_index = GridIndex(project(self.tech_coords, ref_lat))
+        return (task_index.k_nearest_many(task_points, k, exclude=range(self.n_tasks)),
+                tech_index.k_nearest_many(task_points, k))
+
+    def to_routes(self, routes: List[List[int]]) -> List[TechnicianRoute]:
+        return [build_route(self.technicians[j], route, self.tasks) for j, route in enumerate(routes) if route]
+
+def _haversine(lat1: float, lng1: float, cos1: float, lat2: float, lng2: float, cos2: float) -> float:
+    a = math.sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.atan2(math.sqrt(a), math.sqrt(max(1 - a, 0.0)))
+
+class _Evaluator:
+    """O(1) weighted edge costs of an instance"""
+    def __init__(self, inst: SearchInstance):
+        self.inst = inst
+        self.weight = inst.weight
+
+    def edge(self, j: int, a: int, b: Optional[int]) -> float:
+        """Weighted cost of a -> b in the route of technician j (a = -1 is the start, b = None the end)"""
+        if b is None:
+            return 0.0
+        dist = self.inst.tech_distance(j, b) if a < 0 else self.inst.task_distance(a, b)
+        return dist * self.weight[b]
+
+def two_opt(ev: _Evaluator, j: int, route: List[int]) -> bool:
+    """Apply the best segment reversal of the route (in place)"""
+    n = len(route)
+    if n < 2:
+        return False
+    # Prefix sums of the edges inside the route, in both directions
+    forward, backward = [0.0], [0.0]
+    for t in range(n - 1):
+        a, b = route[t], route[t + 1]
+        forward.append(forward[-1] + ev.edge(j, a, b))
+        backward.append(backward[-1] + ev.edge(j, b, a))
+
+    best_delta, best_move = -EPSILON, None
+    for s in range(n - 1):
+        prev = route[s - 1] if s > 0 else -1
+        for e in range(s + 1, n):
+            nxt = route[e + 1] if e + 1 < n else None
+            old = ev.edge(j, prev, route[s]) + (forward[e] - forward[s]) + ev.edge(j, route[e], nxt)
+            new = ev.edge(j, prev, route[e]) + (backward[e] - backward[s]) + ev.edge(j, route[s], nxt)
+            if new - old < best_delta:
+                best_delta, best_move = new - old, (s, e)
+    if best_move is None:
+        return False
+    s, e = best_move
+    route[s:e + 1] = route[s:e + 1][::-1]
+    return True
+
+def or_opt(ev: _Evaluator, j: int, route: List[int]) -> bool:
+    """Apply the best move of a chain of 1-3 consecutive tasks within the route (in place)"""
+    n = len(route)
+    best_delta, best_move = -EPSILON, None
+    for length in (1, 2, 3):
+        for s in range(n - length + 1):
+            e = s + length - 1
+            prev = route[s - 1] if s > 0 else -1
+            nxt = route[e + 1] if e + 1 < n else None
+            removal = ev.edge(j, prev, nxt) - ev.edge(j, prev, route[s]) - ev.edge(j, route[e], nxt)
+            rest = route[:s] + route[e + 1:]
+            for t in range(len(rest) + 1):
+                if t == s:
+                    continue
+                x = rest[t - 1] if t > 0 else -1
+                y = rest[t] if t < len(rest) else None
+                delta = removal + ev.edge(j, x, route[s]) + ev.edge(j, route[e], y) - ev.edge(j, x, y)
+                if delta < best_delta:
+                    best_delta, best_move = delta, (s, e, t)
+    if best_move is None:
+        return False
+    s, e, t = best_move
+    chain = route[s:e + 1]
+    rest = route[:s] + route[e + 1:]
+    route[:] = rest[:t] + chain + rest[t:]
+    return True
+
+def _inter_route_pass(ev: _Evaluator, routes: List[List[int]], neighbours: List[List[int]],
+                      tech_neighbours: List[List[int]], deadline: float = math.inf) -> int:
+    """
+    Relocate and swap moves between technicians, first improvement, until the pass ends
+    or the deadline (a perf_counter value) passes. Returns the number of moves.
+    """
+    inst = ev.inst
+    moves = 0
+    where = {}
+    for j, route in enumerate(routes):
+        for p, i in enumerate(route):
+            where[i] = j
+
+    for i in list(where):
+        if time.perf_counter() > deadline:
+            break
+        a = where[i]
+        route_a = routes[a]
+        p = route_a.index(i)
+        prev_i = route_a[p - 1] if p > 0 else -1
+        next_i = route_a[p + 1] if p + 1 < len(route_a) else None
+        removal = ev.edge(a, prev_i, next_i) - ev.edge(a, prev_i, i) - ev.edge(a, i, next_i)
+
+        # Candidate positions: next to neighbouring tasks, or first in a nearby route
+        candidates = []
+        for n in neighbours[i]:
+            b = where.get(n)
+            if b is not None and b != a and inst.eligible(b, i):
+                q = routes[b].index(n)
+                candidates.append((b, q))
+                candidates.append((b, q + 1))
+        for b in tech_neighbours[i]:
+            if b != a and inst.eligible(b, i):
+                candidates.append((b, 0))
+
+        best_delta, best_move = -EPSILON, None
+        for b, q in candidates:
+            route_b = routes[b]
+            x = route_b[q - 1] if q > 0 else -1
+            y = route_b[q] if q < len(route_b) else None
+            # Relocate i into route b at position q
+            if len(route_b) < inst.capacity[b]:
+                delta = removal + ev.edge(b, x, i) + ev.edge(b, i, y) - ev.edge(b, x, y)
+                if delta < best_delta:
+                    best_delta, best_move = delta, ("relocate", b, q)
+            # Swap i with the task at position q of route b
+            if y is not None and inst.eligible(a, y):
+                y_next = route_b[q + 1] if q + 1 < len(route_b) else None
+                delta = (ev.edge(a, prev_i, y) + ev.edge(a, y, next_i)
+                         - ev.edge(a, prev_i, i) - ev.edge(a, i, next_i)
+                         + ev.edge(b, x, i) + ev.edge(b, i, y_next)
+                         - ev.edge(b, x, y) - ev.edge(b, y, y_next))
+                if delta < best_delta:
+                    best_delta, best_move = delta, ("swap", b, q)
+
+        if best_move is None:
+            continue
+        kind, b, q = best_move
+        if kind == "relocate":
+            route_a.pop(p)
+            routes[b].insert(q, i)
+            where[i] = b
+        else:
+            other = routes[b][q]
+            route_a[p], routes[b][q] = other, i
+            where[i], where[other] = b, a
+        moves += 1
+    return moves
+
+def local_search(inst: SearchInstance, routes: List[List[int]], time_limit: float = 5.0,
+                 neighbours: int = 10, monitor: Optional[SolveMonitor] = None) -> int:
+    """
+    Improve routes (lists of task indices, modified in place) until no move improves
+    or the time budget is spent. Returns the number of applied moves.
+    """
+    deadline = time.perf_counter() + time_limit
+    ev = _Evaluator(inst)
+    task_neighbours, tech_neighbours = inst.neighbour_lists(neighbours)
+
+    moves = 0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        if monitor is not None and monitor.should_stop():
+            break
+        improved = False
+        for j, route in enumerate(routes):
+            # A round over tens of thousands of tasks outlasts the budget: check it per route
+            if time.perf_counter() > deadline:
+                break
+            while two_opt(ev, j, route) or or_opt(ev, j, route):
+                moves += 1
+                improved = True
+        inter_moves = _inter_route_pass(ev, routes, task_neighbours, tech_neighbours, deadline)
+        moves += inter_moves
+        improved = improved or inter_moves > 0
+    return moves
+
+def improve_routes(technicians: List[Technician], tasks: List[Task], routes: List[TechnicianRoute],
+                   stats: Optional[dict] = None, time_limit: float = 5.0,
+                   monitor: Optional[SolveMonitor] = None) -> List[TechnicianRoute]:
+    """
+    Run local search on the routes of any engine and report the objective gained (the
+    weighted distance the search minimises) vs. time spent. Only the routed tasks are
+    loaded, so the cost follows the plan size, not the number of tasks of the job.
+    """
+    available_techs = [t for t in technicians if t.available]
+    if not routes or not available_techs:
+        return routes
+
+    start_time = time.perf_counter()
+    task_by_id = {task.id: task for task in tasks}
+    routed = [task_by_id[t.id] for route in routes for t in route.tasks]
+    inst = SearchInstance(available_techs, routed)
+    tech_index = {tech.id: j for j, tech in enumerate(available_techs)}
+    route_lists: List[List[int]] = [[] for _ in available_techs]
+    start = 0
+    for route in routes:
+        route_lists[tech_index[route.technicianId]] = list(range(start, start + len(route.tasks)))
+        start += len(route.tasks)
+
+    objective_before = inst.objective(route_lists)
+    distance_before = sum(r.totalDistance for r in routes)
+    moves = local_search(inst, route_lists, time_limit, monitor=monitor)
+    improved = inst.to_routes(route_lists)
+    objective_after = inst.objective(route_lists)
+    distance_after = sum(r.totalDistance for r in improved)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"[LOCAL SEARCH] {moves} moves, objective {objective_before:.2f} -> {objective_after:.2f} "
+          f"({distance_before:.2f} km -> {distance_after:.2f} km) in {elapsed:.3f}s")
+    if stats is not None:
+        stats["localSearch"] = {
+            "moves": moves,
+            "objectiveBefore": round(objective_before, 4),
+            "objectiveAfter": round(objective_after, 4),
+            "objectiveSaved": round(objective_before - objective_after, 4),
+            "distanceBefore": round(distance_before, 2),
+            "distanceAfter": round(distance_after, 2),
+            "distanceSaved": round(distance_before - distance_after, 2),
+            "time": round(elapsed, 3)
+        }
+    return improved
@@ -1,26 +1,174 @@
+import os
 import math
-from typing import List, Tuple, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Callable, Tuple
+import numpy as np
+from scipy import sparse
 import gurobipy as gp
 from gurobipy import GRB
-from models import Technician, Task, TechnicianRoute, OptimizedTask, Location
+from models import Technician, Task, TechnicianRoute
+from utils.routing import (PRIORITY_WEIGHT, ASSIGNMENT_REWARD, OBJECTIVE_LEVELS, calculate_distance,
+                           haversine_matrix, location_array, build_distance_matrices, build_route, route_summaries,
+                           summaries_to_orders, plan_objective, SolveMonitor)
+from utils.incremental import best_insertion, repair_routes
+from utils.spatial import GridIndex, project
+from utils.gurobi_env import get_pool
+from utils.presolve import PresolvedModel, PositionLayout, PRESOLVE_NEIGHBOURS, PRESOLVE_RADIUS_KM
 
-def calculate_distance(coord1: Location, coord2: Location) -> float:
-    """Calculate distance between two coordinates using Haversine formula"""
-    R = 6371  # Earth's radius in km
-    
-    lat1, lng1 = math.radians(coord1.lat), math.radians(coord1.lng)
-    lat2, lng2 = math.radians(coord2.lat), math.radians(coord2.lng)
-    
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
+GUROBI_STATUS = {
+    GRB.OPTIMAL: "optimal",
+    GRB.TIME_LIMIT: "time_limit",
+    GRB.INFEASIBLE: "infeasible",
+    GRB.INTERRUPTED: "interrupted",
+}
+
+def record_gurobi_stats(model: gp.Model, stats: Optional[dict], formulation: str,
+                        timings: Optional[dict] = None, warm_start: Optional[str] = None):
+    """Fill the stats dict (if given) with solve information of a Gurobi model"""
+    if stats is None:
+        return
+    stats.update(
+        engine="gurobi",
+        formulation=formulation,
+        status=GUROBI_STATUS.get(model.status, str(model.status)),
+        solveTime=round(model.Runtime, 3),
+        numVars=model.NumVars,
+        numConstrs=model.NumConstrs,
+        warmStart=warm_start
+    )
+    if model.SolCount > 0 and not model.IsMultiObj:
+        stats["objective"] = round(model.ObjVal, 4)
+        stats["gap"] = round(model.MIPGap, 6)
+    if timings and "firstIncumbent" in timings:
+        stats["timeToFirstIncumbent"] = round(timings["firstIncumbent"], 3)
+
+def monitor_callback(monitor: Optional[SolveMonitor], time_limit: float, solution_vars: List[gp.Var],
+                     summarize: Callable[[List[float]], List[dict]], timings: dict, elapsed: float = 0.0):
+    """
+    Gurobi callback recording the time to the first incumbent in timings, reporting
+    progress and each new incumbent (MIPSOL) to the monitor, and stopping the solve on
+    request. summarize turns solution_vars values into route summaries. elapsed is the
+    time already spent on earlier solves of the same run (lexicographic levels).
+    In a multi-objective solve, incumbents are those of the current level.
+    """
+    best = [float("inf")]
     
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    def callback(model, where):
+        if where == GRB.Callback.MIPSOL and "firstIncumbent" not in timings:
+            timings["firstIncumbent"] = elapsed + model.cbGet(GRB.Callback.RUNTIME)
+        if where == GRB.Callback.MULTIOBJ:
+            best[0] = float("inf")
+        if monitor is None:
+            return
+        if where == GRB.Callback.MIP:
+            monitor.progress(min((elapsed + model.cbGet(GRB.Callback.RUNTIME)) / time_limit, 1.0))
+            if monitor.should_stop():
+                model.terminate()
+        elif where == GRB.Callback.MIPSOL:
+            objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+            if objective >= best[0]:
+                return
+            best[0] = objective
+            bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+            if abs(bound) >= GRB.INFINITY:
+                bound = gap = None
+            else:
+                gap = abs(objective - bound) / max(abs(objective), 1e-10)
+            monitor.incumbent(objective, summarize(model.cbGetSolution(solution_vars)), bound, gap)
     
-    return R * c
+    return callback
 
-def optimize_routes_with_gurobi(technicians: List[Technician], tasks: List[Task]) -> List[TechnicianRoute]:
+def warm_start_orders(technicians: List[Technician], tasks: List[Task], tech_task_dist: np.ndarray,
+                      task_task_dist: np.ndarray, start_routes: Optional[List[dict]] = None) -> List[List[int]]:
+    """
+    Feasible plan used as MIP start: the given route summaries (e.g. the saved plan)
+    completed with the greedy heuristic, or the greedy plan alone.
+    """
+    initial = summaries_to_orders(technicians, tasks, start_routes) if start_routes else None
+    return greedy_orders(technicians, tasks, tech_task_dist, task_task_dist, initial)
+
+# Lexicographic mode: share of the time limit given to each level
+LEVEL_TIME_SHARES = {"high": 0.2, "medium": 0.15, "low": 0.15, "distance": 0.5}
 
+def _level_report(name: str, value: float, bound: float, gap: float, runtime: float, status: int) -> dict:
+    """One level of a lexicographic solve; count levels are reported as assigned tasks"""
+    sign = 1 if name == "distance" else -1
+    known = lambda number: number is not None and abs(number) < GRB.INFINITY
+    return {
+        "name": name,
+        "value": round(sign * value, 4) if known(value) else None,
+        "bound": round(sign * bound, 4) if known(bound) else None,
+        "gap": round(gap, 6) if known(gap) else None,
+        "time": round(runtime, 3),
+        "status": GUROBI_STATUS.get(status, str(status))
+    }
+
+def solve_levels(model: gp.Model, v: gp.MVar, objectives: List[Tuple[str, Optional[sparse.csr_matrix], np.ndarray]],
+                 time_limit: float, callback_for: Callable[[float], Callable]) -> List[dict]:
+    """
+    Lexicographic solve for a model whose last level is quadratic, which setObjectiveN
+    does not accept: each (name, Q, c) level is minimized within its time budget, then
+    the value reached is kept as a constraint for the next levels. Stops at the first
+    level without a solution or on interruption. callback_for(elapsed) gives the callback.
+    """
+    levels, elapsed = [], 0.0
+    for name, Q, c in objectives:
+        model.setParam('TimeLimit', max(LEVEL_TIME_SHARES[name] * time_limit, 0.1))
+        model.setMObjective(Q, c, 0.0, sense=GRB.MINIMIZE)
+        model.optimize(callback_for(elapsed))
+        elapsed += model.Runtime
+        if model.SolCount == 0:
+            levels.append(_level_report(name, None, None, None, model.Runtime, model.status))
+            break
+        levels.append(_level_report(name, model.ObjVal, model.ObjBound, model.MIPGap, model.Runtime, model.status))
+        print(f"[GUROBI] Level {name}: {levels[-1]['value']} (gap {levels[-1]['gap']}) in {model.Runtime:.2f}s")
+        if model.status == GRB.INTERRUPTED:
+            break
+        if Q is None:
+            # Assigned task counts are integers: keep at least as many for the next levels
+            model.addMConstr(sparse.csr_matrix(c), v, GRB.LESS_EQUAL, np.array([math.floor(model.ObjVal + 0.5)]))
+    return levels
+
+def multiobjective_levels(model: gp.Model) -> List[dict]:
+    """Per-level report of a setObjectiveN solve (one pass per level, in OBJECTIVE_LEVELS order)"""
+    levels = []
+    for index in range(model.NumObjPasses):
+        model.setParam('ObjPassNumber', index)
+        levels.append(_level_report(OBJECTIVE_LEVELS[index], model.ObjPassNObjVal, model.ObjPassNObjBound,
+                                    model.ObjPassNMIPGap, model.ObjPassNRuntime, model.ObjPassNStatus))
+    return levels
+
+def record_levels(stats: Optional[dict], levels: List[dict], technicians: List[Technician],
+                  routes: List[TechnicianRoute]):
+    """Lexicographic stats: the levels, and the weighted objective of the plan for comparison"""
+    if stats is None:
+        return
+    gaps = [level["gap"] for level in levels]
+    stats.update(
+        objectiveMode="lexicographic",
+        levels=levels,
+        objective=round(plan_objective(technicians, routes), 4),
+        gap=max(gaps) if gaps and None not in gaps else None
+    )
+
+def optimize_routes_with_gurobi(technicians: List[Technician], tasks: List[Task],
+                                stats: Optional[dict] = None, time_limit: float = 30,
+                                monitor: Optional[SolveMonitor] = None, warm_start: bool = True,
+                                start_routes: Optional[List[dict]] = None,
+                                neighbours: Optional[int] = PRESOLVE_NEIGHBOURS,
+                                radius_km: Optional[float] = PRESOLVE_RADIUS_KM,
+                                lexicographic: bool = False, threads: Optional[int] = None) -> List[TechnicianRoute]:
+    """
+    Position-based model: y[i,k,j] places task i at position k of technician j.
+    Consecutive positions are linked by quadratic terms in the objective. With neighbours
+    or radius_km, they are kept only between tasks that are among each other's
+    `neighbours` nearest or within radius_km (see utils/presolve.py): the solve is then
+    a heuristic (status "heuristic", pruned=True in stats).
+    With warm_start, the greedy plan (or start_routes completed greedily) is the MIP start.
+    With lexicographic, OBJECTIVE_LEVELS are solved in turn instead of the weighted objective.
+    threads overrides the Gurobi threads of the pooled environment (concurrent subproblems).
+    """
     if not technicians or not tasks:
         return []
     
@@ -29,210 +177,693 @@ def optimize_routes_with_gurobi(technicians: List[Technician], tasks: List[Task]
     if not available_techs:
         return []
     
-    # Priority weights
-    priority_weight = {"high": 3, "medium": 2, "low": 1}
+    try:
+        # Create model on a pooled environment (Threads, OutputFlag and TimeLimit preset
+        # for this job); it is disposed when the solve ends
+        build_start = time.perf_counter()
+        with get_pool().model("MaintenanceRouting", time_limit, threads) as model:
+            # Smaller model: infeasible tasks dropped, positions capped, symmetric technicians
+            # ordered, optionally consecutive terms only between nearby tasks (indices refer to presolved.tasks)
+            presolved = PresolvedModel(available_techs, tasks, neighbours, radius_km)
+            tasks = presolved.tasks
+            n_techs = len(available_techs)
+            tech_task_dist, task_task_dist = presolved.tech_task_dist, presolved.task_task_dist
+            
+            # Variables, objective and constraints are built from index arrays in a few matrix calls
+            layout = PositionLayout(presolved)
+            weight = np.array([4 - PRIORITY_WEIGHT[t.priority] for t in tasks], dtype=float)
+            reward = np.array([ASSIGNMENT_REWARD + PRIORITY_WEIGHT[t.priority] * 1000 for t in tasks], dtype=float)
+            
+            # One binary vector: x[i,j] entries first (task i assigned to technician j, only
+            # tasks the technician has the skill for), then y[i,k,j] (task i at position k of j)
+            v = model.addMVar(layout.n_vars, vtype=GRB.BINARY, name="v")
+            print(f"[GUROBI] Created {layout.n_x} assignment variables and {layout.n_y} position variables")
+            
+            # Objective: reward assignments (primary) and minimize the priority-weighted distance
+            # from the technician to position 0 and between consecutive positions (secondary)
+            distance = np.zeros(layout.n_vars)
+            first = np.flatnonzero(layout.y_pos == 0)
+            distance[layout.n_x + first] = (tech_task_dist[layout.y_tech[first], layout.y_task[first]]
+                                            * weight[layout.y_task[first]])
+            prev, cur = layout.consecutive_pairs()
+            cur_task = layout.y_task[cur - layout.n_x]
+            quad = task_task_dist[layout.y_task[prev - layout.n_x], cur_task] * weight[cur_task]
+            distance_q = sparse.csr_matrix((quad, (prev, cur)), shape=(layout.n_vars, layout.n_vars))
+            if lexicographic:
+                # Levels: minus the assigned tasks of each priority, then the distance alone
+                priority = np.array([PRIORITY_WEIGHT[t.priority] for t in tasks], dtype=int)
+                objectives = []
+                for name in OBJECTIVE_LEVELS[:-1]:
+                    count = np.zeros(layout.n_vars)
+                    count[:layout.n_x] = -(priority[layout.x_task] == PRIORITY_WEIGHT[name]).astype(float)
+                    objectives.append((name, None, count))
+                objectives.append(("distance", distance_q, distance))
+            else:
+                linear = distance.copy()
+                linear[:layout.n_x] = -reward[layout.x_task]
+                model.setMObjective(distance_q, linear, 0.0, sense=GRB.MINIMIZE)
+            
+            # Assignment, position and symmetry constraints as sparse rows
+            for matrix, sense, rhs in layout.constraints():
+                model.addMConstr(matrix, v, sense, rhs)
+            
+            y_vars = v.tolist()[layout.n_x:]
+            
+            def decode(values) -> List[List[int]]:
+                """Task indices of each technician in position order"""
+                return layout.decode(values, n_techs)
+            
+            def summarize(values) -> List[dict]:
+                return route_summaries(available_techs, tasks, decode(values), tech_task_dist, task_task_dist)
+            
+            # MIP start: Gurobi begins from a feasible plan instead of searching for one
+            start_kind = None
+            if warm_start:
+                start_kind = "saved" if start_routes else "greedy"
+                start = warm_start_orders(available_techs, tasks, tech_task_dist, task_task_dist, start_routes)
+                start = presolved.restrict_start(start)
+                v.Start = layout.start_vector(start)
+                print(f"[GUROBI] MIP start ({start_kind}): {sum(len(o) for o in start)} tasks")
+            
+            model.update()
+            build_time = time.perf_counter() - build_start
+            
+            # Optimize
+            timings = {}
+            levels = None
+            if lexicographic:
+                levels = solve_levels(model, v, objectives, time_limit,
+                                      lambda elapsed: monitor_callback(monitor, time_limit, y_vars, summarize,
+                                                                       timings, elapsed))
+            else:
+                model.optimize(monitor_callback(monitor, time_limit, y_vars, summarize, timings))
+            record_gurobi_stats(model, stats, "position", timings, start_kind)
+            solve_time = sum(level["time"] for level in levels) if levels else model.Runtime
+            if stats is not None:
+                stats["buildTime"] = round(build_time, 3)
+                stats["solveTime"] = round(solve_time, 3)
+                if presolved.pruned:
+                    # Optimal for the pruned model only
+                    stats["pruned"] = True
+                    if stats["status"] == "optimal":
+                        stats["status"] = "heuristic"
+            
+            print(f"[GUROBI] Model status: {model.status}")
+            if model.status == GRB.OPTIMAL:
+                print(f"[GUROBI] Optimal solution found! Obj: {model.objVal}")
+            elif model.status == GRB.INFEASIBLE:
+                print("[GUROBI] Model is infeasible")
+                model.computeIIS()
+                model.write("model.ilp")
+            
+            if model.SolCount == 0:
+                print("[GUROBI] No solution found (using greedy fallback)")
+                return optimize_routes_greedy(technicians, tasks, stats)
+            
+            # Extract solution
+            routes = []
+            
+            if model.status in (GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED):
+                # Get tasks in order by position: one attribute read, decoded with array ops
+                extract_start = time.perf_counter()
+                orders = decode(v.X[layout.n_x:])
+                extract_time = time.perf_counter() - extract_start
+                if stats is not None:
+                    stats["extractTime"] = round(extract_time, 3)
+                print(f"[GUROBI] Build {build_time:.3f}s, solve {solve_time:.3f}s, extract {extract_time:.3f}s")
+                for j, order in enumerate(orders):
+                    if order:
+                        routes.append(build_route(available_techs[j], order, tasks, tech_task_dist[j], task_task_dist))
+            if levels:
+                record_levels(stats, levels, available_techs, routes)
+            
+            return routes
+    
+    except gp.GurobiError as e:
+        print(f"Gurobi error (using greedy fallback): {e}")
+        # Fallback to greedy algorithm if Gurobi fails
+        return optimize_routes_greedy(technicians, tasks, stats)
+    except Exception as e:
+        print(f"Optimization error (using greedy fallback): {e}")
+        import traceback
+        traceback.print_exc()
+        return optimize_routes_greedy(technicians, tasks, stats)
+
+def optimize_routes_with_gurobi_arc(technicians: List[Technician], tasks: List[Task],
+                                    stats: Optional[dict] = None, time_limit: float = 30,
+                                    monitor: Optional[SolveMonitor] = None, warm_start: bool = True,
+                                    start_routes: Optional[List[dict]] = None,
+                                    lexicographic: bool = False, threads: Optional[int] = None) -> List[TechnicianRoute]:
+    """
+    Arc-based linear model: x[i,i2,j] = 1 if technician j goes from task i to task i2.
+    Subtours are eliminated with MTZ order variables. Same objective as the position model.
+    Warm start as in optimize_routes_with_gurobi. With lexicographic, the levels are
+    Gurobi objectives of decreasing priority (setObjectiveN), each with its time budget.
+    """
+    if not technicians or not tasks:
+        return []
+    
+    available_techs = [t for t in technicians if t.available]
+    if not available_techs:
+        return []
     
     try:
-        # Create model
-        model = gp.Model("MaintenanceRouting")
-        model.setParam('OutputFlag', 0)  # Suppress output
-        model.setParam('TimeLimit', 30)  # 30 seconds time limit
-        
-        n_tasks = len(tasks)
-        n_techs = len(available_techs)
-        
-        # Decision variables: x[i,j] = 1 if task i assigned to technician j
-        x = {}
-        for i in range(n_tasks):
-            for j in range(n_techs):
-                # Only create variable if technician has required skill
-                if tasks[i].requiredSkill in available_techs[j].skills:
-                    x[i, j] = model.addVar(vtype=GRB.BINARY, name=f"x_{i}_{j}")
-        
-        # Position variables: y[i,k,j] = 1 if task i is at position k for technician j
-        y = {}
-        for i in range(n_tasks):
-            for j in range(n_techs):
-                if (i, j) in x:  # Only if assignment is possible
-                    for k in range(available_techs[j].maxTasksPerDay):
-                        y[i, k, j] = model.addVar(vtype=GRB.BINARY, name=f"y_{i}_{k}_{j}")
-        
-        model.update()
-        print(f"[GUROBI] Created {len(x)} assignment variables and {len(y)} position variables")
-        
-        # Objective: Minimize total distance weighted by priority
-        obj_expr = 0
-        
-        # 1. Reward assignments (Primary objective)
-        # We want to MAXIMIZE assignments, so in MINIMIZE objective, we subtract a large value
-        ASSIGNMENT_REWARD = 100000
-        
-        for i in range(n_tasks):
-            for j in range(n_techs):
-                if (i, j) in x:
-                    # Base reward for any assignment + bonus for priority
-                    prio_bonus = priority_weight[tasks[i].priority] * 1000
-                    obj_expr -= x[i, j] * (ASSIGNMENT_REWARD + prio_bonus)
-        
-        # 2. Minimize distance (Secondary objective)
-        for j in range(n_techs):
-            tech_loc = available_techs[j].location
+        # Pooled environment and disposed model, as in optimize_routes_with_gurobi
+        with get_pool().model("MaintenanceRoutingArc", time_limit, threads) as model:
+            n_tasks = len(tasks)
+            n_techs = len(available_techs)
+            tech_task_dist, task_task_dist = build_distance_matrices(available_techs, tasks)
             
+            # Eligible tasks per technician
+            eligible = [
+                [i for i in range(n_tasks) if tasks[i].requiredSkill in tech.skills]
+                for tech in available_techs
+            ]
+            
+            # a[i,j] = 1 if task i assigned to technician j
+            # s[i,j] = 1 if task i is the first task of technician j
+            # x[i,i2,j] = 1 if technician j does task i2 right after task i
+            # u[i,j] = rank of task i in the route of technician j (MTZ)
+            a, s, x, u = {}, {}, {}, {}
+            for j, tech in enumerate(available_techs):
+                cap = min(tech.maxTasksPerDay, len(eligible[j]))
+                for i in eligible[j]:
+                    a[i, j] = model.addVar(vtype=GRB.BINARY, name=f"a_{i}_{j}")
+                    s[i, j] = model.addVar(vtype=GRB.BINARY, name=f"s_{i}_{j}")
+                    u[i, j] = model.addVar(lb=1, ub=max(cap, 1), name=f"u_{i}_{j}")
+                for i in eligible[j]:
+                    for i2 in eligible[j]:
+                        if i != i2:
+                            x[i, i2, j] = model.addVar(vtype=GRB.BINARY, name=f"x_{i}_{i2}_{j}")
+            
+            model.update()
+            print(f"[GUROBI-ARC] Created {len(a)} assignment variables and {len(x)} arc variables")
+            
+            # Objective: same weights as the position model, but linear
+            distance_expr = gp.LinExpr()
+            for (i, j), var in s.items():
+                distance_expr.addTerms(tech_task_dist[j, i] * (4 - PRIORITY_WEIGHT[tasks[i].priority]), var)
+            for (i, i2, j), var in x.items():
+                distance_expr.addTerms(task_task_dist[i, i2] * (4 - PRIORITY_WEIGHT[tasks[i2].priority]), var)
+            if lexicographic:
+                # Levels: minus the assigned tasks of each priority, then the distance alone
+                model.ModelSense = GRB.MINIMIZE
+                for index, name in enumerate(OBJECTIVE_LEVELS):
+                    if name == "distance":
+                        level_expr = distance_expr
+                    else:
+                        level_expr = -gp.quicksum(var for (i, j), var in a.items()
+                                                  if PRIORITY_WEIGHT[tasks[i].priority] == PRIORITY_WEIGHT[name])
+                    model.setObjectiveN(level_expr, index, priority=len(OBJECTIVE_LEVELS) - index, name=name)
+                    model.getMultiobjEnv(index).setParam('TimeLimit', max(LEVEL_TIME_SHARES[name] * time_limit, 0.1))
+            else:
+                obj_expr = distance_expr.copy()
+                for (i, j), var in a.items():
+                    obj_expr.addTerms(-(ASSIGNMENT_REWARD + PRIORITY_WEIGHT[tasks[i].priority] * 1000), var)
+                model.setObjective(obj_expr, GRB.MINIMIZE)
+            
+            # Each task assigned to at most one technician
             for i in range(n_tasks):
-                if (i, j) not in x:
-                    continue
-                
-                task_loc = tasks[i].location
-                priority_multiplier = 4 - priority_weight[tasks[i].priority]  # Invert for minimization
-                
-                # Distance from technician start to first task (position 0)
-                if (i, 0, j) in y:
-                    dist = calculate_distance(tech_loc, task_loc)
-                    obj_expr += dist * y[i, 0, j] * priority_multiplier
-                
-                # Distance between consecutive tasks
-                for k in range(1, available_techs[j].maxTasksPerDay):
-                    if (i, k, j) not in y:
-                        continue
-                    
-                    for i2 in range(n_tasks):
-                        if i2 == i or (i2, k-1, j) not in y:
-                            continue
-                        
-                        dist = calculate_distance(tasks[i2].location, task_loc)
-                        # Link: if task i2 at position k-1 and task i at position k
-                        obj_expr += dist * y[i2, k-1, j] * y[i, k, j] * priority_multiplier
-        
-        model.setObjective(obj_expr, GRB.MINIMIZE)
-        
-        # Constraint 1: Each task assigned to at most one technician
-        for i in range(n_tasks):
-            expr = gp.LinExpr()
-            for j in range(n_techs):
-                if (i, j) in x:
-                    expr += x[i, j]
-            model.addConstr(expr <= 1, f"task_assignment_{i}")
-        
-        # Constraint 2: Task assignment matches position assignment
-        for i in range(n_tasks):
-            for j in range(n_techs):
-                if (i, j) not in x:
-                    continue
-                
-                expr = gp.LinExpr()
-                for k in range(available_techs[j].maxTasksPerDay):
-                    if (i, k, j) in y:
-                        expr += y[i, k, j]
-                
-                model.addConstr(expr == x[i, j], f"position_match_{i}_{j}")
-        
-        # Constraint 3: Each position used at most once per technician
-        for j in range(n_techs):
-            for k in range(available_techs[j].maxTasksPerDay):
-                expr = gp.LinExpr()
-                for i in range(n_tasks):
-                    if (i, k, j) in y:
-                        expr += y[i, k, j]
-                model.addConstr(expr <= 1, f"position_unique_{k}_{j}")
-        
-        # Constraint 4: Positions must be consecutive (no gaps)
-        for j in range(n_techs):
-            for k in range(1, available_techs[j].maxTasksPerDay):
-                # If position k is used, position k-1 must be used
-                expr_k = gp.LinExpr()
-                expr_k_prev = gp.LinExpr()
-                
-                for i in range(n_tasks):
-                    if (i, k, j) in y:
-                        expr_k += y[i, k, j]
-                    if (i, k-1, j) in y:
-                        expr_k_prev += y[i, k-1, j]
-                
-                model.addConstr(expr_k <= expr_k_prev, f"consecutive_{k}_{j}")
-        
-        # Optimize
-        model.optimize()
-        
-        print(f"[GUROBI] Model status: {model.status}")
-        if model.status == GRB.OPTIMAL:
-            print(f"[GUROBI] Optimal solution found! Obj: {model.objVal}")
-        elif model.status == GRB.INFEASIBLE:
-            print("[GUROBI] Model is infeasible")
-            model.computeIIS()
-            model.write("model.ilp")
-        
-        # Extract solution
-        routes = []
-        
-        if model.status == GRB.OPTIMAL or model.status == GRB.TIME_LIMIT:
-            for j in range(n_techs):
-                tech = available_techs[j]
-                assigned_tasks = []
-                
-                # Get tasks in order by position
-                for k in range(tech.maxTasksPerDay):
-                    for i in range(n_tasks):
-                        if (i, k, j) in y and y[i, k, j].X > 0.5:
-                            task = tasks[i]
-                            
-                            # Calculate distance from previous position
-                            dist_from_prev = 0
-                            if k == 0:
-                                dist_from_prev = calculate_distance(tech.location, task.location)
-                            else:
-                                # Find previous task
-                                for i_prev in range(n_tasks):
-                                    if (i_prev, k-1, j) in y and y[i_prev, k-1, j].X > 0.5:
-                                        dist_from_prev = calculate_distance(
-                                            tasks[i_prev].location, 
-                                            task.location
-                                        )
-                                        break
-                            
-                            optimized_task = OptimizedTask(
-                                id=task.id,
-                                title=task.title,
-                                description=task.description,
-                                requiredSkill=task.requiredSkill,
-                                priority=task.priority,
-                                duration=task.duration,
-                                location=task.location,
-                                distanceFromPrevious=round(dist_from_prev, 2)
-                            )
-                            assigned_tasks.append(optimized_task)
-                            break
-                
-                if assigned_tasks:
-                    total_distance = sum(t.distanceFromPrevious for t in assigned_tasks if t.distanceFromPrevious)
-                    total_duration = sum(t.duration for t in assigned_tasks)
-                    
-                    route = TechnicianRoute(
-                        technicianId=tech.id,
-                        technicianName=tech.name,
-                        tasks=assigned_tasks,
-                        totalDistance=round(total_distance, 2),
-                        totalDuration=total_duration,
-                        taskCount=len(assigned_tasks)
+                techs_i = [a[i, j] for j in range(n_techs) if (i, j) in a]
+                if techs_i:
+                    model.addConstr(gp.quicksum(techs_i) <= 1, f"task_assignment_{i}")
+            
+            for j, tech in enumerate(available_techs):
+                # At most one route start and maxTasksPerDay tasks per technician
+                model.addConstr(gp.quicksum(s[i, j] for i in eligible[j]) <= 1, f"route_start_{j}")
+                model.addConstr(gp.quicksum(a[i, j] for i in eligible[j]) <= tech.maxTasksPerDay, f"capacity_{j}")
+                cap = min(tech.maxTasksPerDay, len(eligible[j]))
+            
+                for i in eligible[j]:
+                    # Flow: an assigned task is entered exactly once and left at most once
+                    model.addConstr(
+                        s[i, j] + gp.quicksum(x[i2, i, j] for i2 in eligible[j] if i2 != i) == a[i, j],
+                        f"flow_in_{i}_{j}"
                     )
-                    routes.append(route)
-        
-        return routes
-        
+                    model.addConstr(
+                        gp.quicksum(x[i, i2, j] for i2 in eligible[j] if i2 != i) <= a[i, j],
+                        f"flow_out_{i}_{j}"
+                    )
+                    # MTZ subtour elimination
+                    for i2 in eligible[j]:
+                        if i2 != i:
+                            model.addConstr(
+                                u[i2, j] >= u[i, j] + 1 - cap * (1 - x[i, i2, j]),
+                                f"mtz_{i}_{i2}_{j}"
+                            )
+            
+            s_keys, x_keys = list(s.keys()), list(x.keys())
+            solution_vars = list(s.values()) + list(x.values())
+            
+            def decode(values) -> List[List[int]]:
+                """Follow the arcs from the first task of each technician"""
+                first, successor = {}, {}
+                for (i, j), v in zip(s_keys, values):
+                    if v > 0.5:
+                        first[j] = i
+                for (i, i2, j), v in zip(x_keys, values[len(s_keys):]):
+                    if v > 0.5:
+                        successor[i, j] = i2
+                orders = []
+                for j in range(n_techs):
+                    order = []
+                    current = first.get(j)
+                    while current is not None and current not in order:
+                        order.append(current)
+                        current = successor.get((current, j))
+                    orders.append(order)
+                return orders
+            
+            def summarize(values) -> List[dict]:
+                return route_summaries(available_techs, tasks, decode(values), tech_task_dist, task_task_dist)
+            
+            start_kind = None
+            if warm_start:
+                start_kind = "saved" if start_routes else "greedy"
+                start = warm_start_orders(available_techs, tasks, tech_task_dist, task_task_dist, start_routes)
+                binaries = list(a.values()) + solution_vars
+                model.setAttr("Start", binaries, [0.0] * len(binaries))
+                model.setAttr("Start", list(u.values()), [1.0] * len(u))
+                for j, order in enumerate(start):
+                    for rank, i in enumerate(order):
+                        a[i, j].Start = 1.0
+                        u[i, j].Start = rank + 1
+                        if rank == 0:
+                            s[i, j].Start = 1.0
+                        else:
+                            x[order[rank - 1], i, j].Start = 1.0
+                print(f"[GUROBI-ARC] MIP start ({start_kind}): {sum(len(o) for o in start)} tasks")
+            
+            timings = {}
+            model.optimize(monitor_callback(monitor, time_limit, solution_vars, summarize, timings))
+            record_gurobi_stats(model, stats, "arc", timings, start_kind)
+            print(f"[GUROBI-ARC] Model status: {model.status}")
+            levels = multiobjective_levels(model) if lexicographic else None
+            if levels:
+                for level in levels:
+                    print(f"[GUROBI-ARC] Level {level['name']}: {level['value']} (gap {level['gap']}) in {level['time']:.2f}s")
+            
+            if model.SolCount == 0:
+                print("[GUROBI-ARC] No solution found (using greedy fallback)")
+                return optimize_routes_greedy(technicians, tasks, stats)
+            
+            routes = []
+            if model.status in (GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED):
+                orders = decode(model.getAttr("X", solution_vars))
+                for j, order in enumerate(orders):
+                    if order:
+                        routes.append(build_route(available_techs[j], order, tasks, tech_task_dist[j], task_task_dist))
+            if levels:
+                record_levels(stats, levels, available_techs, routes)
+            
+            return routes
+    
     except gp.GurobiError as e:
         print(f"Gurobi error (using greedy fallback): {e}")
-        # Fallback to greedy algorithm if Gurobi fails
-        return optimize_routes_greedy(technicians, tasks)
+        return optimize_routes_greedy(technicians, tasks, stats)
     except Exception as e:
         print(f"Optimization error (using greedy fallback): {e}")
         import traceback
         traceback.print_exc()
-        return optimize_routes_greedy(technicians, tasks)
+        return optimize_routes_greedy(technicians, tasks, stats)
+
+class StopOnlyMonitor(SolveMonitor):
+    """Forwards cancellation to a sub-solve without its progress or partial incumbents"""
+    def __init__(self, monitor: Optional[SolveMonitor]):
+        self.monitor = monitor
+    
+    def should_stop(self) -> bool:
+        return self.monitor is not None and self.monitor.should_stop()
+
+def skill_components(technicians: List[Technician], tasks: List[Task]) -> List[Tuple[List[Technician], List[Task]]]:
+    """
+    Connected components of the technician-task compatibility graph (requiredSkill in skills).
+    No assignment crosses two components, so solving them separately gives the same optimum.
+    Tasks that no technician can do are left out.
+    """
+    parent = list(range(len(technicians)))
+    
+    def find(j):
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        return j
+    
+    # Technicians sharing a skill are linked through the first owner of that skill
+    skill_owner = {}
+    for j, tech in enumerate(technicians):
+        for skill in tech.skills:
+            if skill in skill_owner:
+                parent[find(j)] = find(skill_owner[skill])
+            else:
+                skill_owner[skill] = j
+    
+    groups: Dict[int, Tuple[List[Technician], List[Task]]] = {}
+    for j, tech in enumerate(technicians):
+        groups.setdefault(find(j), ([], []))[0].append(tech)
+    for task in tasks:
+        owner = skill_owner.get(task.requiredSkill)
+        if owner is not None:
+            groups[find(owner)][1].append(task)
+    return [group for group in groups.values() if group[1]]
+
+def _solve_component(solver: Callable, technicians: List[Technician], tasks: List[Task], time_limit: float,
+                     monitor: Optional[SolveMonitor], warm_start: bool,
+                     start_routes: Optional[List[dict]], threads: Optional[int] = None
+                     ) -> Tuple[List[TechnicianRoute], dict]:
+    """Solve one subproblem with its own stats (runs on a thread of solve_subproblems)"""
+    stats = {}
+    routes = solver(technicians, tasks, stats, time_limit=time_limit, monitor=monitor,
+                    warm_start=warm_start, start_routes=start_routes, threads=threads)
+    return routes, stats
+
+def _sum_known(values) -> Optional[int]:
+    known = [v for v in values if v is not None]
+    return sum(known) if known else None
+
+def _round_known(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+def merge_subproblem_stats(all_stats: List[dict], wall_time: float) -> dict:
+    """Combine the stats of independent sub-models into the stats of the whole plan"""
+    statuses = {st.get("status") for st in all_stats}
+    if statuses == {"optimal"}:
+        status = "optimal"
+    else:
+        status = next((s for s in ("interrupted", "time_limit", "heuristic") if s in statuses), None)
+    objectives = [st.get("objective") for st in all_stats]
+    gaps = [st.get("gap") for st in all_stats]
+    first_incumbents = [st["timeToFirstIncumbent"] for st in all_stats if "timeToFirstIncumbent" in st]
+    return {
+        "engine": all_stats[0].get("engine"),
+        "formulation": all_stats[0].get("formulation"),
+        "status": status,
+        "objective": round(sum(objectives), 4) if None not in objectives else None,
+        # The gap of the sum is at most the largest gap of its parts
+        "gap": max(gaps) if None not in gaps else None,
+        "solveTime": round(wall_time, 3),
+        "buildTime": _round_known(_sum_known(st.get("buildTime") for st in all_stats)),
+        "extractTime": _round_known(_sum_known(st.get("extractTime") for st in all_stats)),
+        "numVars": _sum_known(st.get("numVars") for st in all_stats),
+        "numConstrs": _sum_known(st.get("numConstrs") for st in all_stats),
+        "warmStart": all_stats[0].get("warmStart"),
+        "timeToFirstIncumbent": max(first_incumbents) if first_incumbents else None,
+        "objectiveMode": all_stats[0].get("objectiveMode"),
+        "pruned": any(st.get("pruned") for st in all_stats) or None,
+        "levels": merge_levels([st.get("levels") for st in all_stats])
+    }
+
+def merge_levels(all_levels: List[Optional[List[dict]]]) -> Optional[List[dict]]:
+    """Levels of the whole plan: values and bounds add up, gaps and times are the worst part's"""
+    if not all_levels or None in all_levels:
+        return None
+    merged = []
+    for name in OBJECTIVE_LEVELS:
+        parts = [level for levels in all_levels for level in levels if level["name"] == name]
+        if len(parts) < len(all_levels):
+            break
+        values, bounds, gaps = ([part[key] for part in parts] for key in ("value", "bound", "gap"))
+        statuses = {part["status"] for part in parts}
+        merged.append({
+            "name": name,
+            "value": round(sum(values), 4) if None not in values else None,
+            "bound": round(sum(bounds), 4) if None not in bounds else None,
+            "gap": max(gaps) if None not in gaps else None,
+            "time": max(part["time"] for part in parts),
+            "status": statuses.pop() if len(statuses) == 1 else "time_limit"
+        })
+    return merged
+
+def solve_subproblems(subproblems: List[Tuple[List[Technician], List[Task]]], solver: Callable,
+                      time_limit: float, monitor: Optional[SolveMonitor], warm_start: bool,
+                      start_routes: Optional[List[dict]], max_workers: Optional[int] = None,
+                      phase: str = "components") -> List[Tuple[List[TechnicianRoute], dict]]:
+    """
+    Solve independent subproblems concurrently, each with its own time budget. Solves run
+    on threads (Gurobi releases the GIL while it optimizes), each on its own environment
+    of this process's pool with an equal part of the job's Gurobi threads. With more
+    subproblems than workers, the time limit is shared so the wall time stays within it.
+    """
+    pool = get_pool()
+    cores = pool.threads or os.cpu_count() or 1
+    workers = max(1, min(len(subproblems), max_workers or cores, pool.size))
+    threads = max(1, cores // workers)
+    sub_limit = time_limit if len(subproblems) <= workers else max(1.0, time_limit * workers / len(subproblems))
+    sizes = ", ".join(f"{len(te)}x{len(ta)}" for te, ta in subproblems)
+    print(f"[DECOMPOSE] {len(subproblems)} {phase} (techs x tasks: {sizes}), {sub_limit:.1f}s each "
+          f"on {workers} workers x {threads} threads")
+    
+    sub_monitor = StopOnlyMonitor(monitor)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_solve_component, solver, sub_techs, sub_tasks, sub_limit,
+                            sub_monitor, warm_start, start_routes, threads)
+            for sub_techs, sub_tasks in subproblems
+        ]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            if monitor is not None:
+                monitor.progress(1 - len(pending) / len(futures), phase)
+        return [future.result() for future in futures]
+
+def _report_merged(monitor: Optional[SolveMonitor], objective: Optional[float], routes: List[TechnicianRoute]):
+    if monitor is not None and objective is not None:
+        monitor.incumbent(objective, [
+            {"technicianId": route.technicianId, "taskIds": [t.id for t in route.tasks],
+             "totalDistance": route.totalDistance}
+            for route in routes
+        ])
+
+def optimize_routes_by_components(technicians: List[Technician], tasks: List[Task],
+                                  stats: Optional[dict] = None, time_limit: float = 30,
+                                  monitor: Optional[SolveMonitor] = None,
+                                  solver: Callable = optimize_routes_with_gurobi, warm_start: bool = True,
+                                  start_routes: Optional[List[dict]] = None,
+                                  max_workers: Optional[int] = None) -> List[TechnicianRoute]:
+    """
+    Split the problem into skill components and solve each with its own Gurobi model,
+    concurrently (see solve_subproblems), then merge the routes.
+    """
+    available_techs = [t for t in technicians if t.available]
+    components = skill_components(available_techs, tasks)
+    if len(components) <= 1:
+        return solver(technicians, tasks, stats, time_limit=time_limit, monitor=monitor,
+                      warm_start=warm_start, start_routes=start_routes)
+    
+    start_time = time.perf_counter()
+    results = solve_subproblems(components, solver, time_limit, monitor, warm_start, start_routes,
+                                max_workers, "skill components")
+    
+    routes = [route for comp_routes, _ in results for route in comp_routes]
+    merged = merge_subproblem_stats([comp_stats for _, comp_stats in results], time.perf_counter() - start_time)
+    merged["components"] = len(components)
+    print(f"[DECOMPOSE] Merged {len(routes)} routes, status {merged['status']}, objective {merged['objective']}")
+    if stats is not None:
+        stats.clear()
+        stats.update(merged)
+    _report_merged(monitor, merged["objective"], routes)
+    return routes
+
+TECHS_PER_CLUSTER = 8  # technicians per geographic cluster
+NEIGHBOUR_CLUSTERS = 2  # boundary repair looks at the nearest clusters of each cluster
+BOUNDARY_REPAIR_SHARE = 0.1  # share of the time limit kept for boundary repair
+
+def _kmeans(points: np.ndarray, k: int, seed: int = 0, iterations: int = 25) -> Tuple[np.ndarray, np.ndarray]:
+    """Lloyd's k-means with k-means++ seeding on (n, 2) planar points. Returns (centers, labels)."""
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        d2 = ((points[:, None, :] - np.array(centers)[None]) ** 2).sum(axis=2).min(axis=1)
+        total = d2.sum()
+        centers.append(points[rng.choice(len(points), p=d2 / total)] if total > 0 else points[rng.integers(len(points))])
+    centers = np.array(centers)
+    
+    for _ in range(iterations):
+        labels = ((points[:, None, :] - centers[None]) ** 2).sum(axis=2).argmin(axis=1)
+        updated = np.array([points[labels == c].mean(axis=0) if (labels == c).any() else centers[c] for c in range(k)])
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    labels = ((points[:, None, :] - centers[None]) ** 2).sum(axis=2).argmin(axis=1)
+    return centers, labels
+
+def geographic_clusters(technicians: List[Technician], tasks: List[Task], techs_per_cluster: int = TECHS_PER_CLUSTER,
+                        seed: int = 0) -> Tuple[List[Tuple[List[Technician], List[Task]]], np.ndarray]:
+    """
+    Cluster-first partition: k-means on technician locations, then every task goes to the
+    nearest cluster that has its skill and capacity left for it (high priority first).
+    Tasks go to the nearest cluster with the skill when all are full; tasks nobody can do
+    are left out. Returns the (technicians, tasks) of each cluster and the cluster centers.
+    """
+    k = max(1, math.ceil(len(technicians) / techs_per_cluster))
+    # Equirectangular projection: good enough at city scale
+    cos_lat = math.cos(math.radians(float(location_array(technicians)[:, 0].mean())))
+    scale = np.array([1.0, cos_lat])
+    centers, labels = _kmeans(location_array(technicians) * scale, k, seed)
+    
+    cluster_techs: List[List[Technician]] = [[] for _ in range(k)]
+    for tech, label in zip(technicians, labels):
+        cluster_techs[label].append(tech)
+    
+    # Remaining capacity per cluster, overall and per skill
+    capacity = np.array([sum(t.maxTasksPerDay for t in techs) for techs in cluster_techs])
+    skill_capacity: Dict[str, np.ndarray] = {}
+    for c, techs in enumerate(cluster_techs):
+        for tech in techs:
+            for skill in tech.skills:
+                skill_capacity.setdefault(skill, np.zeros(k, dtype=int))[c] += tech.maxTasksPerDay
+    has_skill = {skill: cap > 0 for skill, cap in skill_capacity.items()}
+    
+    task_points = location_array(tasks) * scale
+    task_center_dist = ((task_points[:, None, :] - centers[None]) ** 2).sum(axis=2)
+    order = sorted(range(len(tasks)),
+                   key=lambda i: (-PRIORITY_WEIGHT[tasks[i].priority], task_center_dist[i].min()))
+    
+    cluster_tasks: List[List[Task]] = [[] for _ in range(k)]
+    for i in order:
+        skill_cap = skill_capacity.get(tasks[i].requiredSkill)
+        if skill_cap is None:
+            continue
+        nearest = np.argsort(task_center_dist[i])
+        with_skill = nearest[has_skill[tasks[i].requiredSkill][nearest]]
+        target = next((c for c in with_skill if skill_cap[c] > 0 and capacity[c] > 0), with_skill[0])
+        cluster_tasks[target].append(tasks[i])
+        skill_cap[target] -= 1
+        capacity[target] -= 1
+    
+    clusters = [(cluster_techs[c], cluster_tasks[c]) for c in range(k)]
+    return clusters, centers
 
-def optimize_routes_greedy(technicians: List[Technician], tasks: List[Task]) -> List[TechnicianRoute]:
+def boundary_repair(clusters: List[Tuple[List[Technician], List[Task]]], centers: np.ndarray,
+                    routes: List[TechnicianRoute], time_limit: float,
+                    monitor: Optional[SolveMonitor] = None) -> Tuple[List[TechnicianRoute], dict]:
     """
-    Fallback greedy algorithm for route optimization
+    Move tasks across neighbouring clusters after the per-cluster solves: unassigned tasks
+    are inserted into the routes of their cluster or its nearest clusters (any cluster as a
+    last resort), then local search
+    runs on each pair of neighbouring clusters so relocate/swap moves can cross the boundary.
+    """
+    start_time = time.perf_counter()
+    technicians = [tech for techs, _ in clusters for tech in techs]
+    tech_by_id = {tech.id: tech for tech in technicians}
+    task_by_id = {task.id: task for _, cluster_tasks in clusters for task in cluster_tasks}
+    
+    plan: Dict[str, List[Task]] = {tech.id: [] for tech in technicians}
+    for route in routes:
+        plan[route.technicianId] = [task_by_id[t.id] for t in route.tasks]
+    
+    k = len(clusters)
+    n_neighbours = min(NEIGHBOUR_CLUSTERS, k - 1)
+    center_dist = ((centers[:, None, :] - centers[None]) ** 2).sum(axis=2)
+    np.fill_diagonal(center_dist, np.inf)
+    neighbours = np.argsort(center_dist, axis=1)[:, :n_neighbours]
+    
+    # Unassigned tasks: cheapest insertion within their cluster and its neighbours
+    planned = {task.id for route_tasks in plan.values() for task in route_tasks}
+    inserted = 0
+    for c, (_, cluster_tasks) in enumerate(clusters):
+        area = [c] + [int(n) for n in neighbours[c]]
+        area_plan = {tech.id: plan[tech.id] for a in area for tech in clusters[a][0]}
+        missing = [task for task in cluster_tasks if task.id not in planned]
+        missing.sort(key=lambda task: PRIORITY_WEIGHT[task.priority], reverse=True)
+        for task in missing:
+            # Nearest clusters first, then any technician with the skill and capacity left
+            insertion = best_insertion(task, area_plan, tech_by_id) or best_insertion(task, plan, tech_by_id)
+            if insertion is not None:
+                tech_id, position, _ = insertion
+                plan[tech_id].insert(position, task)
+                inserted += 1
+    
+    # Local search on each pair of neighbouring clusters
+    pairs = sorted({tuple(sorted((c, int(n)))) for c in range(k) for n in neighbours[c]})
+    pair_limit = time_limit / max(len(pairs), 1)
+    moves, rebuilt = 0, {}
+    for a, b in pairs:
+        if monitor is not None and monitor.should_stop():
+            break
+        pair_techs = [tech.id for tech in clusters[a][0] + clusters[b][0]]
+        pair_moves, pair_routes = repair_routes(plan, tech_by_id, pair_techs, pair_limit)
+        moves += pair_moves
+        for tech_id in pair_techs:
+            rebuilt.pop(tech_id, None)
+        rebuilt.update(pair_routes)
+    
+    # Routes changed by an insertion but not covered by a pair (e.g. stopped early)
+    original = {route.technicianId: route for route in routes}
+    changed = [
+        tech_id for tech_id, route_tasks in plan.items()
+        if route_tasks and tech_id not in rebuilt
+        and (tech_id not in original or [t.id for t in route_tasks] != [t.id for t in original[tech_id].tasks])
+    ]
+    rebuilt.update(repair_routes(plan, tech_by_id, changed, 0.0)[1])
+    
+    repaired = []
+    for tech in technicians:
+        if tech.id in rebuilt:
+            repaired.append(TechnicianRoute(**rebuilt[tech.id]))
+        elif plan[tech.id] and tech.id in original:
+            repaired.append(original[tech.id])
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"[DECOMPOSE] Boundary repair: {inserted} tasks inserted, {moves} moves on {len(pairs)} cluster pairs "
+          f"in {elapsed:.2f}s")
+    return repaired, {"inserted": inserted, "moves": moves, "pairs": len(pairs), "time": round(elapsed, 3)}
+
+def optimize_routes_clustered(technicians: List[Technician], tasks: List[Task],
+                              stats: Optional[dict] = None, time_limit: float = 30,
+                              monitor: Optional[SolveMonitor] = None,
+                              solver: Callable = optimize_routes_with_gurobi_arc, warm_start: bool = True,
+                              start_routes: Optional[List[dict]] = None,
+                              techs_per_cluster: int = TECHS_PER_CLUSTER,
+                              max_workers: Optional[int] = None) -> List[TechnicianRoute]:
+    """
+    Cluster-first, route-second mode for large fleets: geographic clusters are solved
+    concurrently with a per-cluster time budget, then a boundary repair moves tasks
+    between neighbouring clusters.
+    """
+    available_techs = [t for t in technicians if t.available]
+    if not available_techs or not tasks:
+        return []
+    if len(available_techs) <= techs_per_cluster:
+        return solver(technicians, tasks, stats, time_limit=time_limit, monitor=monitor,
+                      warm_start=warm_start, start_routes=start_routes)
+    
+    start_time = time.perf_counter()
+    clusters, centers = geographic_clusters(available_techs, tasks, techs_per_cluster)
+    subproblems = [(techs, cluster_tasks) for techs, cluster_tasks in clusters if techs and cluster_tasks]
+    repair_time = max(1.0, BOUNDARY_REPAIR_SHARE * time_limit)
+    results = solve_subproblems(subproblems, solver, max(1.0, time_limit - repair_time), monitor, warm_start,
+                                start_routes, max_workers, "geographic clusters")
+    
+    routes = [route for cluster_routes, _ in results for route in cluster_routes]
+    if monitor is not None:
+        monitor.progress(1.0, "boundary_repair")
+    routes, repair_report = boundary_repair(clusters, centers, routes, repair_time, monitor)
+    
+    merged = merge_subproblem_stats([cluster_stats for _, cluster_stats in results], time.perf_counter() - start_time)
+    # The repair changed the plan: objective of the final routes, no gap for the whole problem
+    merged["objective"] = round(plan_objective(available_techs, routes), 4)
+    merged["gap"] = None
+    for level in merged["levels"] or []:
+        level["gap"] = None
+    merged["clusters"] = len(subproblems)
+    merged["boundaryRepair"] = repair_report
+    print(f"[DECOMPOSE] {len(subproblems)} clusters merged into {len(routes)} routes in {merged['solveTime']:.2f}s")
+    if stats is not None:
+        stats.clear()
+        stats.update(merged)
+    _report_merged(monitor, merged["objective"], routes)
+    return routes
+
+def optimize_routes_greedy(technicians: List[Technician], tasks: List[Task],
+                           stats: Optional[dict] = None) -> List[TechnicianRoute]:
+    """
+    Fallback greedy algorithm for route optimization. It uses a spatial index instead
+    of distance matrices, so it scales to tens of thousands of tasks.
     """
     print(f"[GREEDY] Starting with {len(technicians)} technicians and {len(tasks)} tasks")
+    start_time = time.perf_counter()
     routes = []
     available_techs = [t for t in technicians if t.available]
     
@@ -241,79 +872,94 @@ def optimize_routes_greedy(technicians: List[Technician], tasks: List[Task]) ->
         print(f"[GREEDY] No available techs or tasks - returning empty")
         return []
     
+    orders = greedy_orders(available_techs, tasks)
+    
+    print(f"[GREEDY] Creating routes...")
+    for j, tech in enumerate(available_techs):
+        if orders[j]:
+            routes.append(build_route(tech, orders[j], tasks))
+    
+    if stats is not None:
+        # Replaces the stats of a failed Gurobi run when used as fallback
+        stats.clear()
+        stats.update(engine="greedy", status="heuristic",
+                     solveTime=round(time.perf_counter() - start_time, 3))
+    
+    print(f"[GREEDY] Completed! Generated {len(routes)} routes in {time.perf_counter() - start_time:.3f}s")
+    return routes
+
+def greedy_orders(technicians: List[Technician], tasks: List[Task], tech_task_dist: Optional[np.ndarray] = None,
+                  task_task_dist: Optional[np.ndarray] = None,
+                  initial: Optional[List[List[int]]] = None) -> List[List[int]]:
+    """
+    Greedy plan as task indices per technician: tasks by priority to the nearest qualified
+    technician with remaining capacity, then nearest neighbour order. Tasks already in
+    initial keep their place; the others are appended after them.
+    The nearest technician comes from a per-skill grid index of the technicians that still
+    have room; the distance matrices, when given, are only used to order each route.
+    """
+    planned = [list(order) for order in initial] if initial else [[] for _ in technicians]
+    already_planned = {i for order in planned for i in order}
+    load = [len(order) for order in planned]
+    
     # Sort tasks by priority
     priority_map = {"high": 3, "medium": 2, "low": 1}
-    sorted_tasks = sorted(tasks, key=lambda t: priority_map[t.priority], reverse=True)
+    sorted_idx = sorted(range(len(tasks)), key=lambda i: priority_map[tasks[i].priority], reverse=True)
+    
+    task_coords = location_array(tasks)
+    tech_coords = location_array(technicians)
+    ref_lat = float(task_coords[:, 0].mean()) if len(tasks) else 0.0
+    task_xy = project(task_coords, ref_lat).tolist()
+    
+    # One index per skill over the technicians with remaining capacity
+    skill_techs: Dict[str, List[int]] = {}
+    for j, tech in enumerate(technicians):
+        if load[j] < tech.maxTasksPerDay:
+            for skill in set(tech.skills):
+                skill_techs.setdefault(skill, []).append(j)
+    tech_xy = project(tech_coords, ref_lat)
+    indexes = {skill: GridIndex(tech_xy[techs], techs) for skill, techs in skill_techs.items()}
     
     # Assign tasks to technicians
-    tech_tasks: Dict[str, List[Task]] = {tech.id: [] for tech in available_techs}
-    
-    for task in sorted_tasks:
-        print(f"[GREEDY] Assigning task '{task.title}' (skill: {task.requiredSkill})")
-        # Find qualified technicians sorted by distance
-        qualified = [
-            (tech, calculate_distance(tech.location, task.location))
-            for tech in available_techs
-            if task.requiredSkill in tech.skills and len(tech_tasks[tech.id]) < tech.maxTasksPerDay
-        ]
-        
-        print(f"[GREEDY] Found {len(qualified)} qualified technicians for this task")
-        if qualified:
-            qualified.sort(key=lambda x: x[1])
-            assigned_tech = qualified[0][0]
-            tech_tasks[assigned_tech.id].append(task)
-            print(f"[GREEDY] Assigned to {assigned_tech.name}")
-    
-    # Optimize route for each technician using nearest neighbor
-    print(f"[GREEDY] Creating routes...")
-    for tech in available_techs:
-        if not tech_tasks[tech.id]:
-            print(f"[GREEDY] No tasks for {tech.name}")
+    tech_tasks: List[List[int]] = [[] for _ in technicians]
+    
+    for i in sorted_idx:
+        if i in already_planned:
             continue
-        print(f"[GREEDY] Creating route for {tech.name} with {len(tech_tasks[tech.id])} tasks")
+        task = tasks[i]
+        index = indexes.get(task.requiredSkill)
+        best_j = index.nearest(*task_xy[i]) if index is not None else None
         
-        # Nearest neighbor optimization
-        route_tasks = []
-        remaining = tech_tasks[tech.id].copy()
-        current_loc = tech.location
+        if best_j is None:
+            print(f"[GREEDY] No qualified technician left for task '{task.title}' (skill: {task.requiredSkill})")
+            continue
+        tech_tasks[best_j].append(i)
+        load[best_j] += 1
+        if load[best_j] >= technicians[best_j].maxTasksPerDay:
+            for skill in set(technicians[best_j].skills):
+                indexes[skill].remove(best_j)
+    
+    # Order the new tasks of each technician using nearest neighbor, on the distances
+    # between the route's own stops (routes are capped by maxTasksPerDay)
+    for j in range(len(technicians)):
+        if not tech_tasks[j]:
+            continue
+        new = np.array(tech_tasks[j], dtype=int)
+        order = planned[j]
+        if task_task_dist is not None:
+            between = task_task_dist[np.ix_(new, new)]
+            current_dist = task_task_dist[order[-1], new] if order else tech_task_dist[j, new]
+        else:
+            between = haversine_matrix(task_coords[new], task_coords[new])
+            start = task_coords[order[-1]] if order else tech_coords[j]
+            current_dist = haversine_matrix(start[None, :], task_coords[new])[0]
         
+        between, current_dist = between.tolist(), current_dist.tolist()
+        remaining = list(range(len(new)))
         while remaining:
-            # Find nearest task
-            nearest_idx = 0
-            min_dist = calculate_distance(current_loc, remaining[0].location)
-            
-            for i in range(1, len(remaining)):
-                dist = calculate_distance(current_loc, remaining[i].location)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_idx = i
-            
-            task = remaining.pop(nearest_idx)
-            optimized_task = OptimizedTask(
-                id=task.id,
-                title=task.title,
-                description=task.description,
-                requiredSkill=task.requiredSkill,
-                priority=task.priority,
-                duration=task.duration,
-                location=task.location,
-                distanceFromPrevious=round(min_dist, 2)
-            )
-            route_tasks.append(optimized_task)
-            current_loc = task.location
-        
-        total_distance = sum(t.distanceFromPrevious for t in route_tasks if t.distanceFromPrevious)
-        total_duration = sum(t.duration for t in route_tasks)
-        
-        route = TechnicianRoute(
-            technicianId=tech.id,
-            technicianName=tech.name,
-            tasks=route_tasks,
-            totalDistance=round(total_distance, 2),
-            totalDuration=total_duration,
-            taskCount=len(route_tasks)
-        )
-        routes.append(route)
-    
-    print(f"[GREEDY] Completed! Generated {len(routes)} routes")
-    return routes
\ No newline at end of file
+            k = min(remaining, key=current_dist.__getitem__)
+            remaining.remove(k)
+            order.append(int(new[k]))
+            current_dist = between[k]
+    
+    return planned
@@ -0,0 +1,67 @@
+"""
+Helpers for list endpoints: keyset pagination, field projection and ETags.
+
+A page holds at most `limit` items; when more may follow, the X-Next-Cursor header
+carries the id of the last item, to be sent back as `cursor`. `fields` is a comma
+separated list of top-level fields to return (the id is always included).
+The ETag is the store's change version: any write changes it, so a client sending
+it back in If-None-Match gets 304 Not Modified until something changes.
+"""
+from typing import Any, Iterable, List, Optional, Set, Tuple
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from data import storage
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 5000
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[Set[str]]:
+    """Validated set of requested fields, or None for all of them"""
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested | {"id"}
+
+def check_etag(request: Request) -> Tuple[str, Optional[Response]]:
+    """
+    Current ETag, and a 304 response if the client already has it. Read the ETag
+    before the data: a write in between only makes the data newer than its tag.
+    """
+    etag = f'W/"{storage.get_epoch()}-{storage.get_version()}"'
+    sent = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in sent or "*" in sent:
+        return etag, Response(status_code=304, headers={"ETag": etag})
+    return etag, None
+
+def list_response(items: List[Any], fields: Optional[Set[str]] = None, limit: Optional[int] = None,
+                  etag: Optional[str] = None) -> JSONResponse:
+    """
+    JSON response for already-validated items (models or dicts), projected on fields.
+    With a limit, items holds up to limit + 1 entries; the extra one only signals a next page.
+    """
+    headers = {"ETag": etag} if etag else {}
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        headers[NEXT_CURSOR_HEADER] = _get_id(items[-1])
+    return JSONResponse(content=project(items, fields), headers=headers)
+
+def item_response(item: Any, fields: Optional[Set[str]] = None, etag: Optional[str] = None) -> JSONResponse:
+    return JSONResponse(content=_project(item, fields), headers={"ETag": etag} if etag else {})
+
+def project(items: List[Any], fields: Optional[Set[str]] = None) -> List[Any]:
+    """JSON-ready copies of already-validated items (models or dicts), restricted to fields"""
+    return [_project(item, fields) for item in items]
+
+def _get_id(item: Any) -> str:
+    return item["id"] if isinstance(item, dict) else item.id
+
+def _project(item: Any, fields: Optional[Set[str]]) -> Any:
+    if hasattr(item, "model_dump"):
+        return item.model_dump(mode="json", include=fields)
+    if fields is not None:
+        item = {key: value for key, value in item.items() if key in fields}
+    return jsonable_encoder(item)
@@ -0,0 +1,296 @@
+"""
+Problem-size reductions applied before building the position MILP.
+
+1. Tasks that no available technician can perform are dropped.
+2. Positions of a technician are capped at min(maxTasksPerDay, eligible tasks).
+3. Technicians with identical skills, capacity and location form symmetric classes:
+   loads are ordered inside a class, so member t (0-based) holds at most
+   eligible // (t + 1) tasks and members beyond the number of eligible tasks get no
+   variables at all. Any plan can be permuted within the class to respect the order.
+4. Consecutive-position terms are only kept between nearby tasks (k nearest
+   neighbours, or within a radius); a task may then only follow one of its kept
+   predecessors. This one is a heuristic restriction, off by default (neighbours and
+   radius_km are None); the others keep the optimum. A pruned model's optimum is
+   reported with status "heuristic".
+
+Each reduction logs the variable and objective term counts before and after it.
+PositionLayout then lays the reduced model out as index arrays for Gurobi's matrix API.
+"""
+from typing import List, Dict, Optional, Tuple, FrozenSet
+import numpy as np
+from scipy import sparse
+from gurobipy import GRB
+from models import Technician, Task
+from utils.routing import build_distance_matrices
+
+PRESOLVE_NEIGHBOURS = None    # consecutive tasks must be among each other's k nearest (None keeps every pair)
+PRESOLVE_RADIUS_KM = None     # or: consecutive tasks must be within this distance (None: no radius rule)
+
+class PresolvedModel:
+    """
+    Reduced position model. Task indices refer to self.tasks (the kept tasks),
+    technician indices to the technicians passed in.
+    """
+    def __init__(self, technicians: List[Technician], tasks: List[Task],
+                 neighbours: Optional[int] = PRESOLVE_NEIGHBOURS,
+                 radius_km: Optional[float] = PRESOLVE_RADIUS_KM):
+        self.technicians = technicians
+        skill_sets = [frozenset(tech.skills) for tech in technicians]
+        all_skills = frozenset().union(*skill_sets)
+
+        # Before any reduction: every task, every position, every pair
+        eligible_counts = [sum(1 for t in tasks if t.requiredSkill in skills) for skills in skill_sets]
+        positions = [tech.maxTasksPerDay for tech in technicians]
+        before = _model_size(eligible_counts, positions, [n * (n - 1) for n in eligible_counts])
+
+        # 1. Tasks no available technician can perform
+        self.tasks = [t for t in tasks if t.requiredSkill in all_skills]
+        self.tech_task_dist, self.task_task_dist = build_distance_matrices(technicians, self.tasks)
+        skills_of_task = np.array([t.requiredSkill for t in self.tasks], dtype=object)
+        by_skills: Dict[FrozenSet[str], List[int]] = {}
+        for skills in set(skill_sets):
+            by_skills[skills] = np.flatnonzero(np.isin(skills_of_task, list(skills))).tolist()
+        self.eligible = [by_skills[skills] for skills in skill_sets]
+        pairs = [len(e) * (len(e) - 1) for e in self.eligible]
+        after = _model_size([len(e) for e in self.eligible], positions, pairs)
+        _log(f"drop {len(tasks) - len(self.tasks)} tasks no technician can perform", before, after)
+
+        # 2. Positions capped by the number of eligible tasks
+        before = after
+        self.positions = [min(p, len(e)) for p, e in zip(positions, self.eligible)]
+        after = _model_size([len(e) for e in self.eligible], self.positions, pairs)
+        _log("cap positions at eligible tasks", before, after)
+
+        # 3. Symmetric technician classes
+        before = after
+        groups: Dict[tuple, List[int]] = {}
+        for j, tech in enumerate(technicians):
+            key = (skill_sets[j], tech.maxTasksPerDay, tech.location.lat, tech.location.lng)
+            groups.setdefault(key, []).append(j)
+        self.classes = [members for members in groups.values() if len(members) > 1]
+        for members in self.classes:
+            for t, j in enumerate(members):
+                self.positions[j] = min(self.positions[j], len(self.eligible[j]) // (t + 1))
+        for j, p in enumerate(self.positions):
+            if p == 0:
+                self.eligible[j] = []
+        pairs = [len(e) * (len(e) - 1) for e in self.eligible]
+        after = _model_size([len(e) for e in self.eligible], self.positions, pairs)
+        _log(f"{len(self.classes)} symmetric classes of {sum(len(m) for m in self.classes)} technicians",
+             before, after)
+
+        # 4. Consecutive pairs limited to nearby tasks
+        before = after
+        self.predecessors: Dict[FrozenSet[str], Optional[Dict[int, List[int]]]] = {}
+        for skills, members in by_skills.items():
+            self.predecessors[skills] = self._nearby_predecessors(members, neighbours, radius_km)
+        self.skill_sets = skill_sets
+        pairs = [
+            len(e) * (len(e) - 1) if self.predecessors_of(j) is None
+            else sum(len(self.predecessors_of(j)[i]) for i in e)
+            for j, e in enumerate(self.eligible)
+        ]
+        after = _model_size([len(e) for e in self.eligible], self.positions, pairs)
+        rule = " or ".join(filter(None, [f"{neighbours} nearest" if neighbours else None,
+                                         f"within {radius_km} km" if radius_km else None])) or "all pairs"
+        _log(f"consecutive tasks {rule}", before, after)
+
+    def _nearby_predecessors(self, members: List[int], neighbours: Optional[int],
+                             radius_km: Optional[float]) -> Optional[Dict[int, List[int]]]:
+        """Allowed predecessors of each task among members, or None when every pair is kept"""
+        n = len(members)
+        if n < 2 or ((not neighbours or neighbours >= n - 1) and radius_km is None):
+            return None
+        idx = np.array(members)
+        dist = self.task_task_dist[np.ix_(idx, idx)]
+        keep = np.zeros((n, n), dtype=bool)
+        if neighbours:
+            k = min(neighbours, n - 1)
+            masked = dist + np.diag(np.full(n, np.inf))
+            nearest = np.argpartition(masked, k - 1, axis=1)[:, :k]
+            keep[np.repeat(np.arange(n), k), nearest.ravel()] = True
+            keep |= keep.T  # a pair is kept when either task is among the other's nearest
+        if radius_km is not None:
+            keep |= dist <= radius_km
+        np.fill_diagonal(keep, False)
+        return {members[a]: idx[np.flatnonzero(keep[:, a])].tolist() for a in range(n)}
+
+    @property
+    def pruned(self) -> bool:
+        """Whether reduction 4 removed pairs (the model's optimum may then miss the true one)"""
+        return any(predecessors is not None for predecessors in self.predecessors.values())
+
+    def predecessors_of(self, j: int) -> Optional[Dict[int, List[int]]]:
+        """Allowed predecessors of each eligible task of technician j (None: any eligible task)"""
+        return self.predecessors[self.skill_sets[j]]
+
+    def restrict_start(self, orders: List[List[int]]) -> List[List[int]]:
+        """
+        Make a plan (task indices per technician) fit the reduced model: routes of a
+        symmetric class are given to its members by decreasing length, then each route
+        is cut at its position cap or at the first transition that was pruned.
+        """
+        orders = [list(order) for order in orders]
+        for members in self.classes:
+            routes = sorted((orders[j] for j in members), key=len, reverse=True)
+            for j, route in zip(members, routes):
+                orders[j] = route
+        for j, order in enumerate(orders):
+            preds = self.predecessors_of(j)
+            cut = min(len(order), self.positions[j])
+            for k in range(1, cut):
+                if preds is not None and order[k - 1] not in preds[order[k]]:
+                    cut = k
+                    break
+            orders[j] = order[:cut]
+        return orders
+
+def _model_size(eligible: List[int], positions: List[int], pairs: List[int]) -> Tuple[int, int]:
+    """
+    (variables, objective terms) of the position model: x and y variables; one
+    first-position term per eligible task and one term per kept pair per position link.
+    """
+    variables = sum(n * (1 + p) for n, p in zip(eligible, positions))
+    terms = sum(n + max(p - 1, 0) * q for n, p, q in zip(eligible, positions, pairs) if p > 0)
+    return variables, terms
+
+def _log(step: str, before: Tuple[int, int], after: Tuple[int, int]):
+    print(f"[PRESOLVE] {step}: vars {before[0]} -> {after[0]}, terms {before[1]} -> {after[1]}")
+
+class PositionLayout:
+    """
+    Flat variable vector of the reduced position model: the x[i,j] entries (technician
+    by technician, eligible tasks in order), then the y[i,k,j] entries (technician by
+    technician, task by task, position by position). x_task/x_tech and
+    y_task/y_pos/y_tech give the indices behind each entry (y arrays start at entry n_x).
+    """
+    def __init__(self, presolved: PresolvedModel):
+        self.presolved = presolved
+        self.eligible = [np.asarray(e, dtype=int) for e in presolved.eligible]
+        self.positions = np.asarray(presolved.positions, dtype=int)
+        n_techs = len(self.eligible)
+        counts = np.array([len(e) for e in self.eligible], dtype=int)
+        y_counts = counts * self.positions
+        self.n_x = int(counts.sum())
+        self.n_y = int(y_counts.sum())
+        self.n_vars = self.n_x + self.n_y
+        self.x_base = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(int)
+        self.y_base = self.n_x + np.concatenate(([0], np.cumsum(y_counts)[:-1])).astype(int)
+        
+        empty = [np.zeros(0, dtype=int)]
+        self.x_task = np.concatenate(empty + self.eligible)
+        self.x_tech = np.repeat(np.arange(n_techs), counts)
+        self.y_task = np.concatenate(empty + [np.repeat(e, p) for e, p in zip(self.eligible, self.positions)])
+        self.y_pos = np.concatenate(empty + [np.tile(np.arange(p), len(e)) for e, p in zip(self.eligible, self.positions)])
+        self.y_tech = np.repeat(np.arange(n_techs), y_counts)
+        # x entry that each y entry belongs to
+        self.y_owner = np.repeat(np.arange(self.n_x), self.positions[self.x_tech])
+        self._pairs: Dict[FrozenSet[str], Tuple[np.ndarray, np.ndarray]] = {}
+    
+    def _local_pairs(self, j: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(previous, next) positions in technician j's eligible list of every kept consecutive pair"""
+        key = self.presolved.skill_sets[j]
+        if key not in self._pairs:
+            eligible = self.eligible[j]
+            predecessors = self.presolved.predecessors_of(j)
+            if predecessors is None:
+                prev, nxt = np.nonzero(~np.eye(len(eligible), dtype=bool))
+            else:
+                nxt = np.repeat(np.arange(len(eligible)), [len(predecessors[i]) for i in eligible.tolist()])
+                prev = np.searchsorted(eligible, [i2 for i in eligible.tolist() for i2 in predecessors[i]])
+            self._pairs[key] = (prev.astype(int), nxt.astype(int))
+        return self._pairs[key]
+    
+    def consecutive_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Entries (y[i2,k-1,j], y[i,k,j]) of every kept pair at every position k >= 1"""
+        prev_parts, next_parts = [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)]
+        for j, p in enumerate(self.positions.tolist()):
+            if p < 2:
+                continue
+            prev, nxt = self._local_pairs(j)
+            k = np.arange(1, p)[:, None]
+            prev_parts.append((self.y_base[j] + prev[None, :] * p + k - 1).ravel())
+            next_parts.append((self.y_base[j] + nxt[None, :] * p + k).ravel())
+        return np.concatenate(prev_parts), np.concatenate(next_parts)
+    
+    def constraints(self) -> List[Tuple[sparse.csr_matrix, str, np.ndarray]]:
+        """(A, sense, b) blocks of the model constraints, A over the whole variable vector"""
+        blocks = []
+        y_entries = self.n_x + np.arange(self.n_y)
+        
+        def block(rows, cols, values, n_rows, sense, rhs):
+            matrix = sparse.csr_matrix((values, (rows, cols)), shape=(n_rows, self.n_vars))
+            blocks.append((matrix, sense, np.full(n_rows, float(rhs))))
+        
+        # 1. Each task assigned to at most one technician
+        tasks, rows = np.unique(self.x_task, return_inverse=True)
+        block(rows, np.arange(self.n_x), np.ones(self.n_x), len(tasks), GRB.LESS_EQUAL, 1)
+        
+        # 2. Task assignment matches position assignment: sum_k y[i,k,j] - x[i,j] = 0
+        block(np.concatenate((self.y_owner, np.arange(self.n_x))), np.concatenate((y_entries, np.arange(self.n_x))),
+              np.concatenate((np.ones(self.n_y), -np.ones(self.n_x))), self.n_x, GRB.EQUAL, 0)
+        
+        # 3. Each position used at most once per technician (one row per (j, k))
+        slot_base = np.concatenate(([0], np.cumsum(self.positions)[:-1])).astype(int)
+        slots = slot_base[self.y_tech] + self.y_pos
+        block(slots, y_entries, np.ones(self.n_y), int(self.positions.sum()), GRB.LESS_EQUAL, 1)
+        
+        # 4. Positions must be consecutive: sum_i y[i,k,j] - sum_i y[i,k-1,j] <= 0 for k >= 1
+        used = self.y_pos >= 1
+        below = self.y_pos < self.positions[self.y_tech] - 1
+        link_base = np.concatenate(([0], np.cumsum(np.maximum(self.positions - 1, 0))[:-1])).astype(int)
+        links = link_base[self.y_tech] + self.y_pos
+        block(np.concatenate((links[used] - 1, links[below])),
+              np.concatenate((y_entries[used], y_entries[below])),
+              np.concatenate((np.ones(used.sum()), -np.ones(below.sum()))),
+              int(np.maximum(self.positions - 1, 0).sum()), GRB.LESS_EQUAL, 0)
+        
+        # 5. Pruned pairs have no cost term, so a task must follow one of its kept
+        #    predecessors: y[i,k,j] - sum_{i2 kept} y[i2,k-1,j] <= 0
+        pruned = np.array([self.presolved.predecessors_of(j) is not None and p >= 2
+                           for j, p in enumerate(self.positions.tolist())], dtype=bool)
+        if pruned.any():
+            prev, cur = self.consecutive_pairs()
+            keep = pruned[self.y_tech[cur - self.n_x]]
+            prev, cur = prev[keep], cur[keep]
+            heads = np.flatnonzero(pruned[self.y_tech] & used)
+            row_of = np.full(self.n_y, -1)
+            row_of[heads] = np.arange(len(heads))
+            block(np.concatenate((np.arange(len(heads)), row_of[cur - self.n_x])),
+                  np.concatenate((self.n_x + heads, prev)),
+                  np.concatenate((np.ones(len(heads)), -np.ones(len(prev)))), len(heads), GRB.LESS_EQUAL, 0)
+        
+        # 6. Symmetric technicians take non-increasing loads
+        rows, cols, values, n_rows = [], [], [], 0
+        for members in self.presolved.classes:
+            for j, j_next in zip(members, members[1:]):
+                if self.positions[j_next] == 0:
+                    break
+                row = n_rows
+                n_rows += 1
+                for tech, sign in ((j_next, 1.0), (j, -1.0)):
+                    entries = self.x_base[tech] + np.arange(len(self.eligible[tech]))
+                    rows += [row] * len(entries)
+                    cols += entries.tolist()
+                    values += [sign] * len(entries)
+        if rows:
+            block(rows, cols, values, n_rows, GRB.LESS_EQUAL, 0)
+        return blocks
+    
+    def start_vector(self, orders: List[List[int]]) -> np.ndarray:
+        """0/1 values of the variable vector for a plan (task indices per technician)"""
+        start = np.zeros(self.n_vars)
+        for j, order in enumerate(orders):
+            if order:
+                local = np.searchsorted(self.eligible[j], order)
+                start[self.x_base[j] + local] = 1.0
+                start[self.y_base[j] + local * self.positions[j] + np.arange(len(order))] = 1.0
+        return start
+    
+    def decode(self, y_values, n_techs: int) -> List[List[int]]:
+        """Task indices of each technician in position order from the values of the y entries"""
+        chosen = np.flatnonzero(np.asarray(y_values) > 0.5)
+        chosen = chosen[np.lexsort((self.y_pos[chosen], self.y_tech[chosen]))]
+        bounds = np.searchsorted(self.y_tech[chosen], np.arange(n_techs + 1)).tolist()
+        ordered = self.y_task[chosen].tolist()
+        return [ordered[bounds[j]:bounds[j + 1]] for j in range(n_techs)]
@@ -0,0 +1,301 @@
+"""
+Solver-independent routing helpers shared by the Gurobi models and the heuristic engines.
+"""
+import math
+from typing import List, Tuple, Optional
+import numpy as np
+from models import Technician, Task, TechnicianRoute, OptimizedTask, Location
+
+# Objective weights shared by all engines
+PRIORITY_WEIGHT = {"high": 3, "medium": 2, "low": 1}
+ASSIGNMENT_REWARD = 100000
+# Lexicographic mode: maximize assigned tasks of each priority in turn, then minimize
+# the priority-weighted distance (no big-M reward)
+OBJECTIVE_LEVELS = ["high", "medium", "low", "distance"]
+
+def calculate_distance(coord1: Location, coord2: Location) -> float:
+    """Calculate distance between two coordinates using Haversine formula"""
+    R = 6371  # Earth's radius in km
+    
+    lat1, lng1 = math.radians(coord1.lat), math.radians(coord1.lng)
+    lat2, lng2 = math.radians(coord2.lat), math.radians(coord2.lng)
+    
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    
+    return R * c
+
+def haversine_matrix(coords_a: np.ndarray, coords_b: np.ndarray) -> np.ndarray:
+    """Vectorized Haversine distances (km) between two arrays of (lat, lng) rows"""
+    R = 6371  # Earth's radius in km
+    
+    lat1 = np.radians(coords_a[:, 0])[:, None]
+    lng1 = np.radians(coords_a[:, 1])[:, None]
+    lat2 = np.radians(coords_b[:, 0])[None, :]
+    lng2 = np.radians(coords_b[:, 1])[None, :]
+    
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(np.clip(1 - a, 0, None)))
+    
+    return R * c
+
+def haversine_pairs(coords_a: np.ndarray, coords_b: np.ndarray) -> np.ndarray:
+    """Vectorized Haversine distances (km) between matching rows of two (lat, lng) arrays"""
+    R = 6371  # Earth's radius in km
+    
+    lat1, lng1 = np.radians(coords_a[:, 0]), np.radians(coords_a[:, 1])
+    lat2, lng2 = np.radians(coords_b[:, 0]), np.radians(coords_b[:, 1])
+    
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(np.clip(1 - a, 0, None)))
+    
+    return R * c
+
+def location_array(items) -> np.ndarray:
+    """Stack the (lat, lng) of technicians or tasks into an (n, 2) array"""
+    return np.array([(item.location.lat, item.location.lng) for item in items], dtype=float).reshape(-1, 2)
+
+def build_distance_matrices(technicians: List[Technician], tasks: List[Task]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute all distances needed by one optimization run.
+    Returns (tech_task_dist[j, i], task_task_dist[i, i2]) in km.
+    """
+    task_coords = location_array(tasks)
+    tech_task_dist = haversine_matrix(location_array(technicians), task_coords)
+    task_task_dist = haversine_matrix(task_coords, task_coords)
+    return tech_task_dist, task_task_dist
+
+def build_route(tech: Technician, order: List[int], tasks: List[Task], tech_dist: Optional[np.ndarray] = None,
+                task_task_dist: Optional[np.ndarray] = None) -> TechnicianRoute:
+    """
+    Build a TechnicianRoute from an ordered list of task indices.
+    tech_dist is the technician's row of the technician-to-task matrix. Without the
+    matrices, the leg distances are computed from the locations of the route.
+    """
+    if task_task_dist is None:
+        stops = location_array([tasks[i] for i in order])
+        starts = np.vstack([[tech.location.lat, tech.location.lng], stops[:-1]])
+        legs = haversine_pairs(starts, stops)
+    else:
+        legs = [tech_dist[i] if k == 0 else task_task_dist[order[k - 1], i] for k, i in enumerate(order)]
+    
+    assigned_tasks = []
+    for i, dist_from_prev in zip(order, legs):
+        task = tasks[i]
+        assigned_tasks.append(OptimizedTask(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            requiredSkill=task.requiredSkill,
+            priority=task.priority,
+            duration=task.duration,
+            location=task.location,
+            distanceFromPrevious=round(float(dist_from_prev), 2)
+        ))
+    
+    total_distance = sum(t.distanceFromPrevious for t in assigned_tasks if t.distanceFromPrevious)
+    total_duration = sum(t.duration for t in assigned_tasks)
+    
+    return TechnicianRoute(
+        technicianId=tech.id,
+        technicianName=tech.name,
+        tasks=assigned_tasks,
+        totalDistance=round(total_distance, 2),
+        totalDuration=total_duration,
+        taskCount=len(assigned_tasks)
+    )
+
+def route_summaries(technicians: List[Technician], tasks: List[Task], orders: List[List[int]],
+                    tech_task_dist: np.ndarray, task_task_dist: np.ndarray) -> List[dict]:
+    """Compact view of a plan (task ids and km per technician), used for streamed incumbents"""
+    summaries = []
+    for j, order in enumerate(orders):
+        if not order:
+            continue
+        distance = tech_task_dist[j, order[0]] + task_task_dist[order[:-1], order[1:]].sum()
+        summaries.append({
+            "technicianId": technicians[j].id,
+            "taskIds": [tasks[i].id for i in order],
+            "totalDistance": round(float(distance), 2)
+        })
+    return summaries
+
+def summaries_to_orders(technicians: List[Technician], tasks: List[Task], summaries: List[dict]) -> List[List[int]]:
+    """
+    Task indices per technician from route summaries (e.g. a saved plan). Unknown or
+    duplicate tasks, missing skills and tasks over the technician capacity are dropped.
+    """
+    tech_index = {tech.id: j for j, tech in enumerate(technicians)}
+    task_index = {task.id: i for i, task in enumerate(tasks)}
+    orders: List[List[int]] = [[] for _ in technicians]
+    seen = set()
+    for summary in summaries:
+        j = tech_index.get(summary["technicianId"])
+        if j is None:
+            continue
+        for task_id in summary["taskIds"]:
+            i = task_index.get(task_id)
+            if (i is None or i in seen or len(orders[j]) >= technicians[j].maxTasksPerDay
+                    or tasks[i].requiredSkill not in technicians[j].skills):
+                continue
+            orders[j].append(i)
+            seen.add(i)
+    return orders
+
+def plan_objective(technicians: List[Technician], routes: List[TechnicianRoute]) -> float:
+    """Objective of the Gurobi models for a plan given as routes, without a distance matrix"""
+    tech_by_id = {tech.id: tech for tech in technicians}
+    prev_points, points, weights, reward = [], [], [], 0.0
+    for route in routes:
+        prev = tech_by_id[route.technicianId].location
+        for task in route.tasks:
+            prev_points.append((prev.lat, prev.lng))
+            points.append((task.location.lat, task.location.lng))
+            weights.append(4 - PRIORITY_WEIGHT[task.priority])
+            reward += ASSIGNMENT_REWARD + PRIORITY_WEIGHT[task.priority] * 1000
+            prev = task.location
+    if not points:
+        return 0.0
+    distances = haversine_pairs(np.array(prev_points), np.array(points))
+    return float((distances * np.array(weights)).sum() - reward)
+
+def level_values(levels: Tuple[float, ...]) -> List[dict]:
+    """Per-level report of a RoutingInstance.levels tuple (assigned task counts, then distance)"""
+    return [
+        {"name": name, "value": round(-value if name != "distance" else value, 4)}
+        for name, value in zip(OBJECTIVE_LEVELS, levels)
+    ]
+
+class SolveMonitor:
+    """
+    Hooks called by the engines while they solve. The default does nothing;
+    background jobs override it to report progress and request cancellation.
+    """
+    def should_stop(self) -> bool:
+        return False
+    
+    def progress(self, fraction: float, phase: str = "solving"):
+        pass
+    
+    def incumbent(self, objective: float, routes: List[dict], bound: Optional[float] = None,
+                  gap: Optional[float] = None):
+        """Called with each improving solution; routes come from route_summaries"""
+        pass
+
+class RoutingInstance:
+    """
+    Array view of a routing problem used by the heuristic engines.
+    A route is a list of task indices; the route of technician j starts at its location
+    and does not return. The cost of an edge a -> b is its distance weighted by the
+    priority multiplier of b, as in the Gurobi objective.
+    """
+    def __init__(self, technicians: List[Technician], tasks: List[Task], lexicographic: bool = False):
+        self.technicians = technicians
+        self.lexicographic = lexicographic
+        self.tasks = tasks
+        self.n_techs = len(technicians)
+        self.n_tasks = len(tasks)
+        self.tech_task_dist, self.task_task_dist = build_distance_matrices(technicians, tasks)
+        
+        self.weight = np.array([4 - PRIORITY_WEIGHT[t.priority] for t in tasks], dtype=float)
+        self.reward = np.array([ASSIGNMENT_REWARD + PRIORITY_WEIGHT[t.priority] * 1000 for t in tasks], dtype=float)
+        self.capacity = np.array([t.maxTasksPerDay for t in technicians], dtype=int)
+        
+        self.skills = np.array([t.requiredSkill for t in tasks], dtype=object)
+        self.eligible = np.zeros((self.n_techs, self.n_tasks), dtype=bool)
+        for j, tech in enumerate(technicians):
+            self.eligible[j] = np.isin(self.skills, list(tech.skills))
+        
+        self.priority = np.array([PRIORITY_WEIGHT[t.priority] for t in tasks], dtype=int)
+        # Reward used to rank single insertions. In lexicographic mode each priority step
+        # outweighs any insertion cost (at most two edges of weight 3 are added).
+        if lexicographic and self.n_tasks:
+            step = 6 * max(float(self.tech_task_dist.max()), float(self.task_task_dist.max())) + 1
+            self.insertion_reward = self.priority * step
+        else:
+            self.insertion_reward = self.reward
+    
+    def incoming_costs(self, j: int, route: List[int]) -> np.ndarray:
+        """Weighted cost of the edge entering each task of the route"""
+        if not route:
+            return np.zeros(0)
+        r = np.asarray(route)
+        dist = np.empty(len(r))
+        dist[0] = self.tech_task_dist[j, r[0]]
+        dist[1:] = self.task_task_dist[r[:-1], r[1:]]
+        return dist * self.weight[r]
+    
+    def route_cost(self, j: int, route: List[int]) -> float:
+        return float(self.incoming_costs(j, route).sum())
+    
+    def objective(self, routes: List[List[int]]) -> float:
+        """Same value as the Gurobi objective: weighted distance minus assignment rewards"""
+        total = 0.0
+        for j, route in enumerate(routes):
+            if route:
+                total += self.route_cost(j, route) - self.reward[route].sum()
+        return float(total)
+    
+    def levels(self, routes: List[List[int]]) -> Tuple[float, ...]:
+        """Lexicographic objective (OBJECTIVE_LEVELS): minus the assigned tasks per priority, then weighted distance"""
+        assigned = np.array([i for route in routes for i in route], dtype=int)
+        counts = np.bincount(self.priority[assigned], minlength=4)
+        distance = sum(self.route_cost(j, route) for j, route in enumerate(routes) if route)
+        return (-float(counts[3]), -float(counts[2]), -float(counts[1]), float(distance))
+    
+    def score(self, routes: List[List[int]]):
+        """Value the heuristics compare: the levels tuple in lexicographic mode, else the objective"""
+        return self.levels(routes) if self.lexicographic else self.objective(routes)
+    
+    def better(self, a, b) -> bool:
+        """Whether score a improves on score b"""
+        if self.lexicographic:
+            return a[:-1] < b[:-1] or (a[:-1] == b[:-1] and a[-1] < b[-1] - 1e-9)
+        return a < b - 1e-9
+    
+    def worsening(self, a, b) -> float:
+        """How much worse score a is than b; losing an assignment level is infinitely worse"""
+        if self.lexicographic:
+            return math.inf if a[:-1] > b[:-1] else a[-1] - b[-1]
+        return a - b
+    
+    def insertion_costs(self, j: int, route: List[int], candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cheapest insertion of each candidate task into the route of technician j.
+        Returns (cost increase, insertion position) arrays aligned with candidates.
+        """
+        r = np.asarray(route, dtype=int)
+        between = self.task_task_dist[np.ix_(r, candidates)]  # (len(route), n_candidates)
+        
+        # costs[p] = inserting before route[p] (p == len(route) appends at the end)
+        costs = np.empty((len(r) + 1, len(candidates)))
+        costs[0] = self.tech_task_dist[j, candidates]
+        costs[1:] = between
+        costs *= self.weight[candidates]
+        if len(r):
+            costs[:-1] += between * self.weight[r][:, None] - self.incoming_costs(j, route)[:, None]
+        
+        positions = costs.argmin(axis=0)
+        return costs[positions, np.arange(len(candidates))], positions
+    
+    def removal_gains(self, j: int, route: List[int]) -> np.ndarray:
+        """Cost decrease obtained by removing each task of the route"""
+        r = np.asarray(route, dtype=int)
+        incoming = self.incoming_costs(j, route)
+        gains = incoming.copy()
+        if len(r) > 1:
+            # The next task is now reached from the previous one
+            bypass = np.empty(len(r) - 1)
+            bypass[0] = self.tech_task_dist[j, r[1]]
+            bypass[1:] = self.task_task_dist[r[:-2], r[2:]]
+            gains[:-1] += incoming[1:] - bypass * self.weight[r[1:]]
+        return gains
+    
+    def to_routes(self, routes: List[List[int]]) -> List[TechnicianRoute]:
+        return [
+            build_route(self.technicians[j], route, self.tasks, self.tech_task_dist[j], self.task_task_dist)
+            for j, route in enumerate(routes) if route
+        ]
@@ -0,0 +1,218 @@
+"""
+Uniform grid index for nearest-neighbour queries on (lat, lng) points.
+
+Points are projected to km on an equirectangular plane around a reference latitude
+(accurate to well under 1% at the scale of a city or a region) and bucketed in
+square cells. A query walks rings of cells outwards from the query point and stops
+as soon as no unvisited ring can hold a closer point, so it touches a handful of
+cells instead of every point.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+EARTH_RADIUS = 6371  # km
+POINTS_PER_CELL = 2
+BATCH_QUERIES = 64  # queries answered together by k_nearest_many
+CACHED_RINGS = 16  # cell offsets of the first rings are precomputed; larger rings are clipped to the grid
+
+def project(coords: np.ndarray, ref_lat: float) -> np.ndarray:
+    """(lat, lng) rows in degrees to (x, y) km on a plane tangent at ref_lat"""
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    rad = np.radians(coords)
+    return np.column_stack((EARTH_RADIUS * rad[:, 1] * math.cos(math.radians(ref_lat)),
+                            EARTH_RADIUS * rad[:, 0]))
+
+class GridIndex:
+    """
+    Nearest-neighbour index over projected points. Items are the integers passed as
+    ids (positions by default) and can be removed, e.g. once a technician is full.
+    """
+    def __init__(self, points: np.ndarray, ids: Optional[Sequence[int]] = None, cell_km: Optional[float] = None):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        ids = list(range(len(points))) if ids is None else list(ids)
+        self._build(dict(zip(ids, map(tuple, points.tolist()))), cell_km)
+
+    def _build(self, points: Dict[int, Tuple[float, float]], cell_km: Optional[float] = None):
+        coords = np.array(list(points.values()), dtype=float).reshape(-1, 2)
+        if cell_km is None:
+            cell_km = self._cell_size(coords)
+        self.cell = cell_km
+        self.points = points
+        self.built_size = len(points)
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        keys = np.floor(coords / cell_km).astype(int)
+        for item, key in zip(points, map(tuple, keys.tolist())):
+            self.cells.setdefault(key, []).append(item)
+        if len(keys):
+            self.bounds = (int(keys[:, 0].min()), int(keys[:, 0].max()), int(keys[:, 1].min()), int(keys[:, 1].max()))
+        else:
+            self.bounds = (0, 0, 0, 0)
+
+    @staticmethod
+    def _cell_size(coords: np.ndarray) -> float:
+        """Square cells holding about POINTS_PER_CELL points on average"""
+        n = max(len(coords), 1)
+        span_x, span_y = (coords.max(axis=0) - coords.min(axis=0)).tolist() if len(coords) else (0.0, 0.0)
+        # Points on a line (or a single point) still get cells of a sensible size
+        floor = max(span_x, span_y, 1e-3) / math.sqrt(n)
+        area = max(span_x, floor) * max(span_y, floor)
+        return math.sqrt(area * POINTS_PER_CELL / n)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def remove(self, item: int):
+        point = self.points.pop(item, None)
+        if point is None:
+            return
+        key = (math.floor(point[0] / self.cell), math.floor(point[1] / self.cell))
+        members = self.cells[key]
+        members.remove(item)
+        if not members:
+            del self.cells[key]
+        # Coarser cells once most items are gone, so queries do not walk empty rings
+        if self.points and len(self.points) * 4 < self.built_size:
+            self._build(self.points)
+
+    def nearest(self, x: float, y: float) -> Optional[int]:
+        """Closest remaining item to the projected point (x, y), or None when empty"""
+        if not self.points:
+            return None
+        cell, cells, points = self.cell, self.cells, self.points
+        cx, cy = math.floor(x / cell), math.floor(y / cell)
+        min_x, max_x, min_y, max_y = self.bounds
+        # Rings closer than the grid are empty and rings past it hold nothing new
+        first_ring = max(0, min_x - cx, cx - max_x, min_y - cy, cy - max_y)
+        last_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        best, best_d = None, math.inf
+        for ring in range(first_ring, last_ring + 1):
+            keys = _ring_offsets(cx, cy, ring) if ring < CACHED_RINGS else _clipped_ring(cx, cy, ring, self.bounds)
+            for key in keys:
+                members = cells.get(key)
+                if members:
+                    for item in members:
+                        px, py = points[item]
+                        d = (px - x) * (px - x) + (py - y) * (py - y)
+                        if d < best_d:
+                            best, best_d = item, d
+            # Every point beyond this ring is at least ring * cell away
+            if best is not None and best_d <= (ring * cell) ** 2:
+                break
+        return best
+
+    def k_nearest(self, x: float, y: float, k: int, exclude: Optional[int] = None) -> List[int]:
+        """Up to k remaining items closest to (x, y), nearest first (exclude: an item to skip)"""
+        if k <= 0 or not self.points:
+            return []
+        cell, cells, points = self.cell, self.cells, self.points
+        cx, cy = math.floor(x / cell), math.floor(y / cell)
+        min_x, max_x, min_y, max_y = self.bounds
+        first_ring = max(0, min_x - cx, cx - max_x, min_y - cy, cy - max_y)
+        last_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        found: List[Tuple[float, int]] = []
+        for ring in range(first_ring, last_ring + 1):
+            keys = _ring_offsets(cx, cy, ring) if ring < CACHED_RINGS else _clipped_ring(cx, cy, ring, self.bounds)
+            for key in keys:
+                members = cells.get(key)
+                if members:
+                    for item in members:
+                        if item != exclude:
+                            px, py = points[item]
+                            found.append(((px - x) * (px - x) + (py - y) * (py - y), item))
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                # As in nearest(): the k-th point is final once no further ring can be closer
+                if found[-1][0] <= (ring * cell) ** 2:
+                    break
+        found.sort()
+        return [item for _, item in found[:k]]
+
+    def k_nearest_many(self, points: np.ndarray, k: int, exclude: Optional[Sequence[int]] = None) -> List[List[int]]:
+        """
+        k_nearest for many query points at once (exclude: an item to skip per query).
+        Queries are grouped in blocks of cells and answered from one distance array per
+        block over the block and a margin of cells around it; the few queries whose k-th
+        neighbour could lie beyond the margin fall back to k_nearest.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if k <= 0 or not self.points or not len(points):
+            return [[] for _ in range(len(points))]
+        result: List[List[int]] = [None] * len(points)
+        cell, cells = self.cell, self.cells
+        min_x, max_x, min_y, max_y = self.bounds
+        wanted = min(k + (exclude is not None), len(self.points))
+        # Margin holding about twice the wanted items, blocks of about BATCH_QUERIES queries
+        margin = max(1, math.ceil(math.sqrt(2 * wanted / (math.pi * POINTS_PER_CELL))))
+        cell_queries = len(points) / max(len(cells), 1)
+        block = max(1, round(math.sqrt(BATCH_QUERIES / max(cell_queries, 1e-9))))
+        keys = np.floor(points / (cell * block)).astype(int)
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for q, key in enumerate(map(tuple, keys.tolist())):
+            groups.setdefault(key, []).append(q)
+
+        for (bx, by), queries in groups.items():
+            x0, x1 = max(bx * block - margin, min_x), min((bx + 1) * block - 1 + margin, max_x)
+            y0, y1 = max(by * block - margin, min_y), min((by + 1) * block - 1 + margin, max_y)
+            items: List[int] = []
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    items.extend(cells.get((cx, cy), ()))
+            n = min(k, len(items) - (exclude is not None))
+            if n < k:
+                for q in queries:
+                    result[q] = self.k_nearest(points[q, 0], points[q, 1], k, None if exclude is None else exclude[q])
+                continue
+
+            candidates = np.array(items)
+            coords = np.array([self.points[item] for item in items])
+            query = points[queries]
+            d2 = ((query[:, None, :] - coords[None, :, :]) ** 2).sum(axis=2)
+            if exclude is not None:
+                excluded = np.array([exclude[q] for q in queries])
+                d2[candidates[None, :] == excluded[:, None]] = np.inf
+            nearest = np.argpartition(d2, n - 1, axis=1)[:, :n]
+            nearest_d2 = np.take_along_axis(d2, nearest, axis=1)
+            order = np.argsort(nearest_d2, axis=1, kind="stable")
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            kth = np.take_along_axis(nearest_d2, order[:, -1:], axis=1)[:, 0]
+            # A point outside the searched cells is farther than the query's distance to their edge,
+            # unless that edge is the edge of the grid
+            reach = np.min(np.column_stack((
+                np.where(x0 > min_x, query[:, 0] - x0 * cell, np.inf),
+                np.where(x1 < max_x, (x1 + 1) * cell - query[:, 0], np.inf),
+                np.where(y0 > min_y, query[:, 1] - y0 * cell, np.inf),
+                np.where(y1 < max_y, (y1 + 1) * cell - query[:, 1], np.inf))), axis=1)
+            settled = ((kth <= reach ** 2) & (kth < np.inf)).tolist()
+            for q, ok, row in zip(queries, settled, candidates[nearest].tolist()):
+                if ok:
+                    result[q] = row
+                else:
+                    result[q] = self.k_nearest(points[q, 0], points[q, 1], k, None if exclude is None else exclude[q])
+        return result
+
+_RING_OFFSETS: List[List[Tuple[int, int]]] = []
+
+def _ring_offsets(cx: int, cy: int, ring: int) -> List[Tuple[int, int]]:
+    """Cells at Chebyshev distance ring from (cx, cy), from offsets computed once per ring"""
+    while len(_RING_OFFSETS) <= ring:
+        r = len(_RING_OFFSETS)
+        offsets = [(dx, dy) for dx in range(-r, r + 1) for dy in (-r, r)] if r else [(0, 0)]
+        offsets += [(dx, dy) for dx in (-r, r) for dy in range(-r + 1, r)]
+        _RING_OFFSETS.append(offsets)
+    return [(cx + dx, cy + dy) for dx, dy in _RING_OFFSETS[ring]]
+
+def _clipped_ring(cx: int, cy: int, ring: int, bounds: Tuple[int, int, int, int]):
+    """Cells at Chebyshev distance ring from (cx, cy) that lie within bounds"""
+    min_x, max_x, min_y, max_y = bounds
+    x_from, x_to = max(cx - ring, min_x), min(cx + ring, max_x)
+    for y in (cy - ring, cy + ring):
+        if min_y <= y <= max_y:
+            for x in range(x_from, x_to + 1):
+                yield (x, y)
+    y_from, y_to = max(cy - ring + 1, min_y), min(cy + ring - 1, max_y)
+    for x in (cx - ring, cx + ring):
+        if min_x <= x <= max_x:
+            for y in range(y_from, y_to + 1):
+                yield (x, y)
@@ -1,18 +1,18 @@
 import requests
 
+API_URL = 'http://localhost:5000/api'
+
 try:
-    resp = requests.get('http://localhost:5000/api/tasks')
+    # One request resets every task, however many there are
+    resp = requests.patch(f'{API_URL}/tasks', json={
+        'filter': {},
+        'update': {'status': 'pending', 'assignedTo': None}
+    })
     if resp.status_code == 200:
-        tasks = resp.json()
-        print(f'Found {len(tasks)} tasks')
-        for task in tasks:
-            print(f'  - {task["title"]}: {task["status"]}')
-            requests.put(f'http://localhost:5000/api/tasks/{task["id"]}', 
-                        json={'status': 'pending', 'assignedTo': None})
-        print('\nAll tasks reset to pending!')
-        
+        print(f'{resp.json()["updated"]} tasks reset to pending!')
+
         # Clear routes too
-        requests.delete('http://localhost:5000/api/routes')
+        requests.delete(f'{API_URL}/routes')
         print('Routes cleared!')
     else:
         print('ERROR: Backend not running on port 5000')
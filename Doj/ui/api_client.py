@@ -0,0 +1,101 @@
+"""
+HTTP calls to the backend off the GUI thread.
+
+Requests run on a small thread pool sharing one requests.Session, so connections
+are kept alive and reused. Each call takes callbacks that are invoked back on the
+GUI thread through a queued Qt signal, so they can update widgets directly.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class ApiClient(QObject):
+    """Asynchronous, pooled client for the backend REST API"""
+    busy_changed = pyqtSignal(int)  # number of requests in flight
+    _finished = pyqtSignal(object, object, object)  # callbacks, response, error
+
+    def __init__(self, base_url, parent=None, workers=4, timeout=30):
+        super().__init__(parent)
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pending = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._finished.connect(self._deliver)
+
+    def request(self, method, path, on_success=None, on_error=None, **kwargs):
+        """Send a request in the background; on_success(response) or on_error(exception) run on the GUI thread"""
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}{path}"
+        callbacks = (on_success, on_error)
+        self.pending += 1
+        self.busy_changed.emit(self.pending)
+
+        def run():
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except Exception as e:
+                self._finished.emit(callbacks, None, e)
+                return
+            self._finished.emit(callbacks, response, None)
+
+        self._executor.submit(run)
+
+    def get(self, path, on_success=None, on_error=None, **kwargs):
+        self.request("GET", path, on_success, on_error, **kwargs)
+
+    def post(self, path, on_success=None, on_error=None, **kwargs):
+        self.request("POST", path, on_success, on_error, **kwargs)
+
+    def put(self, path, on_success=None, on_error=None, **kwargs):
+        self.request("PUT", path, on_success, on_error, **kwargs)
+
+    def patch(self, path, on_success=None, on_error=None, **kwargs):
+        self.request("PATCH", path, on_success, on_error, **kwargs)
+
+    def delete(self, path, on_success=None, on_error=None, **kwargs):
+        self.request("DELETE", path, on_success, on_error, **kwargs)
+
+    def gather(self, calls, on_success=None, on_error=None):
+        """
+        Send several (method, path, kwargs) requests concurrently and call
+        on_success with the responses in the same order once all have arrived
+        (on_error with the first failure instead).
+        """
+        responses = [None] * len(calls)
+        state = {"left": len(calls), "failed": False}
+
+        def done(position, response):
+            responses[position] = response
+            state["left"] -= 1
+            if state["left"] == 0 and not state["failed"] and on_success:
+                on_success(responses)
+
+        def failed(error):
+            if not state["failed"]:
+                state["failed"] = True
+                if on_error:
+                    on_error(error)
+
+        for position, (method, path, kwargs) in enumerate(calls):
+            self.request(method, path, lambda response, p=position: done(p, response), failed, **kwargs)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _deliver(self, callbacks, response, error):
+        self.pending -= 1
+        self.busy_changed.emit(self.pending)
+        on_success, on_error = callbacks
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"API request failed: {error}")
+        elif on_success:
+            on_success(response)
@@ -1,16 +1,53 @@
 import sys
+import json
 import requests
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QTabWidget, QPushButton, QLabel, 
-                             QTableWidget, QTableWidgetItem, QMessageBox,
+                             QTableView, QMessageBox,
                              QDialog, QFormLayout, QLineEdit, QComboBox, 
                              QSpinBox, QTextEdit, QCheckBox, QHeaderView,
-                             QGroupBox, QGridLayout, QSplitter)
-from PyQt5.QtCore import Qt, QTimer
+                             QGroupBox, QGridLayout, QSplitter, QProgressBar)
+from PyQt5.QtCore import Qt, QTimer, QThread, QUrl, QUrlQuery, QSortFilterProxyModel, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtWebSockets import QWebSocket
 from visualization import RouteVisualizer
+from api_client import ApiClient
+from table_models import (TechnicianTableModel, TaskTableModel, BadgeDelegate,
+                          ActionsDelegate, SORT_ROLE)
 
 API_URL = "http://localhost:5000/api"
+WS_URL = "ws://localhost:5000/api/ws"
+
+class JobEventsThread(QThread):
+    """Reads the Server-Sent Events stream of an optimization job"""
+    event_received = pyqtSignal(str, dict)
+    stream_failed = pyqtSignal(str)
+    
+    def __init__(self, job_id, parent=None):
+        super().__init__(parent)
+        self.job_id = job_id
+    
+    def run(self):
+        try:
+            with requests.get(f"{API_URL}/routes/jobs/{self.job_id}/events",
+                              stream=True, timeout=(5, 60)) as response:
+                response.raise_for_status()
+                kind, data = None, []
+                for line in response.iter_lines(decode_unicode=True):
+                    if self.isInterruptionRequested():
+                        return
+                    if line.startswith("event:"):
+                        kind = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data.append(line[5:].strip())
+                    elif not line and kind:
+                        self.event_received.emit(kind, json.loads("\n".join(data)))
+                        if kind == "done":
+                            return
+                        kind, data = None, []
+            self.stream_failed.emit("Flux interrompu")
+        except Exception as e:
+            self.stream_failed.emit(str(e))
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -66,13 +103,13 @@ class MainWindow(QMainWindow):
             QPushButton.danger:hover {
                 background-color: #dc2626;
             }
-            QTableWidget {
+            QTableView {
                 border: 1px solid #e2e8f0;
                 border-radius: 6px;
                 background-color: white;
                 gridline-color: #e2e8f0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
             }
             QHeaderView::section {
@@ -97,6 +134,12 @@ class MainWindow(QMainWindow):
             }
         """)
         
+        # All REST calls run in the background on one keep-alive session
+        self.api = ApiClient(API_URL, self)
+        self.api.busy_changed.connect(self.on_api_busy)
+        self.refresh_running = False
+        self.refresh_queued = False
+        
         # Create central widget and layout
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -115,12 +158,39 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(self.tabs)
         
-        # Auto-refresh data (reduced frequency for performance)
+        # Changes are pushed by the server over a WebSocket; polling only runs
+        # while the socket is down, and a reconnect is attempted every 5 seconds
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self.refresh_data)
         self.refresh_timer.start(30000)  # Refresh every 30 seconds
-        
-        # Initial data load
+        self.socket = QWebSocket()
+        self.socket.connected.connect(self.on_socket_connected)
+        self.socket.disconnected.connect(self.on_socket_disconnected)
+        self.socket.error.connect(lambda error: self.on_socket_disconnected())
+        self.socket.textMessageReceived.connect(self.on_socket_message)
+        self.reconnect_timer = QTimer()
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self.connect_socket)
+        
+        # Optimization runs as a background job on the server, followed through its
+        # event stream (polling is the fallback if the stream breaks)
+        self.optimization_job = None
+        self.job_events = None
+        self.job_timer = QTimer()
+        self.job_timer.timeout.connect(self.poll_optimization_job)
+        
+        # Local copy of the server data, kept up to date with /api/sync deltas
+        self.technicians_by_id = {}
+        self.tasks_by_id = {}
+        self.technicians = []
+        self.tasks = []
+        self.routes = []
+        self.sync_epoch = None
+        self.sync_version = 0
+        self.sync_etag = None
+        
+        # Initial data load; live updates start once it has arrived
+        self.socket_started = False
         self.refresh_data()
     
     def create_header(self):
@@ -152,6 +222,7 @@ class MainWindow(QMainWindow):
         
         # Optimize button
         optimize_btn = QPushButton("🚀 Optimiser les tournées")
+        self.optimize_btn = optimize_btn
         optimize_btn.setProperty("class", "success")
         optimize_btn.setStyleSheet("""
             QPushButton {
@@ -166,6 +237,33 @@ class MainWindow(QMainWindow):
         optimize_btn.clicked.connect(self.optimize_routes)
         buttons_layout.addWidget(optimize_btn)
         
+        # Keep the best plan found so far (shown while an optimization runs)
+        keep_btn = QPushButton("✅ Garder ce plan")
+        self.keep_plan_btn = keep_btn
+        keep_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2563eb;
+                color: white;
+                padding: 12px 24px;
+                font-size: 14px;
+                border: none;
+                border-radius: 6px;
+            }
+            QPushButton:hover {
+                background-color: #1d4ed8;
+            }
+        """)
+        keep_btn.clicked.connect(self.keep_current_plan)
+        keep_btn.hide()
+        buttons_layout.addWidget(keep_btn)
+        
+        # Progress of the running optimization (busy indicator until the solver reports progress)
+        self.optimize_progress = QProgressBar()
+        self.optimize_progress.setFixedWidth(160)
+        self.optimize_progress.setRange(0, 0)
+        self.optimize_progress.hide()
+        buttons_layout.addWidget(self.optimize_progress)
+        
         # Reset button
         reset_btn = QPushButton("🔄 Réinitialiser les tâches")
         reset_btn.setStyleSheet("""
@@ -268,16 +366,17 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(toolbar)
         
-        # Table
-        self.tech_table = QTableWidget()
-        self.tech_table.setColumnCount(6)
-        self.tech_table.setHorizontalHeaderLabels([
-            "Nom", "Compétences", "Capacité/jour", "Disponible", "Actions", "ID"
-        ])
-        self.tech_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.tech_table.setColumnHidden(5, True)  # Hide ID column
-        self.tech_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.tech_table.setSelectionBehavior(QTableWidget.SelectRows)
+        # Table (model/view: only visible rows are painted, refreshes update changed rows)
+        self.tech_model = TechnicianTableModel(self)
+        self.tech_proxy = QSortFilterProxyModel(self)
+        self.tech_proxy.setSourceModel(self.tech_model)
+        self.tech_proxy.setSortRole(SORT_ROLE)
+        self.tech_table = self.create_table_view(self.tech_proxy, TechnicianTableModel.ACTIONS_COLUMN)
+        self.tech_actions = ActionsDelegate(self.tech_table)
+        self.tech_actions.edit_clicked.connect(
+            lambda tech_id: self.edit_technician(self.technicians_by_id[tech_id]))
+        self.tech_actions.delete_clicked.connect(self.delete_technician)
+        self.tech_table.setItemDelegateForColumn(TechnicianTableModel.ACTIONS_COLUMN, self.tech_actions)
         
         layout.addWidget(self.tech_table)
         
@@ -297,27 +396,46 @@ class MainWindow(QMainWindow):
         toolbar.addWidget(QLabel("Filtrer:"))
         self.task_filter = QComboBox()
         self.task_filter.addItems(["Toutes", "En attente", "Assignées", "Terminées"])
-        self.task_filter.currentTextChanged.connect(self.refresh_data)
+        self.task_filter.currentTextChanged.connect(self.filter_tasks)
         toolbar.addWidget(self.task_filter)
         
         toolbar.addStretch()
         layout.addLayout(toolbar)
         
-        # Table
-        self.task_table = QTableWidget()
-        self.task_table.setColumnCount(8)
-        self.task_table.setHorizontalHeaderLabels([
-            "Titre", "Compétence", "Priorité", "Durée (min)", "Statut", "Assigné à", "Actions", "ID"
-        ])
-        self.task_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.task_table.setColumnHidden(7, True)  # Hide ID column
-        self.task_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.task_table.setSelectionBehavior(QTableWidget.SelectRows)
+        # Table (model/view, filtered on the raw status by the proxy)
+        self.task_model = TaskTableModel(self)
+        self.task_proxy = QSortFilterProxyModel(self)
+        self.task_proxy.setSourceModel(self.task_model)
+        self.task_proxy.setSortRole(SORT_ROLE)
+        self.task_proxy.setFilterRole(SORT_ROLE)
+        self.task_proxy.setFilterKeyColumn(TaskTableModel.STATUS_COLUMN)
+        self.task_table = self.create_table_view(self.task_proxy, TaskTableModel.ACTIONS_COLUMN)
+        self.task_badges = BadgeDelegate(self.task_table)
+        self.task_table.setItemDelegateForColumn(TaskTableModel.PRIORITY_COLUMN, self.task_badges)
+        self.task_table.setItemDelegateForColumn(TaskTableModel.STATUS_COLUMN, self.task_badges)
+        self.task_actions = ActionsDelegate(self.task_table)
+        self.task_actions.edit_clicked.connect(lambda task_id: self.edit_task(self.tasks_by_id[task_id]))
+        self.task_actions.delete_clicked.connect(self.delete_task)
+        self.task_table.setItemDelegateForColumn(TaskTableModel.ACTIONS_COLUMN, self.task_actions)
         
         layout.addWidget(self.task_table)
         
         return widget
     
+    def create_table_view(self, model, actions_column):
+        table = QTableView()
+        table.setModel(model)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.horizontalHeader().setSectionResizeMode(actions_column, QHeaderView.Fixed)
+        table.setColumnWidth(actions_column, 100)
+        table.verticalHeader().setDefaultSectionSize(40)
+        table.verticalHeader().hide()
+        table.setEditTriggers(QTableView.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setSortingEnabled(True)
+        table.sortByColumn(-1, Qt.AscendingOrder)  # server order until a header is clicked
+        return table
+    
     def create_routes_tab(self):
         widget = QWidget()
         layout = QVBoxLayout(widget)
@@ -370,35 +488,117 @@ class MainWindow(QMainWindow):
         return widget
     
     def refresh_data(self):
-        """Refresh all data from API"""
+        """Fetch only what changed since the last refresh and merge it (in the background)"""
+        if self.refresh_running:
+            self.refresh_queued = True
+            return
+        self.refresh_running = True
+        params = {"since": self.sync_version, "epoch": self.sync_epoch} if self.sync_epoch else {}
+        headers = {"If-None-Match": self.sync_etag} if self.sync_etag else {}
+        self.api.get("/sync", self.on_sync_response, self.on_sync_failed, params=params, headers=headers)
+    
+    def on_sync_response(self, response):
+        self.refresh_running = False
         try:
-            # Get technicians
-            response = requests.get(f"{API_URL}/technicians")
-            if response.status_code == 200:
-                self.technicians = response.json()
-                self.update_technicians_table()
-            
-            # Get tasks
-            response = requests.get(f"{API_URL}/tasks")
-            if response.status_code == 200:
-                self.tasks = response.json()
-                self.update_tasks_table()
-            
-            # Get routes
-            response = requests.get(f"{API_URL}/routes")
-            if response.status_code == 200:
-                self.routes = response.json()
-                self.update_routes_display()
-            
-            # Update dashboard
-            self.update_dashboard()
-            
-        except requests.exceptions.ConnectionError:
+            if response.status_code == 200:  # 304: nothing changed
+                self.apply_changes(response.json())
+                self.sync_etag = response.headers.get('ETag')
+        except Exception as e:
+            print(f"Error refreshing data: {e}")
+        if not self.socket_started:
+            self.socket_started = True
+            self.connect_socket()
+        if self.refresh_queued:
+            self.refresh_queued = False
+            self.refresh_data()
+    
+    def on_sync_failed(self, error):
+        self.refresh_running = self.refresh_queued = False
+        if isinstance(error, requests.exceptions.ConnectionError):
             QMessageBox.warning(self, "Erreur", 
                               "Impossible de se connecter au serveur.\n"
                               "Assurez-vous que le backend est démarré.")
+        else:
+            print(f"Error refreshing data: {error}")
+    
+    def on_api_busy(self, pending):
+        if pending:
+            self.statusBar().showMessage("⏳ Communication avec le serveur...")
+        else:
+            self.statusBar().clearMessage()
+    
+    def show_request_error(self, error):
+        QMessageBox.critical(self, "Erreur", f"Erreur: {str(error)}")
+    
+    def apply_changes(self, changes):
+        """Merge a delta (from /api/sync or the WebSocket) and redraw what it touches"""
+        if (not changes['reset'] and changes['epoch'] == self.sync_epoch
+                and changes['version'] <= self.sync_version):
+            return  # already applied (a push and a fetch can cover the same writes)
+        if changes['reset']:
+            self.technicians_by_id, self.tasks_by_id, self.routes = {}, {}, []
+        techs_changed = self.merge_changes(self.technicians_by_id, changes['technicians']) or changes['reset']
+        tasks_changed = self.merge_changes(self.tasks_by_id, changes['tasks']) or changes['reset']
+        self.technicians = list(self.technicians_by_id.values())
+        self.tasks = list(self.tasks_by_id.values())
+        
+        # Only the latest routes are sent
+        routes = changes['routes']
+        routes_changed = bool(routes['created'] or routes['updated'] or routes['deleted']) or changes['reset']
+        if routes['created'] or routes['updated']:
+            self.routes = [(routes['created'] + routes['updated'])[-1]]
+        elif self.routes and self.routes[-1]['id'] in routes['deleted']:
+            self.routes = []
+        
+        if techs_changed:
+            self.update_technicians_table()
+        if tasks_changed:
+            self.update_tasks_table()
+        if routes_changed or techs_changed:
+            self.update_routes_display()
+        self.update_dashboard()
+        
+        self.sync_epoch = changes['epoch']
+        self.sync_version = changes['version']
+    
+    def connect_socket(self):
+        """Open the change feed from the version already loaded"""
+        url = QUrl(WS_URL)
+        if self.sync_epoch:
+            query = QUrlQuery()
+            query.addQueryItem("since", str(self.sync_version))
+            query.addQueryItem("epoch", self.sync_epoch)
+            url.setQuery(query)
+        self.socket.open(url)
+    
+    def on_socket_connected(self):
+        self.refresh_timer.stop()
+    
+    def on_socket_disconnected(self):
+        """Poll again until the server is back"""
+        self.socket.abort()
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start(30000)
+        self.reconnect_timer.start(5000)
+    
+    def on_socket_message(self, message):
+        try:
+            event = json.loads(message)
+            if event['type'] == 'changes':
+                self.apply_changes(event)
+            elif event['type'] == 'job' and event['event'] == 'done':
+                if event['job']['id'] == self.optimization_job:
+                    self.finish_optimization_job(event['job'])
         except Exception as e:
-            print(f"Error refreshing data: {e}")
+            print(f"Error applying pushed changes: {e}")
+    
+    def merge_changes(self, items_by_id, changes):
+        """Apply created/updated/deleted entities to a local id -> entity map"""
+        for item in changes['created'] + changes['updated']:
+            items_by_id[item['id']] = item
+        for item_id in changes['deleted']:
+            items_by_id.pop(item_id, None)
+        return bool(changes['created'] or changes['updated'] or changes['deleted'])
     
     def update_dashboard(self):
         """Update dashboard statistics"""
@@ -434,106 +634,16 @@ class MainWindow(QMainWindow):
     
     def update_technicians_table(self):
         """Update technicians table"""
-        self.tech_table.setRowCount(0)
-        
-        for tech in self.technicians:
-            row = self.tech_table.rowCount()
-            self.tech_table.insertRow(row)
-            
-            self.tech_table.setItem(row, 0, QTableWidgetItem(tech['name']))
-            self.tech_table.setItem(row, 1, QTableWidgetItem(", ".join(tech['skills'])))
-            self.tech_table.setItem(row, 2, QTableWidgetItem(str(tech['maxTasksPerDay'])))
-            self.tech_table.setItem(row, 3, QTableWidgetItem("✅ Oui" if tech['available'] else "❌ Non"))
-            
-            # Actions
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(4, 4, 4, 4)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setMaximumWidth(40)
-            edit_btn.clicked.connect(lambda checked, t=tech: self.edit_technician(t))
-            
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setMaximumWidth(40)
-            delete_btn.setStyleSheet("background-color: #ef4444;")
-            delete_btn.clicked.connect(lambda checked, t=tech: self.delete_technician(t['id']))
-            
-            actions_layout.addWidget(edit_btn)
-            actions_layout.addWidget(delete_btn)
-            
-            self.tech_table.setCellWidget(row, 4, actions_widget)
-            self.tech_table.setItem(row, 5, QTableWidgetItem(tech['id']))
+        self.tech_model.set_items(self.technicians)
     
     def update_tasks_table(self):
         """Update tasks table"""
-        self.task_table.setRowCount(0)
-        
-        # Apply filter
-        filter_text = self.task_filter.currentText()
-        filtered_tasks = self.tasks
-        
-        if filter_text == "En attente":
-            filtered_tasks = [t for t in self.tasks if t['status'] == 'pending']
-        elif filter_text == "Assignées":
-            filtered_tasks = [t for t in self.tasks if t['status'] == 'assigned']
-        elif filter_text == "Terminées":
-            filtered_tasks = [t for t in self.tasks if t['status'] == 'completed']
-        
-        for task in filtered_tasks:
-            row = self.task_table.rowCount()
-            self.task_table.insertRow(row)
-            
-            self.task_table.setItem(row, 0, QTableWidgetItem(task['title']))
-            self.task_table.setItem(row, 1, QTableWidgetItem(task['requiredSkill']))
-            
-            # Priority with color
-            priority_item = QTableWidgetItem(task['priority'].upper())
-            if task['priority'] == 'high':
-                priority_item.setBackground(QColor(254, 226, 226))
-                priority_item.setForeground(QColor(153, 27, 27))
-            elif task['priority'] == 'medium':
-                priority_item.setBackground(QColor(254, 243, 199))
-                priority_item.setForeground(QColor(146, 64, 14))
-            else:
-                priority_item.setBackground(QColor(219, 234, 254))
-                priority_item.setForeground(QColor(30, 64, 175))
-            self.task_table.setItem(row, 2, priority_item)
-            
-            self.task_table.setItem(row, 3, QTableWidgetItem(str(task['duration'])))
-            
-            # Status with color
-            status_text = {'pending': 'En attente', 'assigned': 'Assignée', 'completed': 'Terminée'}[task['status']]
-            status_item = QTableWidgetItem(status_text)
-            if task['status'] == 'pending':
-                status_item.setBackground(QColor(254, 243, 199))
-            elif task['status'] == 'assigned':
-                status_item.setBackground(QColor(224, 231, 255))
-            else:
-                status_item.setBackground(QColor(209, 250, 229))
-            self.task_table.setItem(row, 4, status_item)
-            
-            self.task_table.setItem(row, 5, QTableWidgetItem(task.get('assignedTo', '') or '-'))
-            
-            # Actions
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(4, 4, 4, 4)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setMaximumWidth(40)
-            edit_btn.clicked.connect(lambda checked, t=task: self.edit_task(t))
-            
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setMaximumWidth(40)
-            delete_btn.setStyleSheet("background-color: #ef4444;")
-            delete_btn.clicked.connect(lambda checked, t=task: self.delete_task(t['id']))
-            
-            actions_layout.addWidget(edit_btn)
-            actions_layout.addWidget(delete_btn)
-            
-            self.task_table.setCellWidget(row, 6, actions_widget)
-            self.task_table.setItem(row, 7, QTableWidgetItem(task['id']))
+        self.task_model.set_items(self.tasks)
+    
+    def filter_tasks(self, filter_text):
+        """Show only the tasks with the chosen status"""
+        status = {"En attente": "pending", "Assignées": "assigned", "Terminées": "completed"}.get(filter_text)
+        self.task_proxy.setFilterRegExp(f"^{status}$" if status else "")
     
     def update_routes_display(self):
         """Update routes display"""
@@ -609,18 +719,110 @@ class MainWindow(QMainWindow):
             self.visualizer.update_routes(latest_route['routes'], self.technicians)
     
     def optimize_routes(self):
-        """Optimize routes"""
-        try:
-            response = requests.post(f"{API_URL}/routes/optimize")
-            if response.status_code == 200:
-                QMessageBox.information(self, "Succès", "Les tournées ont été optimisées avec succès!")
-                self.tabs.setCurrentIndex(3)  # Switch to routes tab
-                self.refresh_data()
-            else:
-                error = response.json().get('detail', 'Erreur inconnue')
-                QMessageBox.warning(self, "Erreur", f"Erreur lors de l'optimisation:\n{error}")
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+        """Start an optimization job on the server"""
+        self.optimize_btn.setEnabled(False)
+        self.api.post("/routes/optimize", self.on_optimization_started, self.on_optimization_start_failed)
+    
+    def on_optimization_started(self, response):
+        if response.status_code == 202:
+            self.optimization_job = response.json()['id']
+            self.optimize_btn.setText("⏳ Optimisation en cours...")
+            self.optimize_progress.setRange(0, 0)
+            self.optimize_progress.show()
+            self.job_events = JobEventsThread(self.optimization_job, self)
+            self.job_events.event_received.connect(self.on_job_event)
+            self.job_events.stream_failed.connect(self.on_job_stream_failed)
+            self.job_events.start()
+        else:
+            self.optimize_btn.setEnabled(True)
+            error = response.json().get('detail', 'Erreur inconnue')
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de l'optimisation:\n{error}")
+    
+    def on_optimization_start_failed(self, error):
+        self.optimize_btn.setEnabled(True)
+        self.show_request_error(error)
+    
+    def show_job_progress(self, progress):
+        self.optimize_btn.setText(f"⏳ Optimisation en cours... {int(progress * 100)}%")
+        if progress > 0:
+            self.optimize_progress.setRange(0, 100)
+            self.optimize_progress.setValue(int(progress * 100))
+    
+    def on_job_event(self, kind, data):
+        """Live state, progress and incumbents of the running optimization"""
+        if kind == 'progress':
+            self.show_job_progress(data['progress'])
+        elif kind == 'incumbent':
+            self.show_incumbent(data)
+        elif kind == 'done':
+            self.finish_optimization_job(data)
+    
+    def on_job_stream_failed(self, error):
+        """Fall back to polling the job if the event stream breaks"""
+        print(f"Job event stream failed: {error}")
+        if self.optimization_job:
+            self.job_timer.start(1000)
+    
+    def show_incumbent(self, incumbent):
+        """Draw the best plan found so far while the solver keeps improving it"""
+        gap = incumbent.get('gap')
+        gap_text = f" | écart {gap * 100:.1f}%" if gap is not None else ""
+        self.optimize_btn.setText(
+            f"⏳ {incumbent['assignedTasks']} tâches | {incumbent['totalDistance']:.1f} km{gap_text}")
+        self.keep_plan_btn.show()
+        
+        if hasattr(self, 'visualizer'):
+            task_map = self.tasks_by_id
+            routes = [
+                {'technicianId': r['technicianId'],
+                 'tasks': [task_map[task_id] for task_id in r['taskIds'] if task_id in task_map]}
+                for r in incumbent['routes']
+            ]
+            self.visualizer.update_routes(routes, self.technicians)
+    
+    def keep_current_plan(self):
+        """Stop the solver early and keep its best plan"""
+        if not self.optimization_job:
+            return
+        self.keep_plan_btn.setEnabled(False)
+        self.api.post(f"/routes/jobs/{self.optimization_job}/stop", on_error=self.show_request_error)
+    
+    def poll_optimization_job(self):
+        """Follow the running optimization job until it ends"""
+        if self.optimization_job:
+            self.api.get(f"/routes/jobs/{self.optimization_job}", self.on_job_polled,
+                         lambda e: print(f"Error polling optimization job: {e}"))
+    
+    def on_job_polled(self, response):
+        if response.status_code != 200:
+            return
+        job = response.json()
+        if job['state'] in ('queued', 'running'):
+            self.show_job_progress(job['progress'])
+            return
+        
+        self.finish_optimization_job(job)
+    
+    def finish_optimization_job(self, job):
+        # The job stream and the WebSocket both report the end of the job
+        if not self.optimization_job or job.get('id', self.optimization_job) != self.optimization_job:
+            return
+        if self.job_events:
+            self.job_events.requestInterruption()
+        self.job_timer.stop()
+        self.optimization_job = None
+        self.optimize_btn.setEnabled(True)
+        self.optimize_btn.setText("🚀 Optimiser les tournées")
+        self.keep_plan_btn.hide()
+        self.keep_plan_btn.setEnabled(True)
+        self.optimize_progress.hide()
+        
+        if job['state'] == 'completed':
+            QMessageBox.information(self, "Succès", "Les tournées ont été optimisées avec succès!")
+            self.tabs.setCurrentIndex(3)  # Switch to routes tab
+            self.refresh_data()
+        elif job['state'] == 'failed':
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de l'optimisation:\n{job.get('error')}")
     
     def reset_tasks(self):
         """Reset all tasks to pending status"""
@@ -628,22 +830,16 @@ class MainWindow(QMainWindow):
                                     "Réinitialiser toutes les tâches à l'état 'En attente'?",
                                     QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                # Get all tasks and reset them
-                response = requests.get(f"{API_URL}/tasks")
-                if response.status_code == 200:
-                    tasks = response.json()
-                    for task in tasks:
-                        requests.put(f"{API_URL}/tasks/{task['id']}", 
-                                   json={"status": "pending", "assignedTo": None})
-                    
-                    # Clear routes
-                    requests.delete(f"{API_URL}/routes")
-                    
-                    QMessageBox.information(self, "Succès", "Toutes les tâches ont été réinitialisées!")
-                    self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            # Reset every task in one request and clear the routes alongside
+            self.api.gather([
+                ("PATCH", "/tasks", {"json": {"filter": {}, "update": {"status": "pending", "assignedTo": None}}}),
+                ("DELETE", "/routes", {})
+            ], self.on_tasks_reset, self.show_request_error)
+    
+    def on_tasks_reset(self, responses):
+        if responses[0].status_code == 200:
+            QMessageBox.information(self, "Succès", "Toutes les tâches ont été réinitialisées!")
+            self.refresh_data()
     
     def clear_routes(self):
         """Clear all routes"""
@@ -651,87 +847,68 @@ class MainWindow(QMainWindow):
                                     "Êtes-vous sûr de vouloir réinitialiser toutes les tournées?",
                                     QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                requests.delete(f"{API_URL}/routes")
-                QMessageBox.information(self, "Succès", "Les tournées ont été réinitialisées!")
-                self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            self.api.delete("/routes", lambda response: self.on_saved(response, 200, "Les tournées ont été réinitialisées!"),
+                            self.show_request_error)
+    
+    def on_saved(self, response, expected_status, message, error_message=None):
+        """Confirm a create/update/delete and pull the change"""
+        if response.status_code == expected_status:
+            QMessageBox.information(self, "Succès", message)
+            self.refresh_data()
+        elif error_message:
+            QMessageBox.warning(self, "Erreur", error_message)
     
     def add_technician(self):
         dialog = TechnicianDialog(self)
         if dialog.exec_():
-            data = dialog.get_data()
-            try:
-                response = requests.post(f"{API_URL}/technicians", json=data)
-                if response.status_code == 201:
-                    QMessageBox.information(self, "Succès", "Technicien créé avec succès!")
-                    self.refresh_data()
-                else:
-                    QMessageBox.warning(self, "Erreur", "Erreur lors de la création")
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            self.api.post("/technicians",
+                          lambda response: self.on_saved(response, 201, "Technicien créé avec succès!",
+                                                         "Erreur lors de la création"),
+                          self.show_request_error, json=dialog.get_data())
     
     def edit_technician(self, tech):
         dialog = TechnicianDialog(self, tech)
         if dialog.exec_():
-            data = dialog.get_data()
-            try:
-                response = requests.put(f"{API_URL}/technicians/{tech['id']}", json=data)
-                if response.status_code == 200:
-                    QMessageBox.information(self, "Succès", "Technicien modifié avec succès!")
-                    self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            self.api.put(f"/technicians/{tech['id']}",
+                         lambda response: self.on_saved(response, 200, "Technicien modifié avec succès!"),
+                         self.show_request_error, json=dialog.get_data())
     
     def delete_technician(self, tech_id):
         reply = QMessageBox.question(self, "Confirmation",
                                     "Êtes-vous sûr de vouloir supprimer ce technicien?",
                                     QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                requests.delete(f"{API_URL}/technicians/{tech_id}")
-                QMessageBox.information(self, "Succès", "Technicien supprimé!")
-                self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            self.api.delete(f"/technicians/{tech_id}",
+                            lambda response: self.on_saved(response, 200, "Technicien supprimé!"),
+                            self.show_request_error)
     
     def add_task(self):
         dialog = TaskDialog(self)
         if dialog.exec_():
-            data = dialog.get_data()
-            try:
-                response = requests.post(f"{API_URL}/tasks", json=data)
-                if response.status_code == 201:
-                    QMessageBox.information(self, "Succès", "Tâche créée avec succès!")
-                    self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            self.api.post("/tasks", lambda response: self.on_saved(response, 201, "Tâche créée avec succès!"),
+                          self.show_request_error, json=dialog.get_data())
     
     def edit_task(self, task):
         dialog = TaskDialog(self, task)
         if dialog.exec_():
-            data = dialog.get_data()
-            try:
-                response = requests.put(f"{API_URL}/tasks/{task['id']}", json=data)
-                if response.status_code == 200:
-                    QMessageBox.information(self, "Succès", "Tâche modifiée avec succès!")
-                    self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            self.api.put(f"/tasks/{task['id']}",
+                         lambda response: self.on_saved(response, 200, "Tâche modifiée avec succès!"),
+                         self.show_request_error, json=dialog.get_data())
     
     def delete_task(self, task_id):
         reply = QMessageBox.question(self, "Confirmation",
                                     "Êtes-vous sûr de vouloir supprimer cette tâche?",
                                     QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                requests.delete(f"{API_URL}/tasks/{task_id}")
-                QMessageBox.information(self, "Succès", "Tâche supprimée!")
-                self.refresh_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
-
+            self.api.delete(f"/tasks/{task_id}", lambda response: self.on_saved(response, 200, "Tâche supprimée!"),
+                            self.show_request_error)
+    
+    def closeEvent(self, event):
+        self.socket.abort()
+        if self.job_events:
+            self.job_events.requestInterruption()
+        self.api.shutdown()
+        super().closeEvent(event)
 
 class TechnicianDialog(QDialog):
     def __init__(self, parent=None, technician=None):
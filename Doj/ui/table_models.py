@@ -0,0 +1,227 @@
+"""
+Table models for the technicians and tasks tabs.
+
+The views only paint the visible rows; refreshing a model diffs the new list against
+the rows it holds and emits dataChanged / rowsInserted / rowsRemoved for what changed,
+so the selection, scroll position and sort order survive a refresh.
+"""
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QPen
+
+SORT_ROLE = Qt.UserRole       # raw value, used for sorting and filtering
+ID_ROLE = Qt.UserRole + 1     # id of the entity shown on the row
+
+PRIORITY_COLORS = {
+    'high': (QColor(254, 226, 226), QColor(153, 27, 27)),
+    'medium': (QColor(254, 243, 199), QColor(146, 64, 14)),
+    'low': (QColor(219, 234, 254), QColor(30, 64, 175)),
+}
+STATUS_COLORS = {
+    'pending': (QColor(254, 243, 199), QColor(146, 64, 14)),
+    'assigned': (QColor(224, 231, 255), QColor(55, 48, 163)),
+    'completed': (QColor(209, 250, 229), QColor(6, 95, 70)),
+}
+STATUS_LABELS = {'pending': 'En attente', 'assigned': 'Assignée', 'completed': 'Terminée'}
+
+# Past this share of rows inserted or removed, one model reset is cheaper than row signals
+RESET_RATIO = 0.5
+
+class EntityTableModel(QAbstractTableModel):
+    """
+    Rows of entity dicts keyed by id. Subclasses define the columns: headers, and
+    either fields (the item key shown in each column) or their own cell().
+    """
+    headers = []
+    fields = []
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.row_by_id = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.rows[index.row()]
+        if role == ID_ROLE:
+            return item['id']
+        return self.cell(item, index.column(), role)
+
+    def cell(self, item, column, role):
+        """Value of a column for a role: the raw field for sorting, its text for display"""
+        field = self.fields[column] if column < len(self.fields) else None
+        value = item.get(field) if field else None
+        if role == SORT_ROLE:
+            return value
+        if role == Qt.DisplayRole and value is not None:
+            return str(value)
+        return None
+
+    def set_items(self, items):
+        """Replace the rows with items, signalling only the rows that changed"""
+        new_by_id = {item['id']: item for item in items}
+        removed = [row for row, item in enumerate(self.rows) if item['id'] not in new_by_id]
+        added = [item for item in items if item['id'] not in self.row_by_id]
+
+        if len(removed) + len(added) > RESET_RATIO * max(len(self.rows), 1):
+            self.beginResetModel()
+            self.rows = list(items)
+            self.row_by_id = {item['id']: row for row, item in enumerate(self.rows)}
+            self.endResetModel()
+            return
+
+        # Remove from the bottom so the remaining row numbers stay valid
+        for row in reversed(removed):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.rows[row]
+            self.endRemoveRows()
+        if removed:
+            self.row_by_id = {item['id']: row for row, item in enumerate(self.rows)}
+
+        last_column = len(self.headers) - 1
+        for row, item in enumerate(self.rows):
+            new_item = new_by_id[item['id']]
+            if new_item is not item and new_item != item:
+                self.rows[row] = new_item
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+
+        if added:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for row, item in enumerate(added, first):
+                self.rows.append(item)
+                self.row_by_id[item['id']] = row
+            self.endInsertRows()
+
+    def item_by_id(self, item_id):
+        row = self.row_by_id.get(item_id)
+        return self.rows[row] if row is not None else None
+
+class TechnicianTableModel(EntityTableModel):
+    headers = ["Nom", "Compétences", "Capacité/jour", "Disponible", "Actions"]
+    ACTIONS_COLUMN = 4
+
+    def cell(self, tech, column, role):
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return tech['name']
+            if column == 1:
+                return ", ".join(tech['skills'])
+            if column == 2:
+                return str(tech['maxTasksPerDay'])
+            if column == 3:
+                return "✅ Oui" if tech['available'] else "❌ Non"
+        elif role == SORT_ROLE:
+            return [tech['name'], ", ".join(tech['skills']), tech['maxTasksPerDay'],
+                    int(tech['available']), tech['name']][column]
+        return None
+
+class TaskTableModel(EntityTableModel):
+    headers = ["Titre", "Compétence", "Priorité", "Durée (min)", "Statut", "Assigné à", "Actions"]
+    PRIORITY_COLUMN = 2
+    STATUS_COLUMN = 4
+    ACTIONS_COLUMN = 6
+    PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+    def cell(self, task, column, role):
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return task['title']
+            if column == 1:
+                return task['requiredSkill']
+            if column == 2:
+                return task['priority'].upper()
+            if column == 3:
+                return str(task['duration'])
+            if column == 4:
+                return STATUS_LABELS[task['status']]
+            if column == 5:
+                return task.get('assignedTo') or '-'
+        elif role == SORT_ROLE:
+            return [task['title'], task['requiredSkill'], self.PRIORITY_ORDER.get(task['priority'], 3),
+                    task['duration'], task['status'], task.get('assignedTo') or '', task['title']][column]
+        elif role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            colors = None
+            if column == 2:
+                colors = PRIORITY_COLORS.get(task['priority'])
+            elif column == 4:
+                colors = STATUS_COLORS.get(task['status'])
+            if colors:
+                return colors[0] if role == Qt.BackgroundRole else colors[1]
+        return None
+
+class BadgeDelegate(QStyledItemDelegate):
+    """Draws the cell text as a rounded badge using the model's background/foreground colours"""
+
+    def paint(self, painter, option, index):
+        background = index.data(Qt.BackgroundRole)
+        if background is None:
+            return super().paint(painter, option, index)
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        text = index.data(Qt.DisplayRole) or ""
+        width = option.fontMetrics.horizontalAdvance(text) + 16
+        height = option.fontMetrics.height() + 6
+        rect = QRect(option.rect.x() + 6, option.rect.center().y() - height // 2,
+                     min(width, option.rect.width() - 12), height)
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(background)
+        painter.drawRoundedRect(rect, height / 2, height / 2)
+        painter.setPen(QPen(index.data(Qt.ForegroundRole) or QColor(30, 41, 59)))
+        painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
+
+class ActionsDelegate(QStyledItemDelegate):
+    """Paints edit/delete buttons in a cell and reports clicks with the row's entity id"""
+    edit_clicked = pyqtSignal(str)
+    delete_clicked = pyqtSignal(str)
+
+    BUTTON_WIDTH = 40
+    SPACING = 6
+
+    def button_rects(self, rect):
+        height = min(rect.height() - 8, 28)
+        top = rect.center().y() - height // 2
+        edit = QRect(rect.x() + 4, top, self.BUTTON_WIDTH, height)
+        delete = QRect(edit.right() + self.SPACING, top, self.BUTTON_WIDTH, height)
+        return edit, delete
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        for rect, color, label in zip(self.button_rects(option.rect),
+                                      (QColor(37, 99, 235), QColor(239, 68, 68)), ("✏️", "🗑️")):
+            painter.setBrush(color)
+            painter.drawRoundedRect(rect, 6, 6)
+            painter.setPen(Qt.white)
+            painter.drawText(rect, Qt.AlignCenter, label)
+            painter.setPen(Qt.NoPen)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            edit, delete = self.button_rects(option.rect)
+            if edit.contains(event.pos()):
+                self.edit_clicked.emit(index.data(ID_ROLE))
+                return True
+            if delete.contains(event.pos()):
+                self.delete_clicked.emit(index.data(ID_ROLE))
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -1,34 +1,181 @@
 import math
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QLabel
-from PyQt5.QtCore import Qt, QRectF, QPointF
-from PyQt5.QtGui import QPen, QBrush, QColor, QFont, QPainter, QPainterPath
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsItem,
+                             QStyleOptionGraphicsItem)
+from PyQt5.QtCore import Qt, QRectF, QPointF, QLineF
+from PyQt5.QtGui import QPen, QBrush, QColor, QFont, QPainter, QPainterPath, QPixmapCache, QPolygonF
+
+# Canvas dimensions (scene units)
+CANVAS_WIDTH = 1000
+CANVAS_HEIGHT = 700
+MARGIN = 60
+
+# Marker sizes in screen pixels (kept constant while zooming)
+SQUARE_SIZE = 14
+CIRCLE_RADIUS = 8
+DOT_RADIUS = 3
+MAX_SCALE = 2.0       # when zoomed out further, markers shrink with the map
+LABEL_LIMIT = 300     # stop numbers are drawn only when about this few stops are in view
+MARKER_LIMIT = 1500   # above this many stops in view, stops are plain dots and legs are aliased
+PIXMAP_CACHE_KB = 128 * 1024
+
+class RouteItem(QGraphicsItem):
+    """
+    One technician route: a single QPainterPath for the legs (bounds and shape) plus
+    the stop markers. The legs are stroked as a line list, since Qt's antialiased
+    stroker is very slow on a self-intersecting path.
+
+    Markers keep their screen size, so zooming in separates them. The detail level
+    follows the number of stops of the whole plan estimated to be in view (`plan`
+    is shared by all the items of a plan): plain dots when crowded, circles next,
+    numbers once few stops are visible. Stops whose markers would overlap on screen
+    are merged. The item is cached in device coordinates, so a repaint without a
+    zoom change is a pixmap blit.
+    """
+    def __init__(self, base, stops, color, name, plan):
+        super().__init__()
+        self.plan = plan
+        self.base = base
+        self.stops = stops
+        self.color = color
+        self.name = name
+        self.path = QPainterPath(base)
+        for point in stops:
+            self.path.lineTo(point)
+        self.legs = [QLineF(start, end) for start, end in zip([base] + stops, stops)]
+        self.bounds = self.path.boundingRect().adjusted(
+            -SQUARE_SIZE * MAX_SCALE, -30 * MAX_SCALE, 150 * MAX_SCALE, SQUARE_SIZE * MAX_SCALE)
+        self.groups = {}  # cell size -> (single stops as (number, point), merged points)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+
+    def boundingRect(self):
+        return self.bounds
+
+    def shape(self):
+        return self.path
+
+    def stop_groups(self, cell):
+        """Stops bucketed on a grid, cached per power-of-two cell size"""
+        cell = 2 ** math.ceil(math.log2(cell))
+        if cell not in self.groups:
+            cells = {}
+            for number, point in enumerate(self.stops, 1):
+                cells.setdefault((int(point.x() // cell), int(point.y() // cell)), []).append((number, point))
+            singles = [members[0] for members in cells.values() if len(members) == 1]
+            merged = [members[0][1] for members in cells.values() if len(members) > 1]
+            self.groups[cell] = (singles, merged)
+        return self.groups[cell]
+
+    def stops_in_view(self, lod):
+        views = self.scene().views() if self.scene() else []
+        if not views:
+            return self.plan['stops']
+        viewport = views[0].viewport()
+        visible_area = viewport.width() * viewport.height() / (lod * lod)
+        return self.plan['stops'] * min(1.0, visible_area / (CANVAS_WIDTH * CANVAS_HEIGHT))
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        scale = min(1.0 / lod, MAX_SCALE)  # scene units per screen pixel
+        exposed = option.exposedRect
+        in_view = self.stops_in_view(lod)
+        crowded = in_view > MARKER_LIMIT
+
+        # Legs
+        painter.setPen(QPen(self.color, 3 * scale))
+        painter.setBrush(Qt.NoBrush)
+        painter.setRenderHint(QPainter.Antialiasing, not crowded)
+        painter.drawLines(self.legs)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+
+        if crowded:
+            # Stops as dots, one per dot-sized cell
+            singles, merged = self.stop_groups(2 * DOT_RADIUS * scale)
+            points = [point for _, point in singles] + merged
+            pen = QPen(self.color, 2 * DOT_RADIUS * scale)
+            pen.setCapStyle(Qt.RoundCap)
+            painter.setPen(pen)
+            painter.drawPoints(QPolygonF([point for point in points if exposed.contains(point)]))
+        else:
+            # A numbered circle when alone, a dot where several overlap
+            singles, merged = self.stop_groups(2 * CIRCLE_RADIUS * scale)
+            singles = [(number, point) for number, point in singles if exposed.contains(point)]
+            radius = CIRCLE_RADIUS * scale
+            painter.setPen(QPen(self.color, 2 * scale))
+            painter.setBrush(QBrush(QColor("white")))
+            for number, point in singles:
+                painter.drawEllipse(point, radius, radius)
+            if in_view <= LABEL_LIMIT:
+                painter.setPen(self.color)
+                font = QFont("Arial")
+                font.setBold(True)
+                font.setPointSizeF(9 * scale)
+                painter.setFont(font)
+                for number, point in singles:
+                    painter.drawText(QRectF(point.x() - radius, point.y() - radius, 2 * radius, 2 * radius),
+                                     Qt.AlignCenter, str(number))
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QBrush(self.color))
+            dot = DOT_RADIUS * scale * 1.5
+            for point in merged:
+                if exposed.contains(point):
+                    painter.drawEllipse(point, dot, dot)
+
+        # Technician base as a square, with its name
+        size = SQUARE_SIZE * scale
+        painter.setPen(QPen(self.color, 2 * scale))
+        painter.setBrush(QBrush(self.color))
+        painter.drawRect(QRectF(self.base.x() - size / 2, self.base.y() - size / 2, size, size))
+        font = QFont("Arial")
+        font.setBold(True)
+        font.setPointSizeF(10 * scale)
+        painter.setFont(font)
+        painter.drawText(QPointF(self.base.x() + 10 * scale, self.base.y() - 6 * scale), self.name)
+
+class RouteView(QGraphicsView):
+    """Graphics view with wheel zoom and drag panning"""
+    def wheelEvent(self, event):
+        factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+        self.scale(factor, factor)
 
 class RouteVisualizer(QWidget):
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
-        
+
         self.scene = QGraphicsScene()
-        self.view = QGraphicsView(self.scene)
+        self.view = RouteView(self.scene)
         self.view.setRenderHint(QPainter.Antialiasing)
         self.view.setRenderHint(QPainter.TextAntialiasing)
         self.view.setBackgroundBrush(QBrush(QColor("#ffffff")))
-        self.view.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        self.view.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.view.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.view.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.layout.addWidget(self.view)
-        
+
+        # Route items are cached as pixmaps; the default 10 MB holds only a few routes
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+
         self.colors = [
             QColor("#e6194b"), QColor("#3cb44b"), QColor("#ffe119"), QColor("#4363d8"),
             QColor("#f58231"), QColor("#911eb4"), QColor("#46f0f0"), QColor("#f032e6"),
             QColor("#bcf60c"), QColor("#fabebe"), QColor("#008080"), QColor("#e6beff"),
             QColor("#9a6324"), QColor("#fffac8"), QColor("#800000"), QColor("#aaffc3")
         ]
-        
+
+        # Items currently drawn, by technician id, with the data they were drawn from
+        self.route_items = {}
+        self.route_keys = {}
+        self.bounds = None
+        self.plan = {'stops': 0}  # shared with the route items for their level of detail
+
         # Show placeholder
         self.show_placeholder()
-    
+
     def show_placeholder(self):
         self.scene.clear()
+        self.route_items, self.route_keys, self.bounds = {}, {}, None
         text = self.scene.addText("Aucune route optimisée à afficher\n\nCliquez sur 'Optimiser les tournées' pour générer les routes")
         text.setFont(QFont("Arial", 12))
         text.setDefaultTextColor(QColor("#666"))
@@ -36,149 +183,108 @@ class RouteVisualizer(QWidget):
         self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
 
     def update_routes(self, routes, technicians):
-        """Update the visualization with optimized routes"""
+        """Update the visualization with optimized routes, redrawing only the routes that changed"""
         print(f"[Visualizer] Updating with {len(routes)} routes and {len(technicians)} technicians")
-        
-        self.scene.clear()
-        
+
         if not routes or len(routes) == 0:
             self.show_placeholder()
             return
-        
+
         # Create tech mapping
         tech_map = {t['id']: t for t in technicians}
-        
-        # Collect all coordinates
+
+        # Collect the coordinates of each drawable route
+        drawable = []
         all_points = []
-        
-        for route in routes:
+
+        for route_idx, route in enumerate(routes):
             tech_id = route.get('technicianId')
-            if tech_id and tech_id in tech_map:
-                tech = tech_map[tech_id]
-                loc = tech.get('location', {})
-                if loc.get('lat') and loc.get('lng'):
-                    all_points.append((loc['lat'], loc['lng']))
-            
-            tasks = route.get('tasks', [])
-            for task in tasks:
-                loc = task.get('location', {})
-                if loc.get('lat') and loc.get('lng'):
-                    all_points.append((loc['lat'], loc['lng']))
-        
+            if not tech_id or tech_id not in tech_map:
+                continue
+            tech = tech_map[tech_id]
+            loc = tech.get('location', {})
+            if not loc.get('lat') or not loc.get('lng'):
+                continue
+
+            stops = []
+            for task in route.get('tasks', []):
+                task_loc = task.get('location', {})
+                if task_loc.get('lat') and task_loc.get('lng'):
+                    stops.append((task_loc['lat'], task_loc['lng']))
+
+            base = (loc['lat'], loc['lng'])
+            all_points.append(base)
+            all_points.extend(stops)
+            key = (route_idx % len(self.colors), tech.get('name', 'Tech'), base, tuple(stops))
+            drawable.append((tech_id, key))
+
         if not all_points:
             print("[Visualizer] No valid points found")
             self.show_placeholder()
             return
-        
+
         print(f"[Visualizer] Found {len(all_points)} points to draw")
-        
+
         # Calculate bounds
         lats = [p[0] for p in all_points]
         lngs = [p[1] for p in all_points]
-        
+
         min_lat, max_lat = min(lats), max(lats)
         min_lng, max_lng = min(lngs), max(lngs)
-        
-        # Add padding (10% on each side)
+
+        # Add padding (15% on each side)
         lat_range = max(max_lat - min_lat, 0.01)
         lng_range = max(max_lng - min_lng, 0.01)
-        
+
         padding_lat = lat_range * 0.15
         padding_lng = lng_range * 0.15
-        
-        min_lat -= padding_lat
-        max_lat += padding_lat
-        min_lng -= padding_lng
-        max_lng += padding_lng
-        
-        # Canvas dimensions
-        canvas_width = 1000
-        canvas_height = 700
-        margin = 60
-        
+
+        bounds = (min_lat - padding_lat, max_lat + padding_lat, min_lng - padding_lng, max_lng + padding_lng)
+
+        self.plan['stops'] = len(all_points) - len(drawable)
+
+        # A new projection moves every point: start from an empty scene
+        refit = bounds != self.bounds
+        if refit:
+            self.scene.clear()
+            self.route_items, self.route_keys = {}, {}
+            self.bounds = bounds
+            self.scene.setSceneRect(0, 0, CANVAS_WIDTH, CANVAS_HEIGHT)
+
+        min_lat, max_lat, min_lng, max_lng = bounds
+
         # Coordinate transformation
-        def to_canvas(lat, lng):
-            if max_lng == min_lng:
-                x = canvas_width / 2
-            else:
-                x = margin + (lng - min_lng) / (max_lng - min_lng) * (canvas_width - 2 * margin)
-            
-            if max_lat == min_lat:
-                y = canvas_height / 2
-            else:
-                # Flip Y axis (screen coords go down)
-                y = canvas_height - margin - (lat - min_lat) / (max_lat - min_lat) * (canvas_height - 2 * margin)
-            
-            return x, y
-        
-        # Set scene rect
-        self.scene.setSceneRect(0, 0, canvas_width, canvas_height)
-        
-        # Draw each route
-        for route_idx, route in enumerate(routes):
-            color = self.colors[route_idx % len(self.colors)]
-            
-            tech_id = route.get('technicianId')
-            if not tech_id or tech_id not in tech_map:
-                continue
-            
-            tech = tech_map[tech_id]
-            tech_loc = tech.get('location', {})
-            
-            if not tech_loc.get('lat') or not tech_loc.get('lng'):
+        def to_canvas(point):
+            lat, lng = point
+            x = MARGIN + (lng - min_lng) / (max_lng - min_lng) * (CANVAS_WIDTH - 2 * MARGIN)
+            # Flip Y axis (screen coords go down)
+            y = CANVAS_HEIGHT - MARGIN - (lat - min_lat) / (max_lat - min_lat) * (CANVAS_HEIGHT - 2 * MARGIN)
+            return QPointF(x, y)
+
+        # Drop routes that are gone, then add or replace the ones that changed
+        wanted = dict(drawable)
+        for tech_id in list(self.route_items):
+            if tech_id not in wanted:
+                self.scene.removeItem(self.route_items.pop(tech_id))
+                del self.route_keys[tech_id]
+
+        redrawn = 0
+        for tech_id, key in drawable:
+            if self.route_keys.get(tech_id) == key:
                 continue
-            
-            # Get starting position
-            curr_x, curr_y = to_canvas(tech_loc['lat'], tech_loc['lng'])
-            
-            # Draw technician base as a square
-            square_size = 14
-            square = self.scene.addRect(
-                curr_x - square_size/2, curr_y - square_size/2,
-                square_size, square_size,
-                QPen(color, 2),
-                QBrush(color)
-            )
-            
-            # Technician label
-            tech_label = self.scene.addText(tech.get('name', 'Tech'))
-            tech_label.setDefaultTextColor(color)
-            tech_label.setFont(QFont("Arial", 10, QFont.Bold))
-            tech_label.setPos(curr_x + 10, curr_y - 20)
-            
-            # Draw path through tasks
-            tasks = route.get('tasks', [])
-            for task_idx, task in enumerate(tasks, 1):
-                task_loc = task.get('location', {})
-                
-                if not task_loc.get('lat') or not task_loc.get('lng'):
-                    continue
-                
-                next_x, next_y = to_canvas(task_loc['lat'], task_loc['lng'])
-                
-                # Draw connecting line
-                line = self.scene.addLine(curr_x, curr_y, next_x, next_y, QPen(color, 3))
-                
-                # Draw task point as circle
-                circle_radius = 8
-                circle = self.scene.addEllipse(
-                    next_x - circle_radius, next_y - circle_radius,
-                    circle_radius * 2, circle_radius * 2,
-                    QPen(color, 2),
-                    QBrush(QColor("white"))
-                )
-                
-                # Task number label
-                task_num = self.scene.addText(str(task_idx))
-                task_num.setDefaultTextColor(color)
-                task_num.setFont(QFont("Arial", 9, QFont.Bold))
-                task_num.setPos(next_x - 4, next_y - 8)
-                
-                # Move to next position
-                curr_x, curr_y = next_x, next_y
-        
-        # Fit view to scene
-        self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
-        self.view.centerOn(canvas_width / 2, canvas_height / 2)
-        
-        print(f"[Visualizer] Drawing complete")
+            if tech_id in self.route_items:
+                self.scene.removeItem(self.route_items[tech_id])
+            color_idx, name, base, stops = key
+            item = RouteItem(to_canvas(base), [to_canvas(stop) for stop in stops], self.colors[color_idx], name, self.plan)
+            self.scene.addItem(item)
+            self.route_items[tech_id] = item
+            self.route_keys[tech_id] = key
+            redrawn += 1
+
+        # Fit view to scene (only when the layout changed, so the user's zoom is kept)
+        if refit:
+            self.view.resetTransform()
+            self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
+            self.view.centerOn(CANVAS_WIDTH / 2, CANVAS_HEIGHT / 2)
+
+        print(f"[Visualizer] Drawing complete ({redrawn} routes redrawn)")